@@ -4,16 +4,55 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 import os
 import markdown as md
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
-from database import db, Database
+from database import db, Database, CHARACTER_FIELDS, QueryError, storage_path, read_blocks
+import edge_cache
+from edge_cache import edge_cached, add_surrogate_keys, purge
+from assets import asset_urls, serve_asset, service_worker_script, theme_url
+from json_provider import FastJSONProvider
+from login_guard import login_guard
+import rate_limit
+from rate_limit import client_ip, rate_limited, upstream_limiter
+import change_feed
+import deadline
+import job_queue
+import storage_sweeper
+import chunked_upload
 import mimetypes
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET', 'secret-jwt-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=8)
 app.config['SECRET_KEY'] = os.getenv('SESSION_SECRET', 'dev-secret-key')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  
+app.config['TRUSTED_PROXY_COUNT'] = rate_limit.TRUSTED_PROXY_COUNT
+
+# Latency budget in seconds per endpoint; others get REQUEST_BUDGET_SECONDS and None means unbounded.
+# Public reads fail fast (or come back partial) so a slow upstream cannot pile up requests.
+app.config['REQUEST_BUDGETS'] = {
+    'api_characters': 4,
+    'api_character_detail': 4,
+    'api_character_timeline': 4,
+    'api_timelines': 4,
+    'api_character_relationships': 4,
+    'api_character_gallery': 4,
+    'api_character_love_interests': 4,
+    'api_events': 3,
+    'api_event_detail': 4,
+    'api_create_gallery_image': 60,
+    'api_create_character': 60,
+    'api_update_character': 60,
+    'api_create_event': 30,
+    'api_update_event': 30,
+    'api_rebuild_event_summaries': 120,
+    'api_storage_sweep': 120,
+    'api_run_jobs': None,
+}
+deadline.init_app(app)
+edge_cache.init_app(app)
+rate_limit.init_app(app)
 
 jwt = JWTManager(app)
 
@@ -27,7 +66,7 @@ def load_era_names():
     global ERA_NAMES
     try:
 
-        eras = db.supabase.query('eras', select='slug,name')
+        eras = db.supabase.query('eras', params={'order': 'display_order'}, select='slug,name')
         if eras:
 
             ERA_NAMES = {era['slug']: era['name'] for era in eras}
@@ -49,12 +88,45 @@ if not ERA_NAMES:
         'infinite-frontier': 'Infinite Frontier'
     }
 
+GALLERY_MAX_PAGE = 100
+EVENTS_MAX_LIMIT = 100
+TIMELINES_MAX_CHARACTERS = 8
+TIMELINES_MAX_EVENTS = 500
+EVENT_SUMMARY_COLUMNS = {'id', 'title', 'event_date', 'era', 'summary'}
+EVENT_SUMMARY_FIELDS = EVENT_SUMMARY_COLUMNS | {'character_id', 'character_name', 'character_image', 'characters'}
+
+def requested_fields(allowed):
+    """
+    Parse the optional ?fields=a,b,c sparse fieldset into a list, or None for all fields.
+    Raises ValueError naming any field outside `allowed`.
+    """
+    raw = request.args.get('fields', '')
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = sorted(set(fields) - allowed)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields or None
+
 def clean_form_data(data):
     """Helper function to convert empty strings for specific fields to None."""
     if 'birthday' in data and data['birthday'] == '':
         data['birthday'] = None
     return data
 
+@app.context_processor
+def inject_asset_urls():
+    return {'asset_urls': asset_urls}
+
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    return serve_asset(filename)
+
+@app.route('/sw.js')
+def service_worker():
+    response = app.response_class(service_worker_script(), mimetype='application/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -76,34 +148,105 @@ def admin():
     return render_template('admin.html')
 
 @app.route('/api/characters')
+@edge_cached('characters', 'characters')
+@rate_limited(1)
 def api_characters():
     family = request.args.get('family', 'all')
-    characters = db.get_all_characters(family)
+    try:
+        fields = requested_fields(CHARACTER_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    characters = db.get_all_characters(family, fields=fields)
     return jsonify(characters)
 
 @app.route('/api/characters/<int:character_id>')
+@edge_cached('character')
+@rate_limited(2)
 def api_character_detail(character_id):
+    add_surrogate_keys(f'character:{character_id}')
     character = db.get_character_by_id(character_id)
     if not character:
         return jsonify({'error': 'Character not found'}), 404
+    character['theme_css'] = theme_url(character.get('name'))
     return jsonify(character)
 
 @app.route('/api/characters/<int:character_id>/timeline')
+@edge_cached('character')
+@rate_limited(1)
 def api_character_timeline(character_id):
+    add_surrogate_keys(f'character:{character_id}')
     events = db.get_character_timeline(character_id)
 
     for event in events:
         era_slug = event.get('era')
         event['era_display'] = ERA_NAMES.get(era_slug, era_slug)
+        add_surrogate_keys(f"event:{event['id']}")
     return jsonify(events)
 
+@app.route('/api/timelines')
+@edge_cached('character')
+@rate_limited(3)
+def api_timelines():
+    """
+    Side-by-side timelines: /api/timelines?ids=1,2,3[&from=YYYY-MM-DD][&to=YYYY-MM-DD].
+    Events are merged chronologically, shared events appear once, and the result is
+    grouped by era in ERA_NAMES (display) order.
+    """
+    raw_ids = [i.strip() for i in request.args.get('ids', '').split(',') if i.strip()]
+    bad_ids = [i for i in raw_ids if not i.isdigit()]
+    if bad_ids:
+        return jsonify({'error': f"Invalid character id(s): {', '.join(bad_ids)}"}), 400
+    character_ids = list(dict.fromkeys(int(i) for i in raw_ids))
+    if not character_ids:
+        return jsonify({'error': 'ids must list at least one character id'}), 400
+    if len(character_ids) > TIMELINES_MAX_CHARACTERS:
+        return jsonify({'error': f'At most {TIMELINES_MAX_CHARACTERS} characters can be compared'}), 400
+
+    window = {}
+    for param in ('from', 'to'):
+        value = request.args.get(param)
+        if value:
+            try:
+                window[param] = date.fromisoformat(value).isoformat()
+            except ValueError:
+                return jsonify({'error': f'{param} must be a YYYY-MM-DD date'}), 400
+    limit = min(max(request.args.get('limit', TIMELINES_MAX_EVENTS, type=int), 1), TIMELINES_MAX_EVENTS)
+
+    add_surrogate_keys(*(f'character:{cid}' for cid in character_ids))
+    try:
+        events, truncated = db.get_character_timelines(character_ids, window.get('from'), window.get('to'), limit)
+    except QueryError:
+        return jsonify({'error': 'Timelines are unavailable'}), 503
+
+    by_era = {}
+    for event in events:
+        add_surrogate_keys(f"event:{event['id']}")
+        by_era.setdefault(event.get('era'), []).append(event)
+    # Known eras in display order, then any era missing from ERA_NAMES in order of appearance
+    era_order = [slug for slug in ERA_NAMES if slug in by_era] + [slug for slug in by_era if slug not in ERA_NAMES]
+
+    return jsonify({
+        'character_ids': character_ids,
+        'window': window,
+        'total': len(events),
+        'truncated': truncated,
+        'eras': [
+            {'era': slug, 'era_display': ERA_NAMES.get(slug, slug), 'events': by_era[slug]}
+            for slug in era_order
+        ]
+    })
+
 @app.route('/api/characters/<int:character_id>/relationships')
+@edge_cached('character')
+@rate_limited(2)
 def api_character_relationships(character_id):
+    add_surrogate_keys(f'character:{character_id}')
     relationships = db.get_character_relationships(character_id)
     formatted = []
 
     for rel in relationships:
         related = rel.get('related_character', {})
+        add_surrogate_keys(f"character:{rel['related_character_id']}")
         formatted.append({
             'id': rel['id'],
             'type': rel['type'], 
@@ -116,45 +259,101 @@ def api_character_relationships(character_id):
     return jsonify(formatted)
 
 @app.route('/api/characters/<int:character_id>/gallery')
+@edge_cached('character', 'gallery')
+@rate_limited(4)
 def api_character_gallery(character_id):
-    images = db.get_character_gallery(character_id)
-    return jsonify(images)
+    add_surrogate_keys(f'character:{character_id}')
+    limit = min(max(request.args.get('limit', 24, type=int), 1), GALLERY_MAX_PAGE)
+    try:
+        images, next_cursor = db.get_character_gallery_page(character_id, limit, request.args.get('cursor') or None)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    for img in images:
+        if img.get('event_id'):
+            add_surrogate_keys(f"event:{img['event_id']}")
+    response = jsonify(images)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/characters/<int:character_id>/love-interests')
+@edge_cached('character')
+@rate_limited(1)
 def api_character_love_interests(character_id):
+    add_surrogate_keys(f'character:{character_id}')
     interests = db.get_character_love_interests(character_id)
+    for interest in interests:
+        partner_id = (interest.get('partner') or {}).get('id')
+        if partner_id:
+            add_surrogate_keys(f'character:{partner_id}')
     return jsonify(interests)
 
 @app.route('/api/events')
+@edge_cached('events', 'events')
+@rate_limited(2)
 def api_events():
-    limit = int(request.args.get('limit', 6))
-    events = db.get_recent_events(limit)
+    limit = min(max(request.args.get('limit', 6, type=int), 1), EVENTS_MAX_LIMIT)
+    try:
+        fields = requested_fields(EVENT_SUMMARY_FIELDS | {'era_display'})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    summary_fields = None
+    if fields:
+        summary_fields = sorted({'era' if f == 'era_display' else f for f in fields} & EVENT_SUMMARY_FIELDS | {'id', 'character_ids'})
+
+    # Precomputed documents are ready to serve once event_summaries covers every event;
+    # until the backfill is complete the joined read serves the page instead.
+    events = []
+    if db.event_summaries_complete():
+        events = db.get_event_summaries(limit, fields=summary_fields)
+    if not events:
+        events = [summarize_event(event) for event in legacy_recent_events(limit, fields)]
+
     formatted = []
     for event in events:
-        event_chars = event.get('event_characters', [])
-        first_char = event_chars[0]['characters'] if event_chars else {}
-
-        era_slug = event.get('era')
-
-        formatted.append({
-            'id': event['id'],
-            'title': event['title'],
-            'event_date': event['event_date'],
-            'era': era_slug,
-            'era_display': ERA_NAMES.get(era_slug, era_slug),
-            'summary': event['summary'],
-            'character_id': event_chars[0]['character_id'] if event_chars else None,
-            'character_name': first_char.get('name', ''),
-            'character_image': first_char.get('profile_image', '/static/images/default-avatar.jpg'),
-            'characters': [ec['characters']['name'] for ec in event_chars if 'characters' in ec]
-        })
+        add_surrogate_keys(f"event:{event['id']}", *(f'character:{cid}' for cid in event.get('character_ids') or []))
+        item = {k: v for k, v in event.items() if k != 'character_ids'}
+        if 'era' in item:
+            item['era_display'] = ERA_NAMES.get(item['era'], item['era'])
+        if fields:
+            item = {k: v for k, v in item.items() if k == 'id' or k in fields}
+        formatted.append(item)
     return jsonify(formatted)
 
+def legacy_recent_events(limit, fields):
+    if not fields:
+        return db.get_recent_events(limit)
+    columns = {'era' if f == 'era_display' else f for f in fields} & EVENT_SUMMARY_COLUMNS
+    include_characters = any(f.startswith('character') for f in fields)
+    return db.get_recent_events(limit, fields=sorted(columns | {'id'}), include_characters=include_characters)
+
+def summarize_event(event):
+    """Shape a joined events row like an event_summaries document."""
+    event_chars = [ec for ec in event.get('event_characters', []) if 'characters' in ec]
+    first_char = event_chars[0]['characters'] if event_chars else {}
+    return {
+        'id': event['id'],
+        'title': event.get('title'),
+        'event_date': event.get('event_date'),
+        'era': event.get('era'),
+        'summary': event.get('summary'),
+        'character_id': event_chars[0]['character_id'] if event_chars else None,
+        'character_name': first_char.get('name', ''),
+        'character_image': first_char.get('profile_image') or '/static/images/default-avatar.jpg',
+        'characters': [ec['characters']['name'] for ec in event_chars],
+        'character_ids': [ec['character_id'] for ec in event_chars]
+    }
+
 @app.route('/api/events/<int:event_id>')
+@edge_cached('event')
+@rate_limited(3)
 def api_event_detail(event_id):
+    add_surrogate_keys(f'event:{event_id}')
     event = db.get_event_by_id(event_id)
     if not event:
         return jsonify({'error': 'Event not found'}), 404
+    add_surrogate_keys(*(f"character:{ec['character_id']}" for ec in event['event_characters']))
 
     era_slug = event.get('era')
     event['era_display'] = ERA_NAMES.get(era_slug, era_slug)
@@ -164,28 +363,48 @@ def api_event_detail(event_id):
     return jsonify(event)
 
 @app.route('/api/families')
+@edge_cached('reference', 'families')
+@rate_limited(1)
 def api_families():
 
     families = db.get_all_families()
     return jsonify(families)
 
 @app.route('/api/eras')
+@edge_cached('reference', 'eras')
+@rate_limited(1)
 def api_eras_list():
 
     eras = db.supabase.query('eras', params={'order': 'display_order'}, select='slug,name')
     return jsonify(eras)
 
 @app.route('/api/relationship-types')
+@edge_cached('reference', 'relationship-types')
+@rate_limited(1)
 def api_relationship_types():
 
     types = db.supabase.query('relationship_types', params={'order': 'name'}, select='slug,name')
     return jsonify(types)
 
 @app.route('/api/love-interest-categories')
+@edge_cached('reference', 'love-interest-categories')
+@rate_limited(1)
 def api_love_interest_categories():
     cats = db.supabase.query('love_interest_categories', params={'order': 'name'}, select='slug,name')
     return jsonify(cats)
 
+@app.route('/api/changes')
+@rate_limited(3)
+def api_changes():
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', 500, type=int)
+    try:
+        if since is None:
+            return jsonify({'changes': [], 'cursor': change_feed.latest_cursor(), 'has_more': False, 'reset': False})
+        return jsonify(change_feed.get_changes(since, limit))
+    except QueryError:
+        return jsonify({'error': 'Change feed is unavailable'}), 503
+
 @app.route('/api/login', methods=['POST'])
 def api_login():
     data = request.get_json(force=True, silent=True)
@@ -198,15 +417,34 @@ def api_login():
         return jsonify({"message": "No input data provided"}), 400
     username = data.get('username')
     password = data.get('password')
+
+    retry_after = login_guard.check_rate(client_ip(), username)
+    if retry_after:
+        response = jsonify({"message": "Too many login attempts. Try again later."})
+        response.headers['Retry-After'] = str(int(retry_after) + 1)
+        return response, 429
+    if login_guard.is_known_failure(username, password):
+        return jsonify({"message": "Invalid username or password"}), 401
+
     admin_username = os.getenv('ADMIN_USERNAME', 'admin')
     admin_password_hash = os.getenv('ADMIN_PASSWORD')
     if not admin_password_hash:
 
         admin_password_hash = 'pbkdf2:sha256:600000$QOlgUXyHBQdPQTyQ$a6f40e9034b4ff7744f08a2e7f106141c490e8119bab8fb63751a65a5f91eb6d'
         print("WARNING: ADMIN_PASSWORD env var not set. Using insecure fallback.")
-    if username == admin_username and check_password_hash(admin_password_hash, password):
+    valid = False
+    if username == admin_username and password:
+        with login_guard.verification_slot() as admitted:
+            if not admitted:
+                response = jsonify({"message": "Server is busy. Try again shortly."})
+                response.headers['Retry-After'] = '2'
+                return response, 503
+            valid = login_guard.verify(check_password_hash, admin_password_hash, password)
+
+    if valid:
         access_token = create_access_token(identity=username)
         return jsonify(access_token=access_token)
+    login_guard.record_failure(username, password)
     return jsonify({"message": "Invalid username or password"}), 401
 
 @app.route('/api/logout', methods=['POST'])
@@ -215,10 +453,73 @@ def api_logout():
 
     return jsonify({'success': True})
 
+@app.route('/api/admin/event-summaries/rebuild', methods=['POST'])
+@jwt_required()
+def api_rebuild_event_summaries():
+    try:
+        count = db.rebuild_all_event_summaries()
+    except QueryError as e:
+        return jsonify({'error': f'Rebuild stopped: {e}'}), 503
+    purge('events')
+    return jsonify({'success': True, 'rebuilt': count})
+
+@app.route('/api/admin/login-metrics', methods=['GET'])
+@jwt_required()
+def api_login_metrics():
+    return jsonify(login_guard.snapshot())
+
+@app.route('/api/admin/upstream-metrics', methods=['GET'])
+@jwt_required()
+def api_upstream_metrics():
+    single_flight = db.supabase.single_flight
+    return jsonify({
+        'single_flight': single_flight.snapshot() if single_flight else None,
+        'rate_cap': upstream_limiter.snapshot()
+    })
+
+PENDING_EDITS_MAX_PAGE = 200
+BULK_MODERATION_MAX_IDS = 500
+
 @app.route('/api/admin/pending-edits', methods=['GET'])
 @jwt_required()
 def api_get_pending_edits():
-    return jsonify(db.get_pending_edits())
+    limit = min(max(request.args.get('limit', 50, type=int), 1), PENDING_EDITS_MAX_PAGE)
+    cursor = request.args.get('cursor') or None
+    character_id = request.args.get('character_id', type=int)
+    try:
+        edits, total, next_cursor = db.get_pending_edits_page(limit, cursor, character_id)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except QueryError:
+        return jsonify({'error': 'Pending edits are unavailable'}), 503
+
+    response = jsonify(edits)
+    response.headers['X-Total-Count'] = str(total)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@app.route('/api/admin/pending-edits/bulk', methods=['POST'])
+@jwt_required()
+def api_bulk_moderate_edits():
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    ids = data.get('ids') or []
+    if action not in ('approve', 'deny'):
+        return jsonify({'error': 'Invalid action'}), 400
+    if not isinstance(ids, list) or not all(str(i).isdigit() for i in ids):
+        return jsonify({'error': 'ids must be a list of edit ids'}), 400
+    if len(ids) > BULK_MODERATION_MAX_IDS:
+        return jsonify({'error': f'At most {BULK_MODERATION_MAX_IDS} ids per request'}), 400
+
+    requested = {int(i) for i in ids}
+    updated = db.moderate_edits(sorted(requested), 'approved' if action == 'approve' else 'denied')
+    updated_ids = sorted(row['id'] for row in updated)
+    return jsonify({
+        'action': action,
+        'updated': updated_ids,
+        'skipped': sorted(requested - set(updated_ids))
+    }), 200
 
 @app.route('/api/admin/pending-edits/<int:edit_id>', methods=['PATCH'])
 @jwt_required()
@@ -267,7 +568,10 @@ def api_manage_relationships():
         }
 
         relationship_a = db.create_relationship(data_a_to_b)
-        db.create_relationship(data_b_to_a)
+        relationship_b = db.create_relationship(data_b_to_a)
+        if relationship_a or relationship_b:
+            change_feed.record('created', 'relationship', f'{char_id_a}:{char_id_b}', f'{char_id_b}:{char_id_a}')
+            purge(f'character:{char_id_a}', f'character:{char_id_b}')
 
         if relationship_a:
             return jsonify(relationship_a), 201
@@ -276,9 +580,101 @@ def api_manage_relationships():
 
     elif request.method == 'PATCH':
         updated = db.update_relationship_pair(data)
-        if updated:
-            return jsonify(updated), 200
-        return jsonify({'error': 'Failed to update relationship'}), 500
+        if not updated:
+            return jsonify({'error': 'Failed to update relationship'}), 500
+        change_feed.record('updated', 'relationship', f"{data['character_id']}:{data['related_character_id']}", f"{data['related_character_id']}:{data['character_id']}")
+        purge(f"character:{data['character_id']}", f"character:{data['related_character_id']}")
+        return jsonify(updated), 200
+
+BULK_RELATIONSHIPS_MAX_PAIRS = 300
+
+@app.route('/api/admin/relationships/bulk', methods=['POST'])
+@jwt_required()
+def api_bulk_relationships():
+    """
+    Create or update many relationship pairs in one atomic write:
+        {"pairs": [{"character_id", "related_character_id", "type", "status_a_to_b", "status_b_to_a"}, ...],
+         "family": {"character_ids": [...], "type": "...", "status": "..."}}
+    `family` expands to every pair among its characters, with the same status both ways. An entry
+    in `pairs` for the same two characters takes precedence over the family matrix.
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('pairs') or []
+    family = data.get('family')
+    if not isinstance(entries, list) or (family is not None and not isinstance(family, dict)):
+        return jsonify({'error': 'pairs must be a list and family an object'}), 400
+    if len(entries) > BULK_RELATIONSHIPS_MAX_PAIRS:
+        return jsonify({'error': f'At most {BULK_RELATIONSHIPS_MAX_PAIRS} pairs per request'}), 400
+
+    pairs = {}
+    if family:
+        family_ids = family.get('character_ids') or []
+        if not isinstance(family_ids, list) or not all(str(i).isdigit() for i in family_ids):
+            return jsonify({'error': 'family.character_ids must be a list of character ids'}), 400
+        if not family.get('type'):
+            return jsonify({'error': 'family.type is required'}), 400
+        family_ids = list(dict.fromkeys(int(i) for i in family_ids))
+        # A family of n characters expands to n(n-1)/2 pairs; refuse oversized ones before expanding
+        if len(family_ids) * (len(family_ids) - 1) // 2 > BULK_RELATIONSHIPS_MAX_PAIRS:
+            return jsonify({'error': f'A family of {len(family_ids)} characters exceeds '
+                                     f'{BULK_RELATIONSHIPS_MAX_PAIRS} pairs per request'}), 400
+        for index, char_id_a in enumerate(family_ids):
+            for char_id_b in family_ids[index + 1:]:
+                pairs[tuple(sorted((char_id_a, char_id_b)))] = {
+                    'character_id': char_id_a,
+                    'related_character_id': char_id_b,
+                    'type': family['type'],
+                    'status_a_to_b': family.get('status'),
+                    'status_b_to_a': family.get('status')
+                }
+
+    invalid = []
+    for index, entry in enumerate(entries):
+        entry = entry if isinstance(entry, dict) else {}
+        char_id_a, char_id_b = str(entry.get('character_id')), str(entry.get('related_character_id'))
+        if not (char_id_a.isdigit() and char_id_b.isdigit()) or char_id_a == char_id_b:
+            invalid.append({'index': index, 'error': 'character_id and related_character_id must be two different character ids'})
+            continue
+        if not entry.get('type'):
+            invalid.append({'index': index, 'error': 'type is required'})
+            continue
+        char_id_a, char_id_b = int(char_id_a), int(char_id_b)
+        pairs[tuple(sorted((char_id_a, char_id_b)))] = {
+            'character_id': char_id_a,
+            'related_character_id': char_id_b,
+            'type': entry['type'],
+            'status_a_to_b': entry.get('status_a_to_b'),
+            'status_b_to_a': entry.get('status_b_to_a')
+        }
+
+    if not pairs:
+        return jsonify({'error': 'No valid relationship pairs', 'invalid': invalid}), 400
+    if len(pairs) > BULK_RELATIONSHIPS_MAX_PAIRS:
+        return jsonify({'error': f'At most {BULK_RELATIONSHIPS_MAX_PAIRS} pairs per request'}), 400
+
+    try:
+        results = db.upsert_relationship_pairs(list(pairs.values()))
+    except QueryError:
+        return jsonify({'error': 'Could not read the existing relationships; nothing was written'}), 503
+    summary = {outcome: 0 for outcome in ('created', 'updated', 'failed')}
+    for result in results:
+        summary[result['result']] += 1
+
+    for action in ('created', 'updated'):
+        keys = []
+        for result in results:
+            if result['result'] == action:
+                keys += [f"{result['character_id']}:{result['related_character_id']}",
+                         f"{result['related_character_id']}:{result['character_id']}"]
+        if keys:
+            change_feed.record(action, 'relationship', *keys)
+    touched = {cid for result in results if result['result'] != 'failed'
+               for cid in (result['character_id'], result['related_character_id'])}
+    if touched:
+        purge(*(f'character:{cid}' for cid in sorted(touched)))
+
+    status = 500 if summary['failed'] == len(results) else 200
+    return jsonify({**summary, 'results': results, 'invalid': invalid}), status
 
 @app.route('/api/admin/relationships/<int:char1_id>/<int:char2_id>', methods=['GET', 'DELETE'])
 @jwt_required()
@@ -291,9 +687,11 @@ def api_manage_relationship_pair(char1_id, char2_id):
 
     elif request.method == 'DELETE':
         success = db.delete_relationship_pair(char1_id, char2_id)
-        if success:
-            return jsonify({'success': True}), 200
-        return jsonify({'error': 'Failed to delete relationship'}), 500
+        if not success:
+            return jsonify({'error': 'Failed to delete relationship'}), 500
+        change_feed.record('deleted', 'relationship', f'{char1_id}:{char2_id}', f'{char2_id}:{char1_id}')
+        purge(f'character:{char1_id}', f'character:{char2_id}')
+        return jsonify({'success': True}), 200
 
 @app.route('/api/admin/gallery', methods=['GET'])
 @jwt_required()
@@ -303,12 +701,21 @@ def api_get_all_gallery_images():
 @app.route('/api/admin/gallery', methods=['POST'])
 @jwt_required()
 def api_create_gallery_image():
-    if 'image' not in request.files:
+    # Large images arrive beforehand through /api/admin/uploads and are named by upload_id
+    upload_id = request.form.get('upload_id')
+    if upload_id:
+        try:
+            upload = chunked_upload.completed(upload_id)
+        except (ValueError, LookupError) as e:
+            return jsonify({'error': f'Invalid upload: {e}'}), 400
+        except QueryError:
+            return jsonify({'error': 'Upload storage is unavailable'}), 503
+    elif 'image' not in request.files:
         return jsonify({'error': 'No image file provided'}), 400
-    
-    file = request.files['image']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+    else:
+        file = request.files['image']
+        if file.filename == '':
+            return jsonify({'error': 'No selected file'}), 400
 
     character_ids_str = request.form.get('character_ids', '')
     event_id = request.form.get('event_id')
@@ -331,13 +738,23 @@ def api_create_gallery_image():
             return jsonify({'error': 'Invalid event_id format'}), 400
 
     try:
-        filename = secure_filename(file.filename)
+        filename = secure_filename(upload['filename'] if upload_id else file.filename)
         unique_filename = f"{character_ids[0]}/{int(datetime.now().timestamp())}_{filename}"
-        content_type = file.mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
         bucket_name = 'gallery-images'
-        
-        file_body = file.read()
-        public_url = db.supabase.upload_file(bucket_name, unique_filename, file_body, content_type)
+
+        if upload_id:
+            content_type = upload['content_type']
+            public_url = db.supabase.upload_file(bucket_name, unique_filename, chunked_upload.read(upload), content_type,
+                                                 content_length=upload['size'])
+            if public_url:
+                try:
+                    chunked_upload.discard(upload_id)
+                except (LookupError, QueryError) as e:
+                    print(f"Could not discard finished upload {upload_id}: {e}")
+        else:
+            content_type = file.mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            file_body = file.read()
+            public_url = db.supabase.upload_file(bucket_name, unique_filename, file_body, content_type)
         
         if not public_url:
             return jsonify({'error': 'Failed to upload image to storage'}), 500
@@ -354,20 +771,92 @@ def api_create_gallery_image():
         
         if result:
             db.link_image_to_characters(result['id'], character_ids)
+            change_feed.record('created', 'gallery_image', result['id'])
+            purge(*(f'character:{cid}' for cid in character_ids))
             return jsonify(result), 201
         else:
-            db.supabase.delete_file(bucket_name, unique_filename)
+            job_queue.enqueue('storage.delete', {'bucket': bucket_name, 'paths': [unique_filename]})
             return jsonify({'error': 'Database insert failed'}), 500
 
     except Exception as e:
         print(f"Gallery upload error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/uploads', methods=['POST'])
+@jwt_required()
+def api_create_upload():
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+    content_type = data.get('content_type') or mimetypes.guess_type(filename)[0] or ''
+    if not filename:
+        return jsonify({'error': 'filename is required'}), 400
+    if not content_type.startswith('image/'):
+        return jsonify({'error': 'Only image uploads are supported'}), 400
+    try:
+        upload = chunked_upload.create(filename, int(data.get('size') or 0), content_type)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except QueryError:
+        return jsonify({'error': 'Upload storage is unavailable'}), 503
+    response = jsonify(upload)
+    response.status_code = 201
+    response.headers['Location'] = f"/api/admin/uploads/{upload['id']}"
+    return response
+
+def upload_status_response(upload):
+    response = jsonify(upload)
+    response.headers['Upload-Offset'] = str(upload['offset'])
+    response.headers['Upload-Length'] = str(upload['size'])
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/admin/uploads/<upload_id>', methods=['GET', 'HEAD'])
+@jwt_required()
+def api_get_upload(upload_id):
+    try:
+        return upload_status_response(chunked_upload.status(upload_id))
+    except LookupError:
+        return jsonify({'error': 'Upload not found'}), 404
+    except QueryError:
+        return jsonify({'error': 'Upload storage is unavailable'}), 503
+
+@app.route('/api/admin/uploads/<upload_id>', methods=['PATCH'])
+@jwt_required()
+def api_upload_chunk(upload_id):
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    try:
+        upload = chunked_upload.write_chunk(upload_id, offset, request.get_data(cache=False))
+    except LookupError:
+        return jsonify({'error': 'Upload not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    except (chunked_upload.UploadFailed, QueryError):
+        return jsonify({'error': 'Could not store the chunk, please resend it'}), 503
+    return upload_status_response(upload)
+
+@app.route('/api/admin/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def api_delete_upload(upload_id):
+    try:
+        chunked_upload.discard(upload_id)
+    except LookupError:
+        return jsonify({'error': 'Upload not found'}), 404
+    except QueryError:
+        return jsonify({'error': 'Upload storage is unavailable'}), 503
+    return jsonify({'success': True})
+
 @app.route('/api/admin/gallery/<int:image_id>', methods=['DELETE'])
 @jwt_required()
 def api_delete_gallery_image(image_id):
-    success = db.delete_gallery_image(image_id)
-    if success:
+    image = db.delete_gallery_image(image_id)
+    if image:
+        path = storage_path(image.get('image_url'), 'gallery-images')
+        if path:
+            job_queue.enqueue('storage.delete', {'bucket': 'gallery-images', 'paths': [path]})
+        change_feed.record('deleted', 'gallery_image', image_id)
+        purge('gallery')
         return jsonify({'success': True}), 200
     return jsonify({'error': 'Failed to delete image'}), 500
 
@@ -396,13 +885,17 @@ def api_create_character():
     character = db.create_character(data)
 
     if character:
+        jobs = []
         if bio_sections_json:
             try:
                 bio_sections_data = json.loads(bio_sections_json)
-                db.update_character_bio_sections(character['id'], bio_sections_data)
+                jobs.append(job_queue.enqueue('character.bio.sync', {'character_id': character['id'], 'sections': bio_sections_data},
+                                              key=f"character:{character['id']}:bio"))
             except json.JSONDecodeError:
                 print("Warning: Could not decode bio_sections JSON.")
-        return jsonify(character), 201
+        change_feed.record('created', 'character', character['id'])
+        purge('characters')
+        return jsonify({**character, 'jobs': job_queue.summaries(jobs)}), 201
     else:
         print("db.create_character returned None. Character creation failed in database.py.")
         return jsonify({'error': 'Failed to create character in database'}), 500
@@ -430,21 +923,27 @@ def api_update_character(character_id):
                 return jsonify({'error': 'Failed to upload image'}), 500
 
     character = db.update_character(character_id, data)
+    if not character:
+        return jsonify({'error': 'Failed to update character. Check for empty required fields.'}), 500
 
+    jobs = []
     if bio_sections_json is not None:
         try:
             bio_sections_data = json.loads(bio_sections_json)
-            db.update_character_bio_sections(character_id, bio_sections_data)
+            jobs.append(job_queue.enqueue('character.bio.sync', {'character_id': character_id, 'sections': bio_sections_data},
+                                          key=f'character:{character_id}:bio'))
         except json.JSONDecodeError:
             print(f"Warning: Could not decode bio_sections JSON for character {character_id}.")
 
-    return (jsonify(character), 200) if character else (jsonify({'error': 'Failed to update character. Check for empty required fields.'}), 500)
+    change_feed.record('updated', 'character', character_id)
+    purge('characters', f'character:{character_id}')
+    return jsonify({**character, 'jobs': job_queue.summaries(jobs)}), 200
 
 @app.route('/api/admin/characters/<int:character_id>', methods=['DELETE'])
 @jwt_required()
 def api_delete_character(character_id):
-    db.delete_character(character_id)
-    return jsonify({'success': True}), 200
+    job_id = job_queue.enqueue('character.delete', {'character_id': character_id}, key=f'character:{character_id}')
+    return job_accepted(job_id)
 
 @app.route('/api/admin/events', methods=['POST'])
 @jwt_required()
@@ -452,30 +951,30 @@ def api_create_event():
     data = request.form.to_dict()
     character_ids_str = data.pop('character_ids', '')
     data.pop('character_ids_select', None)
+    data.pop('upload_ids', None)
+    # Images are read before the event is written, so an unusable upload leaves nothing behind
+    try:
+        files = spool_event_images()
+    except (ValueError, LookupError) as e:
+        return jsonify({'error': f'Invalid upload: {e}'}), 400
+    except (chunked_upload.UploadFailed, QueryError) as e:
+        return jsonify({'error': f'Could not read uploaded images: {e}'}), 503
 
     event = db.create_event(data)
     if not event:
+        remove_spooled(files)
         return jsonify({'error': 'Failed to create event'}), 500
     event_id = event['id']
-    if character_ids_str:
-        character_ids = [int(id) for id in character_ids_str.split(',') if id.isdigit()]
-        if character_ids:
-            db.link_event_to_characters(event_id, character_ids)
-    images = request.files.getlist('event_images')
-    image_urls = []
-    bucket_name = 'event-images'
-    for file in images:
-        if file and file.filename:
-            filename = secure_filename(file.filename)
-            unique_filename = f"{event_id}/{int(datetime.now().timestamp())}_{filename}"
-            content_type = file.mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-            file_body = file.read()
-            public_url = db.supabase.upload_file(bucket_name, unique_filename, file_body, content_type)
-            if public_url:
-                image_urls.append({'event_id': event_id, 'image_url': public_url})
-    if image_urls:
-        db.create_event_images(image_urls)
-    return jsonify(event), 201
+    character_ids = [int(id) for id in character_ids_str.split(',') if id.isdigit()]
+    jobs = []
+    if character_ids:
+        jobs.append(job_queue.enqueue('event.links.sync', {'event_id': event_id, 'character_ids': character_ids},
+                                      key=f'event:{event_id}:links'))
+    if files:
+        jobs.append(job_queue.enqueue('event.images.upload', event_images_payload(event_id, files)))
+    change_feed.record('created', 'event', event_id)
+    purge('events')
+    return jsonify({**event, 'jobs': job_queue.summaries(jobs)}), 201
 
 @app.route('/api/admin/events/<int:event_id>', methods=['PUT'])
 @jwt_required()
@@ -483,36 +982,34 @@ def api_update_event(event_id):
     data = request.form.to_dict()
     character_ids_str = data.pop('character_ids', '')
     data.pop('character_ids_select', None)
+    data.pop('upload_ids', None)
+    try:
+        files = spool_event_images()
+    except (ValueError, LookupError) as e:
+        return jsonify({'error': f'Invalid upload: {e}'}), 400
+    except (chunked_upload.UploadFailed, QueryError) as e:
+        return jsonify({'error': f'Could not read uploaded images: {e}'}), 503
 
     event = db.update_event(event_id, data)
     if not event:
+        remove_spooled(files)
         return jsonify({'error': 'Failed to update event'}), 500
 
     character_ids = [int(id) for id in character_ids_str.split(',') if id.isdigit()]
-    db.update_event_character_links(event_id, character_ids)
+    jobs = [job_queue.enqueue('event.links.sync', {'event_id': event_id, 'character_ids': character_ids, 'replace': True},
+                              key=f'event:{event_id}:links')]
+    if files:
+        jobs.append(job_queue.enqueue('event.images.upload', event_images_payload(event_id, files)))
 
-    images = request.files.getlist('event_images')
-    image_urls = []
-    bucket_name = 'event-images'
-    for file in images:
-        if file and file.filename:
-            filename = secure_filename(file.filename)
-            unique_filename = f"{event_id}/{int(datetime.now().timestamp())}_{filename}"
-            content_type = file.mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-            file_body = file.read()
-            public_url = db.supabase.upload_file(bucket_name, unique_filename, file_body, content_type)
-            if public_url:
-                image_urls.append({'event_id': event_id, 'image_url': public_url})
-    if image_urls:
-        db.create_event_images(image_urls)
-
-    return jsonify(event), 200
+    change_feed.record('updated', 'event', event_id)
+    purge('events', f'event:{event_id}')
+    return jsonify({**event, 'jobs': job_queue.summaries(jobs)}), 200
 
 @app.route('/api/admin/events/<int:event_id>', methods=['DELETE'])
 @jwt_required()
 def api_delete_event(event_id):
-    db.delete_event(event_id)
-    return jsonify({'success': True}), 200
+    job_id = job_queue.enqueue('event.delete', {'event_id': event_id}, key=f'event:{event_id}')
+    return job_accepted(job_id)
 
 @app.route('/api/admin/events/<int:event_id>/images', methods=['DELETE'])
 @jwt_required()
@@ -528,14 +1025,12 @@ def api_delete_event_image(event_id):
         params = {'event_id': f'eq.{event_id}', 'image_url': f'eq.{image_url}'}
         db.supabase.query('event_images', method='DELETE', params=params)
 
-        if 'event-images' in image_url:
-            try:
-                path = image_url.split('/event-images/')[-1]
-                db.supabase.delete_file('event-images', path)
-                print(f"Deleted image from storage: {path}")
-            except Exception as e:
-                print(f"Error deleting from storage: {e}")
+        path = storage_path(image_url, 'event-images')
+        if path:
+            job_queue.enqueue('storage.delete', {'bucket': 'event-images', 'paths': [path]})
 
+        change_feed.record('updated', 'event', event_id)
+        purge(f'event:{event_id}')
         return jsonify({'success': True}), 200
     except Exception as e:
         print(f"Error deleting event image: {e}")
@@ -564,6 +1059,8 @@ def api_create_love_interest():
 
     interest = db.create_love_interest(data)
     if interest:
+        change_feed.record('created', 'love_interest', interest['id'])
+        purge(f"character:{interest['character_one_id']}", f"character:{interest['character_two_id']}")
         return jsonify(interest), 201
     return jsonify({'error': 'Failed to create love interest. The relationship may already exist or character IDs are invalid.'}), 500
 
@@ -573,16 +1070,249 @@ def api_update_love_interest(interest_id):
     data = request.get_json()
     updated = db.update_love_interest(interest_id, data)
     if updated:
+        change_feed.record('updated', 'love_interest', interest_id)
+        purge(f"character:{updated['character_one_id']}", f"character:{updated['character_two_id']}")
         return jsonify(updated), 200
     return jsonify({'error': 'Failed to update love interest'}), 500
 
 @app.route('/api/admin/love-interests/<int:interest_id>', methods=['DELETE'])
 @jwt_required()
 def api_delete_love_interest(interest_id):
+    interest = db.get_love_interest_by_id(interest_id)
     success = db.delete_love_interest(interest_id)
     if success:
+        change_feed.record('deleted', 'love_interest', interest_id)
+        if interest:
+            purge(f"character:{interest['character_one_id']}", f"character:{interest['character_two_id']}")
         return jsonify({'success': True}), 200
     return jsonify({'error': 'Failed to delete love interest'}), 500
 
+def spool_event_images():
+    """
+    Spool the request's event images to disk: files posted directly and the finished resumable
+    uploads named in the form's upload_ids field. Returns a list of spooled files for
+    event_images_payload. Raises ValueError/LookupError for unusable uploads and UploadFailed
+    or QueryError when upload storage cannot be read; nothing stays spooled then.
+    """
+    upload_ids = [u.strip() for u in request.form.get('upload_ids', '').split(',') if u.strip()]
+    files = []
+    try:
+        for file in request.files.getlist('event_images'):
+            if file and file.filename:
+                filename = secure_filename(file.filename)
+                files.append({
+                    'spool': job_queue.spool(file.read()),
+                    'filename': filename,
+                    'content_type': file.mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                })
+        for upload_id in upload_ids:
+            path, info = chunked_upload.fetch(upload_id)
+            files.append({
+                'spool': path,
+                'filename': secure_filename(info['filename']),
+                'content_type': info['content_type'],
+                'upload': info
+            })
+    except Exception:
+        remove_spooled(files)
+        raise
+    return files
+
+def remove_spooled(files):
+    for file in files:
+        try:
+            os.remove(file['spool'])
+        except OSError:
+            pass
+
+def event_images_payload(event_id, files):
+    """
+    The event.images.upload payload for files from spool_event_images, once the event is saved.
+    Their resumable upload sessions are released here, as the job now owns the spooled copies.
+    """
+    stamp = int(datetime.now().timestamp())
+    for file in files:
+        if 'upload' in file:
+            try:
+                chunked_upload.release(file['upload'])
+            except (LookupError, QueryError) as e:
+                # The spooled copy is ours either way; an unreleased session expires on its own
+                print(f"Could not release upload {file['upload']['id']}: {e}")
+    images = [
+        {'spool': f['spool'], 'path': f"{event_id}/{stamp}_{f['filename']}", 'content_type': f['content_type']}
+        for f in files
+    ]
+    return {'event_id': event_id, 'files': images, 'spooled': [f['spool'] for f in files]}
+
+# --- Background jobs ---
+
+def job_accepted(job_id):
+    """
+    Response for a write carried out by one job: 202 while it is pending, 200 once it is done,
+    or 500 if it already failed (with JOB_MODE=inline it has run by the time enqueue returns).
+    """
+    jobs = job_queue.summaries([job_id])
+    status = jobs[0]['status'] if jobs[0] else 'queued'
+    if status == 'failed':
+        return jsonify({'error': jobs[0]['last_error'] or 'Background task failed', 'jobs': jobs}), 500
+    return jsonify({'success': True, 'jobs': jobs}), 200 if status == 'done' else 202
+
+@job_queue.task('storage.delete')
+def job_storage_delete(payload):
+    deleted = db.supabase.delete_files(payload['bucket'], payload['paths'])
+    if deleted is None:
+        raise RuntimeError(f"Could not delete objects from {payload['bucket']}")
+    return {'deleted': len(deleted)}
+
+@job_queue.task('event.summaries.refresh')
+def job_event_summaries_refresh(payload):
+    if payload.get('character_id') is not None:
+        written = db.refresh_character_event_summaries(payload['character_id'])
+    else:
+        written = db.refresh_event_summaries(payload['event_ids'])
+    purge('events')
+    return {'refreshed': len(written)}
+
+@job_queue.task('storage.sweep')
+def job_storage_sweep(payload):
+    return storage_sweeper.sweep(dry_run=False, min_age_hours=payload.get('min_age_hours', 24), force=payload.get('force', False))
+
+@job_queue.task('character.bio.sync')
+def job_character_bio_sync(payload):
+    character_id = payload['character_id']
+    if not db.update_character_bio_sections(character_id, payload['sections']):
+        raise RuntimeError(f'Bio sync failed for character {character_id}')
+    change_feed.record('updated', 'character', character_id)
+    purge(f'character:{character_id}')
+    return {'character_id': character_id}
+
+@job_queue.task('character.delete')
+def job_character_delete(payload):
+    character_id = payload['character_id']
+    character = db.get_character_by_id(character_id, select='id,profile_image', include_bio=False)
+    db.delete_character(character_id)
+    path = storage_path((character or {}).get('profile_image'), 'character-images')
+    if path:
+        job_queue.enqueue('storage.delete', {'bucket': 'character-images', 'paths': [path]})
+    change_feed.record('deleted', 'character', character_id)
+    purge('characters', 'events', f'character:{character_id}')
+    return {'character_id': character_id}
+
+@job_queue.task('event.links.sync')
+def job_event_links_sync(payload):
+    event_id = payload['event_id']
+    previous = db.supabase.query('event_characters', params={'event_id': f'eq.{event_id}'}, select='character_id')
+    if payload.get('replace'):
+        if not db.update_event_character_links(event_id, payload['character_ids']):
+            raise RuntimeError(f'Link sync failed for event {event_id}')
+    else:
+        db.link_event_to_characters(event_id, payload['character_ids'])
+    affected = {link['character_id'] for link in previous} | set(payload['character_ids'])
+    change_feed.record('updated', 'event', event_id)
+    purge('events', f'event:{event_id}', *(f'character:{cid}' for cid in affected))
+    return {'event_id': event_id, 'characters': len(payload['character_ids'])}
+
+@job_queue.task('event.images.upload')
+def job_event_images_upload(payload):
+    event_id = payload['event_id']
+    bucket_name = 'event-images'
+    # Files that made it in on an earlier attempt already have rows; skip them on retry
+    existing = {row['image_url'] for row in db.supabase.query('event_images', params={'event_id': f'eq.{event_id}'}, select='image_url')}
+    image_urls = []
+    failed = 0
+    for file in payload['files']:
+        public_url = db.supabase.get_public_url(bucket_name, file['path'])
+        if public_url in existing:
+            continue
+        with open(file['spool'], 'rb') as f:
+            public_url = db.supabase.upload_file(bucket_name, file['path'], read_blocks(f), file['content_type'],
+                                                 content_length=os.path.getsize(file['spool']))
+        if public_url:
+            image_urls.append({'event_id': event_id, 'image_url': public_url})
+        else:
+            failed += 1
+    if image_urls:
+        db.create_event_images(image_urls)
+        change_feed.record('updated', 'event', event_id)
+        purge(f'event:{event_id}')
+    if failed:
+        raise RuntimeError(f'{failed} image upload(s) failed for event {event_id}')
+    return {'event_id': event_id, 'uploaded': len(image_urls)}
+
+@job_queue.task('event.delete')
+def job_event_delete(payload):
+    event_id = payload['event_id']
+    links = db.supabase.query('event_characters', params={'event_id': f'eq.{event_id}'}, select='character_id')
+    images = db.supabase.query('event_images', params={'event_id': f'eq.{event_id}'}, select='image_url')
+    db.delete_event(event_id)
+    paths = [path for path in (storage_path(img['image_url'], 'event-images') for img in images) if path]
+    if paths:
+        job_queue.enqueue('storage.delete', {'bucket': 'event-images', 'paths': paths})
+    change_feed.record('deleted', 'event', event_id)
+    purge('events', f'event:{event_id}', *(f"character:{link['character_id']}" for link in links))
+    return {'event_id': event_id}
+
+@app.route('/api/admin/storage/sweep', methods=['POST'])
+@jwt_required()
+def api_storage_sweep():
+    """Dry-run report of orphaned storage objects inline; with {"dry_run": false} the deletion runs as a job."""
+    data = request.get_json(silent=True) or {}
+    min_age_hours = max(float(data.get('min_age_hours', 24)), 1)
+    if data.get('dry_run', True):
+        try:
+            return jsonify(storage_sweeper.sweep(dry_run=True, min_age_hours=min_age_hours))
+        except QueryError as e:
+            return jsonify({'error': f'Could not read storage references: {e}'}), 503
+    payload = {'min_age_hours': min_age_hours, 'force': bool(data.get('force'))}
+    job_id = job_queue.enqueue('storage.sweep', payload, max_attempts=2, key='storage:sweep')
+    return job_accepted(job_id)
+
+@app.route('/api/admin/jobs', methods=['GET'])
+@jwt_required()
+def api_list_jobs():
+    status = request.args.get('status') or None
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    return jsonify({'counts': job_queue.counts(), 'jobs': job_queue.list_jobs(status, limit)})
+
+@app.route('/api/admin/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def api_get_job(job_id):
+    job = job_queue.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/admin/jobs/<int:job_id>/retry', methods=['POST'])
+@jwt_required()
+def api_retry_job(job_id):
+    if not job_queue.retry(job_id):
+        return jsonify({'error': 'Only failed jobs without a newer job for the same entity can be retried'}), 409
+    return jsonify({'success': True, 'jobs': job_queue.summaries([job_id])})
+
+@app.route('/api/admin/jobs/run', methods=['POST'])
+@jwt_required()
+def api_run_jobs():
+    """Drain ready jobs inline, for deployments without background workers (JOB_WORKERS=0)."""
+    return jsonify({'processed': job_queue.run_pending()})
+
+def warm_up():
+    """
+    Build state that is expensive to recompute and safe to share across forked workers:
+    compiled templates and the service worker script (eras and asset manifests load at import).
+    """
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    service_worker_script()
+
+def init_worker():
+    """Per-process setup for a worker forked from a preloaded parent."""
+    db.supabase.reset_after_fork()
+    job_queue.ensure_workers()
+
+# Pick up jobs left queued by a previous process. A preloading server starts them in
+# each worker instead (see gunicorn.conf.py), since threads do not survive a fork.
+if os.getenv('JOB_WORKERS_AUTOSTART', '1') == '1':
+    job_queue.ensure_workers()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
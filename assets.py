@@ -0,0 +1,290 @@
+"""
+Static asset pipeline.
+
+Run `python assets.py` before deploying to bundle and minify the page CSS/JS,
+write content-hashed copies to static/dist with a manifest.json, and precompress
+them with gzip and brotli. Templates call `asset_urls(name)`, which falls back to
+the unbundled source files when no manifest has been built.
+
+Platforms without a build step (Vercel's Python builder, which also never sees the
+gitignored static/dist) set ASSETS_BUILD_ON_START=1 and point ASSETS_DIST_DIR at a
+writable directory: each instance then builds once on import. The build is
+deterministic, so every instance produces the same fingerprinted names. rjsmin,
+rcssmin and brotli are in requirements.txt; without them JS is only stripped of
+blank lines and no .br files are written.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.getenv('ASSETS_DIST_DIR', os.path.join(STATIC_DIR, 'dist'))
+BUILD_ON_START = os.getenv('ASSETS_BUILD_ON_START') == '1'
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+ASSET_URL_PREFIX = '/assets'
+
+# Bundle name -> source files (relative to static/), in the order the templates load them.
+BUNDLES = {
+    'home.css': ['styles/global.css', 'styles/home.css'],
+    'characters.css': ['styles/global.css', 'styles/characters.css'],
+    'profile.css': ['styles/global.css', 'styles/profile.css', 'styles/eras.css'],
+    'admin.css': ['styles/global.css', 'styles/admin.css'],
+    'about.js': ['js/main.js'],
+    'home.js': ['js/main.js', 'js/home.js'],
+    'characters.js': ['js/main.js', 'js/characters.js'],
+    'profile.js': ['js/main.js', 'js/gallery.js', 'js/profile.js', 'js/markdown.js'],
+    'admin.js': ['js/main.js', 'js/admin.js', 'js/markdown.js'],
+}
+
+# Character themes are fingerprinted individually, one per file.
+THEMES_DIR = os.path.join(STATIC_DIR, 'styles', 'characters')
+
+CSS_STRING_OR_COMMENT_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+
+
+def _squeeze_css(segment):
+    segment = re.sub(r'\s+', ' ', segment)
+    segment = re.sub(r'\s*([{};,>])\s*', r'\1', segment)
+    segment = re.sub(r':\s+', ':', segment)
+    return segment.replace(';}', '}')
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace while leaving string literals untouched."""
+    if rcssmin:
+        return rcssmin.cssmin(source)
+
+    parts = []
+    pending = []
+    pos = 0
+    for match in CSS_STRING_OR_COMMENT_RE.finditer(source):
+        pending.append(source[pos:match.start()])
+        if match.group(1):
+            parts.append(_squeeze_css(''.join(pending)))
+            parts.append(match.group(1))
+            pending = []
+        pos = match.end()
+    pending.append(source[pos:])
+    parts.append(_squeeze_css(''.join(pending)))
+    return ''.join(parts).strip()
+
+
+def minify_js(source):
+    """Minify with rjsmin when installed; otherwise only trim trailing whitespace and blank lines."""
+    if rjsmin:
+        return rjsmin.jsmin(source)
+    lines = (line.rstrip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def _read(path):
+    with open(os.path.join(STATIC_DIR, path), encoding='utf-8') as f:
+        return f.read()
+
+
+def _write_asset(name, content):
+    """Write a fingerprinted file plus .gz/.br siblings and return its dist-relative path."""
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    hashed_name = f'{stem}.{digest}{ext}'
+    out_path = os.path.join(DIST_DIR, hashed_name)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    with open(out_path, 'wb') as f:
+        f.write(data)
+    with open(out_path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli:
+        with open(out_path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+    return hashed_name
+
+
+def build():
+    """Bundle, minify, fingerprint and precompress every asset, then write the manifest."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    original_bytes = 0
+    built_bytes = 0
+
+    for name, sources in BUNDLES.items():
+        contents = [_read(path) for path in sources]
+        original_bytes += sum(len(c.encode('utf-8')) for c in contents)
+        if name.endswith('.css'):
+            bundled = '\n'.join(minify_css(c) for c in contents)
+        else:
+            bundled = '\n;\n'.join(minify_js(c) for c in contents)
+        built_bytes += len(bundled.encode('utf-8'))
+        manifest[name] = _write_asset(name, bundled)
+
+    if os.path.isdir(THEMES_DIR):
+        for filename in sorted(os.listdir(THEMES_DIR)):
+            if filename.endswith('.css'):
+                content = _read(os.path.join('styles', 'characters', filename))
+                original_bytes += len(content.encode('utf-8'))
+                minified = minify_css(content)
+                built_bytes += len(minified.encode('utf-8'))
+                manifest[f'themes/{filename}'] = _write_asset(f'themes/{filename}', minified)
+
+    # Written last and atomically: a manifest on disk always names files that exist
+    tmp_path = f'{MANIFEST_PATH}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+    print(f"Built {len(manifest)} assets: {original_bytes} -> {built_bytes} bytes before compression.")
+    return manifest
+
+
+def load_manifest():
+    """Load the built manifest (building it first with ASSETS_BUILD_ON_START=1), or an empty dict."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    if BUILD_ON_START:
+        try:
+            return build()
+        except OSError as e:
+            print(f"Asset build on start failed, serving source files: {e}")
+    return {}
+
+
+ASSET_MANIFEST = load_manifest()
+
+
+def theme_slug(name):
+    """Slug used for a character's theme file, matching the client ('Damian Wayne' -> 'damian-wayne')."""
+    return re.sub(r'\s+', '-', (name or '').strip().lower())
+
+
+def build_theme_manifest():
+    """Map theme slugs to fingerprinted stylesheet URLs by scanning static/styles/characters."""
+    themes = {}
+    if not os.path.isdir(THEMES_DIR):
+        return themes
+
+    for filename in sorted(os.listdir(THEMES_DIR)):
+        if not filename.endswith('.css'):
+            continue
+        slug = filename[:-len('.css')]
+        built = ASSET_MANIFEST.get(f'themes/{filename}')
+        if built:
+            themes[slug] = f'{ASSET_URL_PREFIX}/{built}'
+        else:
+            with open(os.path.join(THEMES_DIR, filename), 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            themes[slug] = f'/static/styles/characters/{filename}?v={digest}'
+    return themes
+
+
+THEME_MANIFEST = build_theme_manifest()
+
+
+def theme_url(character_name):
+    """Stylesheet URL for a character's theme, or None when no theme exists."""
+    return THEME_MANIFEST.get(theme_slug(character_name))
+
+
+def asset_urls(name):
+    """URLs to load for a bundle: the fingerprinted file if built, else the source files."""
+    if name in ASSET_MANIFEST:
+        return [f'{ASSET_URL_PREFIX}/{ASSET_MANIFEST[name]}']
+    return [f'/static/{path}' for path in BUNDLES.get(name, [])]
+
+
+SHELL_PAGES = ['/', '/characters', '/about']
+SHELL_STATIC = [
+    '/static/images/hero-bg.jpg',
+    '/static/images/mobile-hero.jpg',
+    '/static/images/default-avatar.jpg',
+    '/static/images/favicon.svg',
+    '/static/images/site.webmanifest',
+]
+SERVICE_WORKER_SOURCE = os.path.join(STATIC_DIR, 'js', 'sw.js')
+
+_service_worker_script = None
+
+
+def service_worker_script():
+    """
+    The service worker source with its precache list prepended. The version is a hash of
+    the worker and every precached static file, so any deploy that changes them installs
+    a fresh shell cache.
+    """
+    global _service_worker_script
+    if _service_worker_script is not None:
+        return _service_worker_script
+
+    urls = list(SHELL_PAGES)
+    for name in BUNDLES:
+        if not name.startswith('admin'):
+            urls.extend(u for u in asset_urls(name) if u not in urls)
+    urls.extend(SHELL_STATIC)
+
+    with open(SERVICE_WORKER_SOURCE, encoding='utf-8') as f:
+        source = f.read()
+
+    digest = hashlib.sha256(source.encode('utf-8'))
+    for url in urls:
+        if url.startswith(ASSET_URL_PREFIX + '/'):
+            digest.update(url.encode('utf-8'))
+        elif url.startswith('/static/'):
+            with open(os.path.join(STATIC_DIR, url[len('/static/'):]), 'rb') as f:
+                digest.update(f.read())
+
+    header = (
+        f"const PRECACHE_VERSION = '{digest.hexdigest()[:12]}';\n"
+        f"const PRECACHE_URLS = {json.dumps(urls)};\n\n"
+    )
+    _service_worker_script = header + source
+    return _service_worker_script
+
+
+def serve_asset(filename):
+    """Serve a fingerprinted asset, preferring a precompressed variant the client accepts."""
+    # Quality lookup on the parsed header: honours q=0 and '*', and never matches inside another token
+    accept = request.accept_encodings
+    encoding = None
+    if accept['br'] > 0 and os.path.exists(os.path.join(DIST_DIR, filename + '.br')):
+        encoding = 'br'
+    elif accept['gzip'] > 0 and os.path.exists(os.path.join(DIST_DIR, filename + '.gz')):
+        encoding = 'gzip'
+
+    if encoding:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        mimetype = 'text/css' if filename.endswith('.css') else 'application/javascript'
+        response = send_from_directory(DIST_DIR, filename + suffix, mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(DIST_DIR, filename)
+
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,93 @@
+/*
+ * Golden-output check and benchmark for parseMarkdown (static/js/markdown.js).
+ *
+ * The corpus in markdown_golden.json is made of bio sections and event descriptions
+ * in the shapes the site stores them, plus the escaping cases the parser must keep
+ * handling. Every run first checks the parser against the recorded HTML, then times
+ * it on the corpus and on documents of growing size, where a linear parser keeps a
+ * flat cost per KB.
+ *
+ *     node bench_markdown.js              # check the golden outputs, then benchmark
+ *     node bench_markdown.js --check      # golden check only (exit code 1 on mismatch)
+ *     node bench_markdown.js --update     # re-record the golden outputs after an intended change
+ */
+const fs = require('fs');
+const path = require('path');
+const { parseMarkdown } = require('./static/js/markdown.js');
+
+const GOLDEN_PATH = path.join(__dirname, 'markdown_golden.json');
+const SCALES = [1, 4, 16, 64];
+
+function checkGolden(cases) {
+    let failures = 0;
+    for (const { name, markdown, html } of cases) {
+        const actual = parseMarkdown(markdown);
+        if (actual !== html) {
+            failures++;
+            console.log(`MISMATCH ${name}\n  expected: ${JSON.stringify(html)}\n  actual:   ${JSON.stringify(actual)}`);
+        }
+    }
+    console.log(`golden: ${cases.length - failures}/${cases.length} cases match`);
+    return failures === 0;
+}
+
+function time(markdown, minMs = 200) {
+    // Let the JIT settle before measuring
+    for (let i = 0; i < 20; i++) parseMarkdown(markdown);
+
+    let runs = 0;
+    const start = process.hrtime.bigint();
+    let elapsed = 0;
+    while (elapsed < minMs) {
+        parseMarkdown(markdown);
+        runs++;
+        elapsed = Number(process.hrtime.bigint() - start) / 1e6;
+    }
+    return elapsed / runs;
+}
+
+function report(label, markdown) {
+    const ms = time(markdown);
+    const kb = Buffer.byteLength(markdown) / 1024;
+    console.log(`${label.padEnd(28)} ${kb.toFixed(1).padStart(8)} KB ${ms.toFixed(3).padStart(10)} ms ${(ms / kb * 1000).toFixed(1).padStart(9)} us/KB`);
+}
+
+function benchmark(cases) {
+    const bio = cases.filter(c => c.name.startsWith('bio-')).map(c => c.markdown).join('\n\n');
+
+    console.log('\nrealistic bio content');
+    for (const scale of SCALES) {
+        report(`bio x${scale}`, Array(scale).fill(bio).join('\n\n'));
+    }
+
+    // Inputs that made the regex passes rescan the text once per delimiter
+    console.log('\nadversarial input');
+    for (const scale of SCALES) {
+        const n = 500 * scale;
+        report(`unclosed ** x${n}`, '**a '.repeat(n));
+        report(`unclosed [ x${n}`, '[a '.repeat(n));
+        report(`nested > depth ${25 * scale}`, '> '.repeat(25 * scale) + 'deep');
+    }
+}
+
+function main() {
+    const args = process.argv.slice(2);
+    const cases = JSON.parse(fs.readFileSync(GOLDEN_PATH, 'utf8'));
+
+    if (args.includes('--update')) {
+        for (const entry of cases) {
+            entry.html = parseMarkdown(entry.markdown);
+        }
+        fs.writeFileSync(GOLDEN_PATH, JSON.stringify(cases, null, 2) + '\n');
+        console.log(`recorded ${cases.length} golden outputs in ${path.basename(GOLDEN_PATH)}`);
+        return;
+    }
+
+    const ok = checkGolden(cases);
+    if (args.includes('--check') || !ok) {
+        process.exit(ok ? 0 : 1);
+    }
+    benchmark(cases);
+}
+
+main();
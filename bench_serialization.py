@@ -0,0 +1,121 @@
+"""
+Measure payload size and serialization time for /api/characters and /api/events
+shaped responses: full rows vs. sparse fieldsets, and stdlib json vs. orjson.
+
+Uses synthetic rows shaped like the real tables so it runs without Supabase:
+    python bench_serialization.py [--characters 120] [--events 50]
+"""
+import argparse
+import json
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BIO_PARAGRAPH = (
+    "Raised by the League of Assassins before coming to Gotham, he was trained in every "
+    "form of combat and stealth. **His arrival** changed the Bat-family forever. "
+) * 6
+
+
+def make_character(i):
+    return {
+        'id': i,
+        'name': f'Character {i}',
+        'full_name': f'Character Number {i}',
+        'nickname': f'Nick {i}',
+        'profile_image': f'https://example.supabase.co/storage/v1/object/public/character-images/profiles/{i}.jpg',
+        'birthday': '2000-01-01',
+        'family': {'slug': 'batfamily', 'name': 'Batfamily'},
+        'color_primary': '#1f2937',
+        'quote': 'A quote that appears on the profile hero.' * 2,
+        'identity': 'Secret',
+        'occupation': 'Vigilante',
+        'base': 'Gotham City',
+        'first_appearance': 'Batman #655',
+        'created_at': '2024-05-01T12:00:00+00:00',
+        'updated_at': '2024-06-01T12:00:00+00:00',
+    }
+
+
+def make_bio(i):
+    return [
+        {'id': i * 10 + n, 'character_id': i, 'section_title': f'Section {n}', 'content': BIO_PARAGRAPH, 'display_order': n}
+        for n in range(5)
+    ]
+
+
+def make_event(i, characters):
+    return {
+        'id': i,
+        'title': f'Event {i}',
+        'event_date': '2015-06-01',
+        'era': 'rebirth',
+        'summary': 'A short summary of the event for the card.' * 2,
+        'full_description': BIO_PARAGRAPH * 2,
+        'event_characters': [
+            {'character_id': c['id'], 'characters': c} for c in characters
+        ],
+    }
+
+
+def sparse(row, fields):
+    return {k: v for k, v in row.items() if k == 'id' or k in fields}
+
+
+def measure(label, payload, repeat):
+    results = {}
+    encoders = [('json', lambda o: json.dumps(o).encode('utf-8'))]
+    if orjson:
+        encoders.append(('orjson', orjson.dumps))
+
+    for name, encode in encoders:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            body = encode(payload)
+        elapsed = (time.perf_counter() - start) / repeat
+        results[name] = (len(body), elapsed * 1000)
+
+    parts = [f"{name}: {size / 1024:8.1f} KiB {ms:7.3f} ms" for name, (size, ms) in results.items()]
+    print(f"{label:<42} " + ' | '.join(parts))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--characters', type=int, default=120)
+    parser.add_argument('--events', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    characters = [make_character(i) for i in range(1, args.characters + 1)]
+    card_fields = {'name', 'full_name', 'nickname', 'profile_image', 'family'}
+
+    print(f"orjson {'available' if orjson else 'not installed'}\n")
+
+    measure('/api/characters (select=*)', characters, args.repeat)
+    measure('/api/characters?fields=<card fields>', [sparse(c, card_fields) for c in characters], args.repeat)
+
+    # Events previously embedded full character rows with bio_sections; they now embed a summary.
+    full_chars = [dict(c, bio_sections=make_bio(c['id'])) for c in characters[:3]]
+    summary_chars = [sparse(c, {'name', 'full_name', 'profile_image'}) for c in characters[:3]]
+    measure('upstream events (full characters + bio)', [make_event(i, full_chars) for i in range(args.events)], args.repeat)
+    measure('upstream events (character summaries)', [make_event(i, summary_chars) for i in range(args.events)], args.repeat)
+
+    formatted = [
+        {
+            'id': i, 'title': f'Event {i}', 'event_date': '2015-06-01', 'era': 'rebirth', 'era_display': 'DC Rebirth',
+            'summary': 'A short summary of the event for the card.' * 2, 'character_id': 1,
+            'character_name': 'Character 1', 'character_image': characters[0]['profile_image'],
+            'characters': [c['name'] for c in characters[:3]],
+        }
+        for i in range(args.events)
+    ]
+    measure('/api/events', formatted, args.repeat)
+    measure('/api/events?fields=title', [sparse(e, {'title'}) for e in formatted], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Change feed backing /api/changes.
+
+Admin mutations append rows to the `change_log` table:
+
+    create table change_log (
+        id bigserial primary key,
+        entity text not null,          -- 'character', 'event', 'gallery_image', ...
+        entity_id text not null,
+        action text not null,          -- 'created' | 'updated' | 'deleted'
+        created_at timestamptz not null default now()
+    );
+
+The bigserial id is the monotonic cursor. Old rows are compacted away periodically,
+but the newest row is always kept as the high-water mark, so the log only becomes
+empty if nothing was ever recorded and latest_cursor() never goes backwards. A client
+whose cursor predates the oldest retained row (or any cursor at all once the log is
+empty) is told to reset and reload.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from database import QueryError, supabase
+
+RETENTION_DAYS = int(os.getenv('CHANGE_FEED_RETENTION_DAYS', '30'))
+COMPACT_INTERVAL_SECONDS = 3600
+MAX_PAGE = 1000
+
+_last_compaction = 0.0
+_compaction_lock = threading.Lock()
+
+
+def record(action, entity, *entity_ids):
+    """Append one change row per id in a single insert."""
+    rows = [
+        {'entity': entity, 'entity_id': str(entity_id), 'action': action}
+        for entity_id in entity_ids if entity_id is not None
+    ]
+    if not rows:
+        return []
+    result = supabase.query('change_log', method='POST', data=rows, select='id')
+    maybe_compact()
+    return result
+
+
+def latest_cursor():
+    """Id of the newest change row (0 for an empty log); raises QueryError if the log cannot be read."""
+    rows = supabase.query('change_log', params={'order': 'id.desc', 'limit': 1}, select='id', strict=True)
+    return rows[0]['id'] if rows else 0
+
+
+def get_changes(since, limit=500):
+    """
+    Changes after cursor `since`, coalesced to the latest action per entity.
+    Returns a dict with the changes, the cursor to resume from, whether more remain,
+    and `reset` when the retained history does not reach back to the client's cursor.
+    Raises QueryError if the log cannot be read.
+    """
+    limit = min(max(limit, 1), MAX_PAGE)
+    oldest = supabase.query('change_log', params={'order': 'id.asc', 'limit': 1}, select='id', strict=True)
+    stale = since < oldest[0]['id'] - 1 if oldest else since > 0
+    if stale:
+        return {'changes': [], 'cursor': latest_cursor(), 'has_more': False, 'reset': True}
+
+    params = {'id': f'gt.{since}', 'order': 'id.asc', 'limit': limit}
+    rows = supabase.query('change_log', params=params, select='id,entity,entity_id,action,created_at', strict=True)
+
+    latest = {}
+    for row in rows:
+        key = (row['entity'], row['entity_id'])
+        latest.pop(key, None)  # re-insert so dict order follows the most recent change
+        latest[key] = {
+            'cursor': row['id'],
+            'entity': row['entity'],
+            'id': row['entity_id'],
+            'action': row['action'],
+            'at': row['created_at'],
+        }
+
+    return {
+        'changes': list(latest.values()),
+        'cursor': rows[-1]['id'] if rows else since,
+        'has_more': len(rows) == limit,
+        'reset': False,
+    }
+
+
+def compact():
+    """Delete change rows older than the retention window, keeping the newest row as the high-water mark."""
+    try:
+        latest = latest_cursor()
+    except QueryError:
+        return
+    if not latest:
+        return
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)).isoformat()
+    supabase.query('change_log', method='DELETE', params={'created_at': f'lt.{cutoff}', 'id': f'lt.{latest}'})
+
+
+def maybe_compact():
+    global _last_compaction
+    now = time.monotonic()
+    if now - _last_compaction < COMPACT_INTERVAL_SECONDS:
+        return
+    with _compaction_lock:
+        if now - _last_compaction < COMPACT_INTERVAL_SECONDS:
+            return
+        _last_compaction = now
+    compact()
@@ -0,0 +1,204 @@
+"""
+Resumable chunked uploads for large images (a TUS-style protocol).
+
+    POST   /api/admin/uploads           {"filename", "size", "content_type"} -> session
+    PATCH  /api/admin/uploads/<id>      raw chunk bytes, with an Upload-Offset header
+    GET    /api/admin/uploads/<id>      session status, including the chunks received
+    DELETE /api/admin/uploads/<id>      abandon the session
+
+Every chunk is stored on its own at its index, so chunks can arrive in any order and in
+parallel. A client resumes by asking which chunks arrived and sending the rest. A completed
+session is then named by its id in place of a file on the gallery and event image routes,
+which stream it to storage.
+
+Sessions and chunks live in Supabase rather than on local disk, so an upload keeps working
+when consecutive requests reach different instances (serverless) or hosts:
+
+    create table uploads (
+        id text primary key,              -- 32 hex characters
+        filename text not null,
+        content_type text not null,
+        size bigint not null,
+        chunk_size integer not null,
+        created_at timestamptz not null default now()
+    );
+    create table upload_chunks (
+        upload_id text not null references uploads (id) on delete cascade,
+        idx integer not null,
+        primary key (upload_id, idx)
+    );
+
+Chunk bytes are the objects `<upload id>/<index>` in the private CHUNK_BUCKET bucket; an
+upload_chunks row is only written once its object is stored. Unfinished sessions expire
+after SESSION_TTL_SECONDS.
+"""
+import os
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import job_queue
+from database import QueryError, supabase
+
+CHUNK_BUCKET = os.getenv('UPLOAD_CHUNK_BUCKET', 'upload-chunks')
+CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(200 * 1024 * 1024)))
+SESSION_TTL_SECONDS = 24 * 3600
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadNotFound(LookupError):
+    pass
+
+
+class UploadFailed(RuntimeError):
+    """Chunk storage could not be written or read; the upload itself may still be resumed."""
+
+
+def _chunk_count(size, chunk_size):
+    return max(1, -(-size // chunk_size))
+
+
+def _chunk_path(upload_id, index):
+    return f'{upload_id}/{index}'
+
+
+def _session(upload_id):
+    # Ids come straight from URLs; anything that is not one of ours cannot exist
+    if not UPLOAD_ID_RE.match(upload_id or ''):
+        raise UploadNotFound(upload_id)
+    rows = supabase.query('uploads', params={'id': f'eq.{upload_id}'}, strict=True)
+    if not rows:
+        raise UploadNotFound(upload_id)
+    return rows[0]
+
+
+def _status(row):
+    chunks = supabase.query('upload_chunks', params={'upload_id': f"eq.{row['id']}", 'order': 'idx'},
+                            select='idx', strict=True)
+    received = [chunk['idx'] for chunk in chunks]
+    total = _chunk_count(row['size'], row['chunk_size'])
+    # Bytes received without gaps from the start, as in TUS's Upload-Offset
+    contiguous = 0
+    while contiguous < len(received) and received[contiguous] == contiguous:
+        contiguous += 1
+    return {
+        'id': row['id'],
+        'filename': row['filename'],
+        'content_type': row['content_type'],
+        'size': row['size'],
+        'chunk_size': row['chunk_size'],
+        'chunks': total,
+        'received': received,
+        'offset': min(contiguous * row['chunk_size'], row['size']),
+        'complete': len(received) == total,
+    }
+
+
+def create(filename, size, content_type):
+    """Open a session. Raises ValueError for unacceptable sizes."""
+    if size <= 0:
+        raise ValueError('Upload size must be positive')
+    if size > MAX_UPLOAD_BYTES:
+        raise ValueError(f'Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+    expire_stale()
+
+    row = {'id': uuid.uuid4().hex, 'filename': filename, 'content_type': content_type,
+           'size': size, 'chunk_size': CHUNK_SIZE}
+    created = supabase.query('uploads', method='POST', data=row, strict=True)
+    return _status(created[0] if created else row)
+
+
+def status(upload_id):
+    return _status(_session(upload_id))
+
+
+def write_chunk(upload_id, offset, data):
+    """Store one chunk at `offset` (a multiple of the chunk size). Re-sending a chunk is harmless."""
+    row = _session(upload_id)
+    chunk_size, size = row['chunk_size'], row['size']
+    if offset < 0 or offset >= size or offset % chunk_size:
+        raise ValueError('Upload-Offset must be a chunk boundary within the file')
+    if len(data) != min(chunk_size, size - offset):
+        raise ValueError(f'Expected {min(chunk_size, size - offset)} bytes at offset {offset}, got {len(data)}')
+
+    index = offset // chunk_size
+    stored = supabase.upload_file(CHUNK_BUCKET, _chunk_path(upload_id, index), data, 'application/octet-stream',
+                                  content_length=len(data), upsert=True)
+    if not stored:
+        raise UploadFailed(f'Could not store chunk {index} of upload {upload_id}')
+    supabase.query('upload_chunks', method='POST', data={'upload_id': upload_id, 'idx': index},
+                   on_conflict='upload_id,idx', strict=True)
+    return _status(row)
+
+
+def completed(upload_id):
+    """Status of a finished upload, leaving the session in place; ValueError if chunks are missing."""
+    info = status(upload_id)
+    if not info['complete']:
+        raise ValueError(f"Upload {upload_id} is missing {info['chunks'] - len(info['received'])} chunk(s)")
+    return info
+
+
+def read(info):
+    """Yield the bytes of a completed upload chunk by chunk (e.g. as an upload_file body); raises UploadFailed."""
+    for index in range(info['chunks']):
+        data = supabase.download_file(CHUNK_BUCKET, _chunk_path(info['id'], index))
+        if data is None:
+            raise UploadFailed(f"Could not read chunk {index} of upload {info['id']}")
+        yield data
+
+
+def fetch(upload_id):
+    """
+    Copy a completed upload into a local spool file and return (path, status), leaving the
+    session in place so the caller can still back out. The caller owns the file (e.g. lists
+    it under a job's 'spooled' paths) and calls release() once the upload has been used.
+    """
+    info = completed(upload_id)
+    path = os.path.join(job_queue.SPOOL_DIR, f'{uuid.uuid4().hex}.upload')
+    try:
+        with open(path, 'wb') as f:
+            for data in read(info):
+                f.write(data)
+    except BaseException:
+        _remove(path)
+        raise
+    return path, info
+
+
+def release(info):
+    """Forget a fetched upload and its chunks. Raises UploadNotFound if someone else released it first."""
+    # Only one caller can win the delete, so a session is never used twice
+    if not supabase.query('uploads', method='DELETE', params={'id': f"eq.{info['id']}"}, strict=True):
+        raise UploadNotFound(info['id'])
+    _delete_chunks(info)
+
+
+def discard(upload_id):
+    info = status(upload_id)
+    supabase.query('uploads', method='DELETE', params={'id': f'eq.{upload_id}'}, strict=True)
+    _delete_chunks(info)
+
+
+def _delete_chunks(info):
+    paths = [_chunk_path(info['id'], index) for index in range(info['chunks'])]
+    if supabase.delete_files(CHUNK_BUCKET, paths) is None:
+        # The session is already gone, so retry in the background rather than leak the objects
+        job_queue.enqueue('storage.delete', {'bucket': CHUNK_BUCKET, 'paths': paths})
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def expire_stale():
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=SESSION_TTL_SECONDS)).isoformat()
+    for row in supabase.query('uploads', params={'created_at': f'lt.{cutoff}'}, select='id'):
+        try:
+            discard(row['id'])
+        except (LookupError, QueryError):
+            pass
@@ -1,15 +1,42 @@
 import os
+import re
+import json
+import base64
+import heapq
 import httpx
 import mimetypes
+import threading
+import time
+from contextlib import contextmanager
+from single_flight import SingleFlight
+import deadline
+from deadline import BudgetExceeded
+from rate_limit import upstream_limiter
+import job_queue
 
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+# Per-call ceiling; inside a request the call also gets no more than the remaining budget
+UPSTREAM_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '10'))
+UPLOAD_TIMEOUT = float(os.getenv('SUPABASE_UPLOAD_TIMEOUT', '60'))
+# Keep-alive connections per process, shared by all request threads
+POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', '20'))
+# Until event_summaries is seen to cover every event, re-count it this often (see event_summaries_complete)
+EVENT_SUMMARIES_RECHECK_SECONDS = float(os.getenv('EVENT_SUMMARIES_RECHECK_SECONDS', '60'))
+_event_summaries_complete = False
+_event_summaries_checked_at = None
+# Event ids (and 'character:<id>' keys) whose summary refresh failed in this process and has not succeeded since
+_event_summaries_pending = set()
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("Warning: SUPABASE_URL and SUPABASE_KEY not set. Database features will be limited.")
     SUPABASE_URL = ""
     SUPABASE_KEY = ""
 
+class QueryError(Exception):
+    """A strict query (see SupabaseClient.query) that failed instead of returning []."""
+
+
 class SupabaseClient:
     def __init__(self, url, key):
         self.url = url.rstrip('/')
@@ -20,12 +47,56 @@ class SupabaseClient:
             'Authorization': f'Bearer {key}',
             'Prefer': 'return=representation'
         }
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        """
+        Drop per-process state: the connection pool (sockets must not be shared with the
+        parent) and the in-flight call table. Called at startup and in each forked worker.
+        """
+        self._http = None
+        self._http_pid = os.getpid()
+        self._http_lock = threading.Lock()
+        # Identical concurrent GETs within this process share one upstream call
+        self.single_flight = SingleFlight() if os.getenv('SUPABASE_SINGLE_FLIGHT', '1') != '0' else None
+
+    @contextmanager
+    def connection(self):
+        """The process-wide pooled HTTP client (it stays open for reuse after the block)."""
+        if self._http_pid != os.getpid():
+            self.reset_after_fork()
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+                    self._http = httpx.Client(limits=limits, timeout=UPSTREAM_TIMEOUT)
+        yield self._http
+
+    def query(self, table, method='GET', params=None, data=None, select='*', on_conflict=None, strict=False):
+        """
+        Make a request to Supabase REST API (for database tables).
+        A POST with `on_conflict` (e.g. 'id') is sent as an upsert that merges duplicates.
+        A failed request returns [] unless `strict`, in which case it raises QueryError; use
+        strict wherever an empty result would be mistaken for "no rows".
+        """
+        if method == 'GET' and self.single_flight:
+            key = (table, select, strict, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+            try:
+                return self.single_flight.do(key, lambda: self._query(table, method, params, data, select, on_conflict, strict),
+                                             timeout=deadline.call_timeout())
+            except TimeoutError:
+                raise BudgetExceeded(f'Timed out waiting for a shared read of {table}')
+        return self._query(table, method, params, data, select, on_conflict, strict)
+
+    def _query(self, table, method, params, data, select, on_conflict, strict=False):
+        def failed(message):
+            if strict:
+                raise QueryError(f'{method} {table}: {message}')
+            return []
 
-    def query(self, table, method='GET', params=None, data=None, select='*'):
-        """Make a request to Supabase REST API (for database tables)"""
         if not self.url or not self.key:
             print("ERROR: SUPABASE_URL or SUPABASE_KEY is missing.")
-            return []
+            return failed('SUPABASE_URL or SUPABASE_KEY is missing')
 
         url = f"{self.url}/rest/v1/{table}"
 
@@ -33,22 +104,30 @@ class SupabaseClient:
         headers['Content-Type'] = 'application/json'
         headers['Prefer'] = 'return=representation'
 
+        post_params = {'select': select} if select else {}
+        if method == 'POST' and on_conflict:
+            headers['Prefer'] = 'return=representation,resolution=merge-duplicates'
+            post_params['on_conflict'] = on_conflict
+
         if method == 'GET':
             if params is None:
                 params = {}
             params['select'] = select
 
+        if not upstream_limiter.acquire(max_wait=deadline.call_timeout()):
+            raise BudgetExceeded(f'Upstream call rate cap reached before {method} {table}')
+        timeout = deadline.call_timeout(UPSTREAM_TIMEOUT)
         try:
-            with httpx.Client() as client:
+            with self.connection() as client:
                 print(f"Sending {method} request to {url}")
                 if method == 'GET':
-                    response = client.get(url, headers=headers, params=params)
+                    response = client.get(url, headers=headers, params=params, timeout=timeout)
                 elif method == 'POST':
-                    response = client.post(url, headers=headers, json=data, params={'select': select} if select else None)
+                    response = client.post(url, headers=headers, json=data, params=post_params or None, timeout=timeout)
                 elif method == 'PATCH':
-                    response = client.patch(url, headers=headers, json=data, params=params)
+                    response = client.patch(url, headers=headers, json=data, params=params, timeout=timeout)
                 elif method == 'DELETE':
-                    response = client.delete(url, headers=headers, params=params)
+                    response = client.delete(url, headers=headers, params=params, timeout=timeout)
 
                 if 200 <= response.status_code < 300:
                     if response.status_code == 204: 
@@ -62,13 +141,69 @@ class SupabaseClient:
                     print(f"STATUS CODE: {response.status_code}")
                     print(f"RESPONSE BODY: {response.text}")
                     print("--- END OF ERROR ---")
-                    return []
+                    return failed(f'HTTP {response.status_code}')
+        except httpx.TimeoutException as e:
+            if deadline.expired():
+                raise BudgetExceeded(f'{method} {table} did not finish within the request budget') from e
+            print(f"Database query timed out after {timeout}s: {method} {url}")
+            return failed(f'timed out after {timeout}s')
+        except QueryError:
+            raise
         except Exception as e:
             print(f"An exception occurred during the database query: {e}")
-            return []
+            return failed(str(e))
+
+    def query_page(self, table, params=None, select='*', strict=False):
+        """
+        GET rows along with the exact total count of matching rows, as (rows, total).
+        A failed request returns ([], 0) unless `strict`, in which case it raises QueryError.
+        """
+        def failed(message):
+            if strict:
+                raise QueryError(f'GET {table}: {message}')
+            return [], 0
 
-    def upload_file(self, bucket_name, destination_path, file_body, content_type):
-        """Upload a file to Supabase Storage"""
+        if not self.url or not self.key:
+            print("ERROR: SUPABASE_URL or SUPABASE_KEY is missing.")
+            return failed('SUPABASE_URL or SUPABASE_KEY is missing')
+
+        url = f"{self.url}/rest/v1/{table}"
+        headers = self.base_headers.copy()
+        headers['Prefer'] = 'count=exact'
+        params = dict(params or {})
+        params['select'] = select
+
+        if not upstream_limiter.acquire(max_wait=deadline.call_timeout()):
+            raise BudgetExceeded(f'Upstream call rate cap reached before counted read of {table}')
+        timeout = deadline.call_timeout(UPSTREAM_TIMEOUT)
+        try:
+            with self.connection() as client:
+                print(f"Sending GET request to {url} (with count)")
+                response = client.get(url, headers=headers, params=params, timeout=timeout)
+                if 200 <= response.status_code < 300:
+                    content_range = response.headers.get('Content-Range', '')
+                    total = content_range.rsplit('/', 1)[-1]
+                    rows = response.json()
+                    return rows, int(total) if total.isdigit() else len(rows)
+                print(f"Supabase count query error: {response.status_code} - {response.text}")
+                return failed(f'HTTP {response.status_code}')
+        except httpx.TimeoutException as e:
+            if deadline.expired():
+                raise BudgetExceeded(f'Counted read of {table} did not finish within the request budget') from e
+            print(f"Database query timed out after {timeout}s: GET {url}")
+            return failed(f'timed out after {timeout}s')
+        except QueryError:
+            raise
+        except Exception as e:
+            print(f"An exception occurred during the database query: {e}")
+            return failed(str(e))
+
+    def upload_file(self, bucket_name, destination_path, file_body, content_type, content_length=None, upsert=False):
+        """
+        Upload a file to Supabase Storage. `file_body` is bytes, or an iterator of byte blocks
+        (see read_blocks) together with its total `content_length` to stream it. With `upsert`
+        an existing object at the path is overwritten instead of rejected.
+        """
         if not self.url or not self.key:
             return None
 
@@ -76,10 +211,15 @@ class SupabaseClient:
 
         upload_headers = self.base_headers.copy()
         upload_headers['Content-Type'] = content_type
+        if content_length is not None:
+            upload_headers['Content-Length'] = str(content_length)
+        if upsert:
+            upload_headers['x-upsert'] = 'true'
 
+        timeout = deadline.call_timeout(UPLOAD_TIMEOUT)
         try:
-            with httpx.Client() as client:
-                response = client.post(storage_url, headers=upload_headers, content=file_body)
+            with self.connection() as client:
+                response = client.post(storage_url, headers=upload_headers, content=file_body, timeout=timeout)
 
                 if response.status_code == 200:
 
@@ -91,6 +231,24 @@ class SupabaseClient:
             print(f"File upload error: {e}")
             return None
 
+    def download_file(self, bucket_name, path):
+        """Contents of a storage object (public or private bucket) as bytes, or None if it could not be read."""
+        if not self.url or not self.key:
+            return None
+
+        storage_url = f"{self.url}/storage/v1/object/{bucket_name}/{path.lstrip('/')}"
+        timeout = deadline.call_timeout(UPLOAD_TIMEOUT)
+        try:
+            with self.connection() as client:
+                response = client.get(storage_url, headers=self.base_headers, timeout=timeout)
+                if response.status_code == 200:
+                    return response.content
+                print(f"Storage download error: {response.status_code} - {response.text}")
+                return None
+        except Exception as e:
+            print(f"File download error: {e}")
+            return None
+
     def get_public_url(self, bucket_name, path):
         """Gets the public URL for a file in storage."""
         if not self.url:
@@ -107,10 +265,11 @@ class SupabaseClient:
         
         headers = self.base_headers.copy()
         
+        timeout = deadline.call_timeout(UPSTREAM_TIMEOUT)
         try:
-            with httpx.Client() as client:
+            with self.connection() as client:
                 print(f"Deleting file from storage: {storage_url}")
-                response = client.delete(storage_url, headers=headers)
+                response = client.delete(storage_url, headers=headers, timeout=timeout)
                 
                 if response.status_code == 200:
                     return True
@@ -121,8 +280,245 @@ class SupabaseClient:
             print(f"File delete error: {e}")
             return False
 
+    def delete_files(self, bucket_name, paths, batch_size=1000):
+        """
+        Delete many objects from a bucket, one request per `batch_size` paths.
+        Returns the paths the storage API reported as removed (missing objects are
+        simply absent), or None if any batch request failed. Like query, each batch waits
+        for an upstream slot and gets no more than the request budget that is left.
+        """
+        if not self.url or not self.key:
+            return None
+
+        paths = [p.lstrip('/') for p in paths if p]
+        storage_url = f"{self.url}/storage/v1/object/{bucket_name}"
+        headers = self.base_headers.copy()
+        headers['Content-Type'] = 'application/json'
+
+        deleted = []
+        try:
+            with self.connection() as client:
+                for start in range(0, len(paths), batch_size):
+                    batch = paths[start:start + batch_size]
+                    if not upstream_limiter.acquire(max_wait=deadline.call_timeout()):
+                        raise BudgetExceeded(f'Upstream call rate cap reached before deleting from {bucket_name}')
+                    timeout = deadline.call_timeout(UPSTREAM_TIMEOUT)
+                    print(f"Deleting {len(batch)} file(s) from storage bucket {bucket_name}")
+                    response = client.request('DELETE', storage_url, headers=headers, json={'prefixes': batch},
+                                              timeout=timeout)
+                    if response.status_code != 200:
+                        print(f"Storage batch delete error: {response.status_code} - {response.text}")
+                        return None
+                    deleted.extend(obj['name'] for obj in response.json())
+        except BudgetExceeded:
+            raise
+        except httpx.TimeoutException as e:
+            if deadline.expired():
+                raise BudgetExceeded(f'Deleting from {bucket_name} did not finish within the request budget') from e
+            print(f"File batch delete timed out: {e}")
+            return None
+        except Exception as e:
+            print(f"File batch delete error: {e}")
+            return None
+        return deleted
+
+    def list_files(self, bucket_name, prefix='', page_size=1000):
+        """
+        Yield every object in a bucket under `prefix` as {'path', 'size', 'created_at'},
+        paging through each folder and descending into subfolders. Each page waits for an
+        upstream slot and gets no more than the request budget that is left.
+        """
+        if not self.url or not self.key:
+            return
+
+        list_url = f"{self.url}/storage/v1/object/list/{bucket_name}"
+        headers = self.base_headers.copy()
+        headers['Content-Type'] = 'application/json'
+
+        folders = [prefix.strip('/')]
+        with self.connection() as client:
+            while folders:
+                folder = folders.pop()
+                offset = 0
+                while True:
+                    body = {'prefix': folder, 'limit': page_size, 'offset': offset, 'sortBy': {'column': 'name', 'order': 'asc'}}
+                    if not upstream_limiter.acquire(max_wait=deadline.call_timeout()):
+                        raise BudgetExceeded(f'Upstream call rate cap reached before listing {bucket_name}')
+                    try:
+                        response = client.post(list_url, headers=headers, json=body,
+                                               timeout=deadline.call_timeout(UPSTREAM_TIMEOUT))
+                    except httpx.TimeoutException as e:
+                        if deadline.expired():
+                            raise BudgetExceeded(f'Listing {bucket_name} did not finish within the request budget') from e
+                        raise
+                    if response.status_code != 200:
+                        raise RuntimeError(f"Storage list error: {response.status_code} - {response.text}")
+                    entries = response.json()
+                    for entry in entries:
+                        path = f"{folder}/{entry['name']}" if folder else entry['name']
+                        # Folders come back as placeholder entries without an id
+                        if entry.get('id') is None:
+                            folders.append(path)
+                        else:
+                            yield {
+                                'path': path,
+                                'size': (entry.get('metadata') or {}).get('size', 0),
+                                'created_at': entry.get('created_at')
+                            }
+                    if len(entries) < page_size:
+                        break
+                    offset += page_size
+
 supabase = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
 
+FIELD_NAME_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+# Columns embedded when a character appears inside another resource (events, relationships).
+CHARACTER_SUMMARY_SELECT = 'id,name,full_name,profile_image'
+# Character columns a client may name in ?fields=; anything else would be a PostgREST 400.
+CHARACTER_FIELDS = {
+    'id', 'name', 'full_name', 'nickname', 'birthday', 'family', 'profile_image', 'quote',
+    'color_primary', 'color_secondary', 'color_accent', 'color_bg',
+}
+
+def build_select(fields, default='*', embeds=None):
+    """
+    Turn a sparse fieldset (e.g. ['name', 'profile_image']) into a PostgREST select string.
+    'id' is always included, unknown-looking names are dropped, and names listed in
+    `embeds` are expanded to their embedded resource (e.g. 'family' -> 'family:families(slug,name)').
+    """
+    if not fields:
+        return default
+    embeds = embeds or {}
+    columns = ['id']
+    for field in fields:
+        if not FIELD_NAME_RE.match(field):
+            continue
+        column = embeds.get(field, field)
+        if column not in columns:
+            columns.append(column)
+    return ','.join(columns)
+
+def storage_path(url, bucket):
+    """Object path of a public storage URL within `bucket`, or None if the URL is not in that bucket."""
+    marker = f'/{bucket}/'
+    if not url or marker not in url:
+        return None
+    return url.split(marker, 1)[-1]
+
+def read_blocks(f, block_size=1024 * 1024):
+    """Iterate over an open binary file in fixed-size blocks, for streaming uploads."""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return
+        yield block
+
+def encode_cursor(*values):
+    """Opaque pagination cursor for a (sort value, id) position."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_position(values, nullable=False):
+    """
+    Validate a decoded (sort value, id) cursor position and return it as a tuple.
+    Raises ValueError unless the id is an integer and the sort value a string that
+    can be quoted in a PostgREST filter (or None, when `nullable`).
+    """
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Invalid cursor')
+    value, id_value = values
+    if not isinstance(id_value, int) or isinstance(id_value, bool):
+        raise ValueError('Invalid cursor')
+    if value is None and nullable:
+        return value, id_value
+    if not isinstance(value, str) or '"' in value or '\\' in value:
+        raise ValueError('Invalid cursor')
+    return value, id_value
+
+def keyset_filter(column, value, id_value, descending=True, nulls_last=False):
+    """
+    PostgREST `or` filter selecting rows after (value, id) in a (column, id) ordering.
+    With `nulls_last` (an order of `column.desc.nullslast` or `column.asc.nullslast`)
+    the rows with a null `column` follow every other row, ordered by id.
+    """
+    op = 'lt' if descending else 'gt'
+    if value is None:
+        return f'(and({column}.is.null,id.{op}.{id_value}))'
+    after = f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}.{id_value})'
+    if nulls_last:
+        after += f',{column}.is.null'
+    return f'({after})'
+
+def quote_filter_value(value):
+    """Quote a value for a PostgREST list filter such as in.(...), where commas and parentheses are reserved."""
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+def sync_rows(table, scope, desired, key_fields, compare_fields=()):
+    """
+    Make the rows of `table` owned by `scope` (e.g. {'event_id': 5}) match `desired`
+    with at most one batched request each for deletes, updates and inserts.
+
+    Rows are matched on `key_fields`; a desired row whose key is missing or unknown is
+    inserted, a matched row is updated (upsert on id) only if a `compare_fields` value
+    changed, and current rows that are no longer desired are deleted. Saving an
+    unchanged set costs only the read. `ok` is False when any of these requests failed,
+    including the read (nothing is written then, so a failed read never duplicates rows).
+    """
+    def key_of(row):
+        return tuple(row.get(k) for k in key_fields)
+
+    scope_params = {k: f'eq.{v}' for k, v in scope.items()}
+    try:
+        current = supabase.query(table, params=dict(scope_params), select='*', strict=True)
+    except QueryError as e:
+        print(f"sync_rows: could not read {table} for {scope}: {e}")
+        return {'inserted': 0, 'updated': 0, 'deleted': 0, 'ok': False}
+    current_by_key = {key_of(row): row for row in current}
+
+    inserts, updates, desired_keys = [], [], set()
+    for row in desired:
+        key = key_of(row)
+        existing = current_by_key.get(key)
+        if existing is None or None in key:
+            inserts.append({**scope, **{k: v for k, v in row.items() if k != 'id'}})
+            continue
+        desired_keys.add(key)
+        if any(existing.get(f) != row.get(f) for f in compare_fields):
+            updates.append({**scope, **row, 'id': existing['id']})
+
+    stale = [row for key, row in current_by_key.items() if key not in desired_keys]
+
+    # Deletes return the removed rows; nothing back means the stale rows are still there
+    ok = True
+    if stale:
+        if all('id' in row for row in stale):
+            ids = ','.join(str(row['id']) for row in stale)
+            ok = bool(supabase.query(table, method='DELETE', params={'id': f'in.({ids})'}))
+        elif len(key_fields) == 1:
+            values = ','.join(str(row[key_fields[0]]) for row in stale)
+            ok = bool(supabase.query(table, method='DELETE', params={**scope_params, key_fields[0]: f'in.({values})'}))
+        else:
+            for row in stale:
+                params = {**scope_params, **{k: f'eq.{row[k]}' for k in key_fields}}
+                ok = bool(supabase.query(table, method='DELETE', params=params)) and ok
+    if updates:
+        ok = bool(supabase.query(table, method='POST', data=updates, select='id', on_conflict='id')) and ok
+    if inserts:
+        ok = bool(supabase.query(table, method='POST', data=inserts, select='*')) and ok
+
+    return {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(stale), 'ok': ok}
+
 class Database:
     @property
     def supabase(self):
@@ -136,27 +532,35 @@ class Database:
         return {era['id']: era['name'] for era in eras} if eras else {}
 
     @staticmethod
-    def get_all_characters(family=None):
-        """Get all characters, optionally filtered by family"""
+    def get_all_characters(family=None, fields=None):
+        """Get all characters, optionally filtered by family and projected to `fields`"""
         params = {'order': 'full_name'}
         if family and family != 'all':
             params['family'] = f'eq.{family}'
 
-        return supabase.query('characters', params=params, select='*,family:families(slug,name)')
+        select = build_select(fields, default='*,family:families(slug,name)',
+                              embeds={'family': 'family:families(slug,name)'})
+        return supabase.query('characters', params=params, select=select)
 
     @staticmethod
-    def get_character_by_id(character_id):
-        """Get a single character by ID, including their bio sections"""
+    def get_character_by_id(character_id, select=None, include_bio=True):
+        """Get a single character by ID, including their bio sections unless include_bio is False"""
         params = {'id': f'eq.{character_id}'}
-        result = supabase.query('characters', params=params, select='*,family:families(slug,name)')
+        result = supabase.query('characters', params=params, select=select or '*,family:families(slug,name)')
 
         if not result:
             return None
 
         character = result[0]
+        if not include_bio:
+            return character
 
         bio_params = {'character_id': f'eq.{character_id}', 'order': 'display_order'}
-        bio_sections = supabase.query('character_bio', params=bio_params, select='*')
+        try:
+            bio_sections = supabase.query('character_bio', params=bio_params, select='*')
+        except BudgetExceeded:
+            deadline.mark_partial()
+            bio_sections = []
         character['bio_sections'] = bio_sections if bio_sections else []
 
         return character
@@ -178,67 +582,181 @@ class Database:
         events = supabase.query('events', params=params, select='*')
         return events
 
+    @staticmethod
+    def get_character_timelines(character_ids, date_from=None, date_to=None, limit=500):
+        """
+        Events of several characters merged into one chronological list, in two requests:
+        every event link for the characters at once, then the linked events inside the
+        optional [date_from, date_to] window already sorted by (event_date, id). An event
+        several of them share appears once, listing all of them in `character_ids`.
+        Returns (events, truncated); raises QueryError if either read fails, so a failure
+        is never served (and cached) as an empty timeline.
+        """
+        if not character_ids:
+            return [], False
+        ids = ','.join(str(cid) for cid in character_ids)
+        links = supabase.query('event_characters', params={'character_id': f'in.({ids})'}, select='event_id,character_id',
+                               strict=True)
+
+        characters_by_event = {}
+        for link in links:
+            characters_by_event.setdefault(link['event_id'], set()).add(link['character_id'])
+        if not characters_by_event:
+            return [], False
+
+        params = {
+            'id': f'in.({",".join(str(eid) for eid in characters_by_event)})',
+            'order': 'event_date,id',
+            'limit': limit + 1
+        }
+        window = []
+        if date_from:
+            window.append(f'event_date.gte.{date_from}')
+        if date_to:
+            window.append(f'event_date.lte.{date_to}')
+        if window:
+            params['and'] = f'({",".join(window)})'
+        events = supabase.query('events', params=params, select='id,title,event_date,era,summary', strict=True)
+
+        order = {cid: index for index, cid in enumerate(character_ids)}
+        for event in events:
+            linked = sorted(characters_by_event.get(event['id'], ()), key=order.get)
+            event['character_ids'] = linked
+            event['shared'] = len(linked) > 1
+        return events[:limit], len(events) > limit
+
     @staticmethod
     def get_character_relationships(character_id):
         """Get all relationships for a character"""
         params = {'character_id': f'eq.{character_id}'}
         relationships = supabase.query('relationships', params=params, select='*')
 
-        for rel in relationships:
-            rel_char = Database.get_character_by_id(rel['related_character_id'])
-            rel['related_character'] = rel_char if rel_char else {}
+        try:
+            for rel in relationships:
+                rel_char = Database.get_character_by_id(rel['related_character_id'], select=CHARACTER_SUMMARY_SELECT, include_bio=False)
+                rel['related_character'] = rel_char if rel_char else {}
+        except BudgetExceeded:
+            # Serve what arrived in time; the rest go out without their character details
+            deadline.mark_partial()
+            for rel in relationships:
+                rel.setdefault('related_character', {})
 
         return relationships
 
     @staticmethod
-    def get_character_gallery(character_id):
-        """Get all gallery images for a character"""
-        gallery_images = []
-
-        params = {'character_id': f'eq.{character_id}'}
-        links = supabase.query('gallery_image_characters', params=params, select='image_id')
-        
-        if links:
-            image_ids = [str(link['image_id']) for link in links]
-            params = {'id': f'in.({",".join(image_ids)})', 'order': 'created_at.desc'}
-            gallery_imgs = supabase.query('gallery_images', params=params, select='*')
-
-            for img in gallery_imgs:
-                gallery_images.append({
-                    'url': img['image_url'],
-                    'alt': img.get('alt_text', ''),
-                    'created_at': img.get('created_at'),
-                    'event_id': img.get('event_id'),
-                    'source': 'gallery'
-                })
+    def get_character_gallery_page(character_id, limit=24, cursor=None):
+        """
+        One page of a character's gallery and event images, newest first, as (images, next_cursor).
+
+        Each source is queried for at most `limit` rows after its own keyset position and the
+        two sorted streams are merged lazily. An image URL is listed once across all pages: at
+        its newest gallery row if it has one, otherwise at its newest event row, so copies on
+        other rows are skipped wherever they fall. The cursor records the last position consumed
+        from each source; images without created_at sort last, ordered by id.
+
+        Rows are narrowed to the character through an embedded inner join on their link table,
+        so a page costs four requests whatever the size of the character's collection.
+        """
+        positions = decode_cursor(cursor) if cursor else [None, None]
+        if len(positions) != 2:
+            raise ValueError('Invalid cursor')
+        start = {
+            source: keyset_position(position, nullable=True) if position is not None else None
+            for source, position in zip(('gallery', 'event'), positions)
+        }
 
-        params = {'character_id': f'eq.{character_id}'}
-        event_chars = supabase.query('event_characters', params=params, select='event_id')
-        
-        if event_chars:
-            event_ids = [str(ec['event_id']) for ec in event_chars]
-            params = {'event_id': f'in.({",".join(event_ids)})'}
-            event_imgs = supabase.query('event_images', params=params, select='*,events(title)')
-
-            for img in event_imgs:
-                event_title = img.get('events', {}).get('title', 'Event') if isinstance(img.get('events'), dict) else 'Event'
-                gallery_images.append({
-                    'url': img['image_url'],
-                    'alt': f"From {event_title}",
-                    'created_at': img.get('created_at'),
-                    'event_id': img.get('event_id'),
-                    'source': 'event'
-                })
+        # (table, embedded inner join that keeps only the character's rows, the join's filter)
+        sources = {
+            'gallery': ('gallery_images', 'gallery_image_characters!inner(character_id)',
+                        {'gallery_image_characters.character_id': f'eq.{character_id}'}),
+            'event': ('event_images', 'events!inner(title,event_characters!inner(character_id))',
+                      {'events.event_characters.character_id': f'eq.{character_id}'}),
+        }
 
-        gallery_images.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        return gallery_images
+        def page(source, columns):
+            table, join, params = sources[source]
+            params = dict(params, order='created_at.desc.nullslast,id.desc', limit=limit)
+            if start[source] is not None:
+                params['or'] = keyset_filter('created_at', *start[source], nulls_last=True)
+            return supabase.query(table, params=params, select=f'{columns},{join}')
+
+        gallery_rows = page('gallery', 'id,image_url,alt_text,created_at,event_id')
+        event_rows = page('event', 'id,image_url,created_at,event_id')
+
+        # Find the row that owns each URL on this page among all of the character's rows with
+        # that URL, so a copy seen on an earlier or later page is skipped here as well
+        urls = {row['image_url'] for row in gallery_rows} | {row['image_url'] for row in event_rows}
+        owners = {}
+        if urls:
+            url_filter = 'in.(' + ','.join(quote_filter_value(url) for url in sorted(urls)) + ')'
+            for source in ('gallery', 'event'):
+                table, join, params = sources[source]
+                copies = supabase.query(table, params={**params, 'image_url': url_filter},
+                                        select=f'id,image_url,created_at,{join}')
+                for row in copies:
+                    if row['image_url'] in owners and owners[row['image_url']][0] != source:
+                        continue
+                    rank = (row.get('created_at') is not None, row.get('created_at') or '', row['id'])
+                    if row['image_url'] not in owners or rank > owners[row['image_url']][1]:
+                        owners[row['image_url']] = (source, rank, row['id'])
+
+        def from_gallery(img):
+            return {
+                'url': img['image_url'],
+                'alt': img.get('alt_text', ''),
+                'created_at': img.get('created_at'),
+                'event_id': img.get('event_id'),
+                'source': 'gallery',
+                '_id': img['id']
+            }
+
+        def from_event(img):
+            event_title = img.get('events', {}).get('title', 'Event') if isinstance(img.get('events'), dict) else 'Event'
+            return {
+                'url': img['image_url'],
+                'alt': f"From {event_title}",
+                'created_at': img.get('created_at'),
+                'event_id': img.get('event_id'),
+                'source': 'event',
+                '_id': img['id']
+            }
+
+        merged = heapq.merge(
+            map(from_gallery, gallery_rows),
+            map(from_event, event_rows),
+            key=lambda img: (img['created_at'] is not None, img['created_at'] or '', img['source'] == 'gallery', img['_id']),
+            reverse=True
+        )
+
+        images = []
+        last = dict(start)
+        consumed = {'gallery': 0, 'event': 0}
+        for img in merged:
+            if len(images) == limit:
+                break
+            source, image_id = img['source'], img.pop('_id')
+            last[source] = [img['created_at'], image_id]
+            consumed[source] += 1
+            owner = owners.get(img['url'])
+            if owner is not None and (owner[0], owner[2]) != (source, image_id):
+                continue
+            images.append(img)
+
+        has_more = any(
+            consumed[source] < len(rows) or len(rows) == limit
+            for source, rows in (('gallery', gallery_rows), ('event', event_rows))
+        )
+        next_cursor = encode_cursor(last['gallery'], last['event']) if has_more else None
+        return images, next_cursor
 
     @staticmethod
-    def get_recent_events(limit=6):
-        """Get recent timeline events"""
+    def get_recent_events(limit=6, fields=None, include_characters=True):
+        """Get recent timeline events, with summary rows for their characters"""
         params = {'order': 'event_date.desc', 'limit': limit}
-        events = supabase.query('events', params=params, select='*')
+        events = supabase.query('events', params=params, select=build_select(fields))
+
+        if not include_characters:
+            return events
 
         for event in events:
             params = {'event_id': f'eq.{event["id"]}'}
@@ -246,7 +764,7 @@ class Database:
             event['event_characters'] = []
 
             for ec in event_chars:
-                char = Database.get_character_by_id(ec['character_id'])
+                char = Database.get_character_by_id(ec['character_id'], select=CHARACTER_SUMMARY_SELECT, include_bio=False)
                 if char:
                     event['event_characters'].append({
                         'character_id': ec['character_id'],
@@ -271,7 +789,7 @@ class Database:
         event['event_characters'] = []
 
         for ec in event_chars:
-            char = Database.get_character_by_id(ec['character_id'])
+            char = Database.get_character_by_id(ec['character_id'], select=CHARACTER_SUMMARY_SELECT, include_bio=False)
             if char:
                 event['event_characters'].append({
                     'character_id': ec['character_id'],
@@ -295,11 +813,14 @@ class Database:
         """Update a character"""
         params = {'id': f'eq.{character_id}'}
         result = supabase.query('characters', method='PATCH', params=params, data=data)
+        if result:
+            Database.refresh_event_summaries_after_write(character_id=character_id)
         return result[0] if result else None
 
     @staticmethod
     def delete_character(character_id):
         """Delete a character and associated data"""
+        links = supabase.query('event_characters', params={'character_id': f'eq.{character_id}'}, select='event_id')
 
         supabase.query('relationships', method='DELETE', params={'character_id': f'eq.{character_id}'})
         supabase.query('relationships', method='DELETE', params={'related_character_id': f'eq.{character_id}'})
@@ -312,42 +833,38 @@ class Database:
         supabase.query('character_bio', method='DELETE', params={'character_id': f'eq.{character_id}'})
 
         supabase.query('characters', method='DELETE', params={'id': f'eq.{character_id}'})
+        Database.refresh_event_summaries_after_write([link['event_id'] for link in links])
         return True
 
     @staticmethod
     def update_character_bio_sections(character_id, sections_data):
-        """Deletes all existing bio sections and inserts the new ones for a character."""
+        """Sync a character's bio sections to the given list, writing only the rows that changed."""
         if not character_id:
             return False
 
-        supabase.query('character_bio', method='DELETE', params={'character_id': f'eq.{character_id}'})
-
-        if not sections_data:
-            return True 
-
-        sections_to_insert = []
-        for i, section in enumerate(sections_data):
+        sections = []
+        for i, section in enumerate(sections_data or []):
 
             if section.get('section_title') and section.get('content'):
-                sections_to_insert.append({
-                    'character_id': character_id,
+                section_id = str(section.get('id') or '')
+                sections.append({
+                    'id': int(section_id) if section_id.isdigit() else None,
                     'section_title': section.get('section_title'),
                     'content': section.get('content'),
                     'display_order': i
                 })
 
-        if not sections_to_insert:
-            return True
-
-        result = supabase.query('character_bio', method='POST', data=sections_to_insert, select='id')
-
-        return bool(result)
+        result = sync_rows('character_bio', {'character_id': character_id}, sections,
+                           key_fields=('id',), compare_fields=('section_title', 'content', 'display_order'))
+        return result['ok']
 
     @staticmethod
     def create_event(data):
         """Create a new timeline event"""
         clean_data = {k: v for k, v in data.items() if v}
         result = supabase.query('events', method='POST', data=clean_data, select='*')
+        if result:
+            Database.refresh_event_summaries_after_write([result[0]['id']])
         return result[0] if result else None
 
     @staticmethod
@@ -356,6 +873,8 @@ class Database:
         params = {'id': f'eq.{event_id}'}
         clean_data = {k: v for k, v in data.items() if v}
         result = supabase.query('events', method='PATCH', params=params, data=clean_data)
+        if result:
+            Database.refresh_event_summaries_after_write([event_id])
         return result[0] if result else None
 
     @staticmethod
@@ -366,6 +885,7 @@ class Database:
         supabase.query('event_images', method='DELETE', params=params)
         params = {'id': f'eq.{event_id}'}
         supabase.query('events', method='DELETE', params=params)
+        supabase.query('event_summaries', method='DELETE', params=params)
         return True
 
     @staticmethod
@@ -381,15 +901,166 @@ class Database:
             return []
         links = [{'event_id': event_id, 'character_id': char_id} for char_id in character_ids]
         result = supabase.query('event_characters', method='POST', data=links, select='*')
+        Database.refresh_event_summaries_after_write([event_id])
         return result
 
     @staticmethod
     def update_event_character_links(event_id, character_ids):
-        """Deletes all existing character links for an event and creates new ones."""
+        """Sync an event's character links, inserting and deleting only the differences. Returns success."""
+        desired = [{'character_id': char_id} for char_id in dict.fromkeys(character_ids)]
+        result = sync_rows('event_characters', {'event_id': event_id}, desired, key_fields=('character_id',))
+        if result['inserted'] or result['deleted']:
+            Database.refresh_event_summaries_after_write([event_id])
+        return result['ok']
+
+    @staticmethod
+    def refresh_event_summaries(event_ids):
+        """
+        Rebuild the denormalized `event_summaries` rows for the given events, the
+        ready-to-serve shape of /api/events. Costs four requests for any number of events.
+        Rows are only upserted here; delete_event removes its own summary. Raises QueryError
+        when any read or the upsert fails (see refresh_event_summaries_after_write).
+
+            create table event_summaries (
+                id bigint primary key references events (id) on delete cascade,
+                title text not null,
+                event_date date,
+                era text,
+                summary text,
+                character_id bigint,
+                character_name text not null default '',
+                character_image text,
+                characters text[] not null default '{}',
+                character_ids bigint[] not null default '{}'
+            );
+            create index event_summaries_event_date_idx on event_summaries (event_date desc);
+
+        The primary key on id (the event's id) is the upsert's on_conflict target, so
+        refreshing an event replaces its one summary row instead of adding another.
+        """
+        event_ids = sorted({int(i) for i in event_ids if i is not None})
+        if not event_ids:
+            return []
+        ids = ','.join(str(i) for i in event_ids)
+
+        events = supabase.query('events', params={'id': f'in.({ids})'}, select='id,title,event_date,era,summary', strict=True)
+        links = supabase.query('event_characters', params={'event_id': f'in.({ids})', 'order': 'id'},
+                               select='event_id,character_id', strict=True)
+
+        char_ids = sorted({link['character_id'] for link in links})
+        char_map = {}
+        if char_ids:
+            chars = supabase.query('characters', params={'id': f'in.({",".join(str(c) for c in char_ids)})'},
+                                   select='id,name,profile_image', strict=True)
+            char_map = {c['id']: c for c in chars}
+
+        links_by_event = {}
+        for link in links:
+            if link['character_id'] in char_map:
+                links_by_event.setdefault(link['event_id'], []).append(char_map[link['character_id']])
 
-        supabase.query('event_characters', method='DELETE', params={'event_id': f'eq.{event_id}'})
+        summaries = []
+        for event in events:
+            event_chars = links_by_event.get(event['id'], [])
+            first = event_chars[0] if event_chars else {}
+            summaries.append({
+                'id': event['id'],
+                'title': event['title'],
+                'event_date': event['event_date'],
+                'era': event.get('era'),
+                'summary': event.get('summary'),
+                'character_id': first.get('id'),
+                'character_name': first.get('name', ''),
+                'character_image': first.get('profile_image') or '/static/images/default-avatar.jpg',
+                'characters': [c['name'] for c in event_chars],
+                'character_ids': [c['id'] for c in event_chars]
+            })
 
-        return Database.link_event_to_characters(event_id, character_ids)
+        written = []
+        if summaries:
+            written = supabase.query('event_summaries', method='POST', data=summaries, select='id',
+                                     on_conflict='id', strict=True)
+        _event_summaries_pending.difference_update(event_ids)
+        return written
+
+    @staticmethod
+    def refresh_character_event_summaries(character_id):
+        """Rebuild the summaries of every event a character appears in (their name or image changed)."""
+        links = supabase.query('event_characters', params={'character_id': f'eq.{character_id}'}, select='event_id', strict=True)
+        written = Database.refresh_event_summaries([link['event_id'] for link in links])
+        _event_summaries_pending.discard(f'character:{character_id}')
+        return written
+
+    @staticmethod
+    def refresh_event_summaries_after_write(event_ids=(), character_id=None):
+        """
+        Refresh the summaries of `event_ids`, or of every event of `character_id`, after a
+        write without failing the write. If the refresh fails, /api/events in this process
+        goes back to the joined read until it succeeds, and a retrying
+        'event.summaries.refresh' job (same payload) brings the rows up to date.
+        """
+        global _event_summaries_complete, _event_summaries_checked_at
+        event_ids = sorted({int(i) for i in event_ids if i is not None})
+        try:
+            if character_id is not None:
+                return Database.refresh_character_event_summaries(character_id)
+            return Database.refresh_event_summaries(event_ids)
+        except (QueryError, BudgetExceeded) as e:
+            if character_id is not None:
+                payload, pending = {'character_id': character_id}, [f'character:{character_id}']
+            else:
+                payload, pending = {'event_ids': event_ids}, event_ids
+            print(f"Event summary refresh failed for {payload}, retrying in the background: {e}")
+            _event_summaries_pending.update(pending)
+            # Count again as soon as the retry lands
+            _event_summaries_complete, _event_summaries_checked_at = False, None
+            job_queue.enqueue('event.summaries.refresh', payload,
+                              key=f"event.summaries:{','.join(str(p) for p in pending)}")
+            return []
+
+    @staticmethod
+    def rebuild_all_event_summaries(batch_size=200):
+        """Backfill event_summaries for every event, in batches. Raises QueryError if any batch fails."""
+        global _event_summaries_checked_at
+        events = supabase.query('events', params={'order': 'id'}, select='id', strict=True)
+        event_ids = [e['id'] for e in events]
+        for start in range(0, len(event_ids), batch_size):
+            Database.refresh_event_summaries(event_ids[start:start + batch_size])
+        _event_summaries_pending.clear()
+        _event_summaries_checked_at = None  # count again on the next read
+        return len(event_ids)
+
+    @staticmethod
+    def event_summaries_complete():
+        """
+        Whether event_summaries has a row for every event, so /api/events may serve it alone.
+        Compares the two row counts at most every EVENT_SUMMARIES_RECHECK_SECONDS until they
+        match; from then on event writes keep the summaries current and the answer is kept
+        until a refresh fails. A failed count is treated as incomplete, as is any event whose
+        refresh is still being retried.
+        """
+        global _event_summaries_complete, _event_summaries_checked_at
+        if _event_summaries_pending:
+            return False
+        if _event_summaries_complete:
+            return True
+        now = time.monotonic()
+        if _event_summaries_checked_at is not None and now - _event_summaries_checked_at < EVENT_SUMMARIES_RECHECK_SECONDS:
+            return False
+        _event_summaries_checked_at = now
+        try:
+            _, events = supabase.query_page('events', params={'limit': 1}, select='id', strict=True)
+            _, summaries = supabase.query_page('event_summaries', params={'limit': 1}, select='id', strict=True)
+        except QueryError:
+            return False
+        _event_summaries_complete = summaries >= events
+        return _event_summaries_complete
+
+    @staticmethod
+    def get_event_summaries(limit=6, fields=None):
+        """Recent events from the precomputed event_summaries table in a single ordered read."""
+        params = {'order': 'event_date.desc', 'limit': limit}
+        return supabase.query('event_summaries', params=params, select=build_select(fields))
 
     @staticmethod
     def create_relationship(data):
@@ -414,39 +1085,55 @@ class Database:
 
     @staticmethod
     def update_image_character_links(image_id, character_ids):
-        """Deletes all existing character links for an image and creates new ones."""
-        supabase.query('gallery_image_characters', method='DELETE', params={'image_id': f'eq.{image_id}'})
-        return Database.link_image_to_characters(image_id, character_ids)
+        """Sync an image's character links, inserting and deleting only the differences. Returns success."""
+        desired = [{'character_id': char_id} for char_id in dict.fromkeys(character_ids)]
+        return sync_rows('gallery_image_characters', {'image_id': image_id}, desired, key_fields=('character_id',))['ok']
 
     @staticmethod
     def delete_gallery_image(image_id):
-        """Delete a gallery image from DB and Storage"""
+        """
+        Delete a gallery image row and its character links. Returns the deleted record
+        (its storage object is left for the caller to remove) or None if it did not exist.
+        """
         params = {'id': f'eq.{image_id}'}
         result = supabase.query('gallery_images', params=params, select='*')
-        
+
         if not result:
-            return False
-            
-        image_record = result[0]
-        image_url = image_record.get('image_url', '')
+            return None
 
         supabase.query('gallery_image_characters', method='DELETE', params={'image_id': f'eq.{image_id}'})
         supabase.query('gallery_images', method='DELETE', params=params)
+        return result[0]
 
-        if image_url and 'gallery-images' in image_url:
-            try:
-                path = image_url.split('/gallery-images/')[-1]
-                supabase.delete_file('gallery-images', path)
-            except Exception as e:
-                print(f"Error parsing URL for deletion: {e}")
-
-        return True
+    @staticmethod
+    def get_pending_edits_page(limit=50, cursor=None, character_id=None):
+        """
+        One page of pending edits, newest first, as (rows, total, next_cursor).
+        `character_id` narrows the queue to edits targeting that character. Raises QueryError
+        when the read fails, so an outage is not shown to moderators as an empty queue.
+        """
+        params = {'status': 'eq.pending', 'order': 'created_at.desc,id.desc', 'limit': limit}
+        if character_id:
+            params['table_name'] = 'eq.characters'
+            params['record_id'] = f'eq.{character_id}'
+        if cursor:
+            created_at, edit_id = keyset_position(decode_cursor(cursor))
+            params['or'] = keyset_filter('created_at', created_at, edit_id)
+
+        rows, total = supabase.query_page('pending_edits', params=params, select='*', strict=True)
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+        return rows, total, next_cursor
 
     @staticmethod
-    def get_pending_edits():
-        """Get all pending edits"""
-        params = {'status': 'eq.pending', 'order': 'created_at.desc'}
-        return supabase.query('pending_edits', params=params, select='*')
+    def moderate_edits(edit_ids, status):
+        """Set many pending edits to 'approved' or 'denied' in one PATCH; returns the updated rows."""
+        if not edit_ids:
+            return []
+        ids = ','.join(str(int(i)) for i in edit_ids)
+        params = {'id': f'in.({ids})', 'status': 'eq.pending'}
+        return supabase.query('pending_edits', method='PATCH', params=params, data={'status': status})
 
     @staticmethod
     def get_all_relationships():
@@ -481,13 +1168,15 @@ class Database:
         return {'a_to_b': a_to_b[0], 'b_to_a': b_to_a[0]}
 
     def delete_relationship_pair(self, char1_id, char2_id):
-        """Delete both sides of a relationship."""
-
-        params_a = {'character_id': f'eq.{char1_id}', 'related_character_id': f'eq.{char2_id}'}
-        supabase.query('relationships', method='DELETE', params=params_a)
+        """Delete both sides of a relationship. Returns False if either delete failed."""
+        try:
+            params_a = {'character_id': f'eq.{char1_id}', 'related_character_id': f'eq.{char2_id}'}
+            supabase.query('relationships', method='DELETE', params=params_a, strict=True)
 
-        params_b = {'character_id': f'eq.{char2_id}', 'related_character_id': f'eq.{char1_id}'}
-        supabase.query('relationships', method='DELETE', params=params_b)
+            params_b = {'character_id': f'eq.{char2_id}', 'related_character_id': f'eq.{char1_id}'}
+            supabase.query('relationships', method='DELETE', params=params_b, strict=True)
+        except QueryError:
+            return False
         return True
 
     def update_relationship_pair(self, data):
@@ -505,6 +1194,57 @@ class Database:
 
         return updated_a[0] if updated_a else None
 
+    @staticmethod
+    def upsert_relationship_pairs(pairs):
+        """
+        Create or update many relationship pairs with one upsert on (character_id, related_character_id).
+        Each pair (character_id, related_character_id, type, status_a_to_b, status_b_to_a) becomes both
+        directed rows, and the whole batch is a single statement, so either every row lands or none does.
+        Returns one result per pair: 'created' when neither direction existed, 'updated' otherwise,
+        or 'failed' when the upsert did not write it. Raises QueryError, having written nothing, if
+        the existing rows cannot be read, since every pair would otherwise be reported as created.
+
+        The upsert's on_conflict target must be backed by a unique constraint, without which
+        PostgREST rejects every bulk write:
+
+            alter table relationships
+                add constraint relationships_pair_key unique (character_id, related_character_id);
+
+        Existing duplicate directed rows have to be removed before the constraint can be added.
+        """
+        if not pairs:
+            return []
+        ids = ','.join(str(cid) for cid in sorted({cid for p in pairs for cid in (p['character_id'], p['related_character_id'])}))
+        existing = supabase.query('relationships', params={
+            'character_id': f'in.({ids})',
+            'related_character_id': f'in.({ids})'
+        }, select='character_id,related_character_id', strict=True)
+        existing = {(row['character_id'], row['related_character_id']) for row in existing}
+
+        rows = []
+        for pair in pairs:
+            a, b = pair['character_id'], pair['related_character_id']
+            rows.append({'character_id': a, 'related_character_id': b,
+                         'type': pair.get('type'), 'status': pair.get('status_a_to_b') or None})
+            rows.append({'character_id': b, 'related_character_id': a,
+                         'type': pair.get('type'), 'status': pair.get('status_b_to_a') or None})
+        written = supabase.query('relationships', method='POST', data=rows,
+                                 select='character_id,related_character_id',
+                                 on_conflict='character_id,related_character_id')
+        written = {(row['character_id'], row['related_character_id']) for row in written}
+
+        results = []
+        for pair in pairs:
+            a, b = pair['character_id'], pair['related_character_id']
+            if (a, b) not in written or (b, a) not in written:
+                result = 'failed'
+            elif (a, b) in existing or (b, a) in existing:
+                result = 'updated'
+            else:
+                result = 'created'
+            results.append({'character_id': a, 'related_character_id': b, 'type': pair.get('type'), 'result': result})
+        return results
+
     @staticmethod
     def get_all_gallery_images():
         """Get all gallery images, populating character names"""
@@ -0,0 +1,107 @@
+"""
+Per-request latency budgets.
+
+Each request gets a deadline when it starts (REQUEST_BUDGET_SECONDS, or a per-endpoint
+value from app.config['REQUEST_BUDGETS']). SupabaseClient gives every upstream call the
+time that is left as its timeout and raises BudgetExceeded once it is spent, so a route
+making many queries fails in bounded time instead of N times the client timeout.
+Routes that can do without part of their data catch BudgetExceeded and mark_partial();
+anything uncaught becomes a fast 503.
+
+Outside a request (background jobs, scripts) there is no budget and calls fall back
+to their own timeout.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUDGET_SECONDS = float(os.getenv('REQUEST_BUDGET_SECONDS', '8'))
+# Not worth starting an upstream call with less time than this left
+MIN_CALL_SECONDS = 0.05
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Budget:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+        self.partial = False
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+
+_current = contextvars.ContextVar('request_budget', default=None)
+
+
+def current():
+    return _current.get()
+
+
+def call_timeout(cap=None):
+    """Timeout for the next upstream call: what is left of the budget, at most `cap`."""
+    budget = _current.get()
+    if budget is None:
+        return cap
+    left = budget.remaining()
+    if left < MIN_CALL_SECONDS:
+        raise BudgetExceeded(f'Request budget of {budget.seconds}s exhausted')
+    return left if cap is None else min(left, cap)
+
+
+def expired():
+    budget = _current.get()
+    return budget is not None and budget.remaining() < MIN_CALL_SECONDS
+
+
+def mark_partial():
+    """Flag the current response as missing data that did not arrive within the budget."""
+    budget = _current.get()
+    if budget is not None:
+        budget.partial = True
+
+
+@contextmanager
+def request_budget(seconds):
+    token = _current.set(Budget(seconds))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def init_app(app):
+    from flask import current_app, jsonify, request
+
+    app.config.setdefault('REQUEST_BUDGETS', {})
+
+    @app.before_request
+    def start_budget():
+        seconds = current_app.config['REQUEST_BUDGETS'].get(request.endpoint, DEFAULT_BUDGET_SECONDS)
+        _current.set(Budget(seconds) if seconds else None)
+
+    @app.after_request
+    def flag_partial(response):
+        budget = _current.get()
+        if budget is not None and budget.partial:
+            response.headers['X-Partial-Response'] = 'true'
+            # Never let an incomplete response sit in the edge cache
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    @app.teardown_request
+    def clear_budget(exc):
+        _current.set(None)
+
+    @app.errorhandler(BudgetExceeded)
+    def budget_exceeded(error):
+        print(f"Request budget exceeded on {request.path}: {error}")
+        response = jsonify({'error': 'The server is busy, please retry'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
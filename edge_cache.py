@@ -0,0 +1,138 @@
+import os
+from functools import wraps
+
+import httpx
+from flask import current_app, g, has_request_context, make_response
+
+SURROGATE_KEY_HEADER = os.getenv('CDN_SURROGATE_KEY_HEADER', 'Surrogate-Key')
+PURGE_TIMEOUT = float(os.getenv('CDN_PURGE_TIMEOUT', '2'))
+
+# Edge caching policy per public route: (s-maxage, stale-while-revalidate) in seconds.
+# Override an entry with CACHE_POLICIES in app.config, or disable with CDN_CACHE_DISABLED=1.
+DEFAULT_POLICIES = {
+    'characters': (300, 86400),
+    'character': (300, 86400),
+    'events': (120, 3600),
+    'event': (300, 86400),
+    'reference': (3600, 86400),
+}
+
+
+class Purger:
+    """Base purger. Subclasses remove cached responses tagged with any of the given keys."""
+
+    def purge(self, keys):
+        raise NotImplementedError
+
+
+class LocalPurger(Purger):
+    """In-process stand-in that just records purged keys (used in development and tests)."""
+
+    def __init__(self):
+        self.purged = []
+
+    def purge(self, keys):
+        self.purged.append(sorted(keys))
+        return True
+
+
+class HttpPurger(Purger):
+    """Posts surrogate keys to a CDN purge endpoint."""
+
+    def __init__(self, url, token=None, timeout=PURGE_TIMEOUT):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+
+    def purge(self, keys):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        try:
+            with httpx.Client(timeout=self.timeout) as client:
+                response = client.post(self.url, headers=headers, json={'keys': sorted(keys)})
+            if 200 <= response.status_code < 300:
+                return True
+            print(f"Edge purge error: {response.status_code} - {response.text}")
+        except Exception as e:
+            print(f"Edge purge error: {e}")
+        return False
+
+
+def create_purger():
+    """Pick a purger from the environment: CDN_PURGE_URL enables HTTP purges."""
+    url = os.getenv('CDN_PURGE_URL')
+    if url:
+        return HttpPurger(url, token=os.getenv('CDN_PURGE_TOKEN'))
+    return LocalPurger()
+
+
+purger = create_purger()
+
+
+def set_purger(new_purger):
+    """Swap the active purger (e.g. for a LocalPurger in tests)."""
+    global purger
+    purger = new_purger
+
+
+def purge(*keys):
+    """
+    Purge every cached response tagged with one of the given surrogate keys. Inside a request
+    the keys are collected and purged in one call once the response has been sent (see
+    init_app), so admin writes never wait on the CDN; elsewhere (jobs, scripts) it runs now.
+    """
+    keys = {str(k) for k in keys if k is not None}
+    if not keys:
+        return False
+    if has_request_context():
+        g.setdefault('pending_purge', set()).update(keys)
+        return True
+    return purger.purge(keys)
+
+
+def init_app(app):
+    @app.after_request
+    def purge_after_response(response):
+        keys = g.pop('pending_purge', None)
+        if keys:
+            response.call_on_close(lambda: purger.purge(keys))
+        return response
+
+
+def add_surrogate_keys(*keys):
+    """Tag the current response with surrogate keys naming the entities it contains."""
+    if not hasattr(g, 'surrogate_keys'):
+        g.surrogate_keys = set()
+    g.surrogate_keys.update(str(k) for k in keys if k is not None)
+
+
+def get_policy(app, name):
+    if os.getenv('CDN_CACHE_DISABLED') == '1':
+        return None
+    policies = {**DEFAULT_POLICIES, **app.config.get('CACHE_POLICIES', {})}
+    return policies.get(name)
+
+
+def edge_cached(policy_name, *static_keys):
+    """Decorator for public GET routes: sets Cache-Control and surrogate key headers on 200 responses."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.surrogate_keys = set(static_keys)
+            response = make_response(view(*args, **kwargs))
+            policy = get_policy(current_app, policy_name)
+
+            if response.status_code != 200 or not policy:
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+
+            s_maxage, stale_while_revalidate = policy
+            response.headers['Cache-Control'] = (
+                f'public, max-age=0, s-maxage={s_maxage}, stale-while-revalidate={stale_while_revalidate}'
+            )
+            if g.surrogate_keys:
+                response.headers[SURROGATE_KEY_HEADER] = ' '.join(sorted(g.surrogate_keys))
+            return response
+        return wrapper
+    return decorator
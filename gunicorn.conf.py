@@ -0,0 +1,50 @@
+"""
+Production server settings for self-hosted deployments (Vercel does not use this).
+
+    gunicorn app:app            # this file is picked up automatically from the project root
+
+The app is imported once in the master (preload_app) with its warm state: era names,
+asset manifests, compiled templates and the service worker script. Workers are forked
+from it and share those pages copy-on-write; each worker then opens its own upstream
+connection pool and background job threads. Tune with:
+
+    PORT                  bind port (default 8000)
+    WEB_CONCURRENCY       worker processes (default: CPU count)
+    GUNICORN_THREADS      request threads per worker (default 8; requests mostly wait on Supabase)
+    GUNICORN_TIMEOUT      seconds before a stuck worker is restarted (default 30)
+    GUNICORN_MAX_REQUESTS recycle workers after this many requests (default 2000, 0 disables)
+    TRUSTED_PROXY_COUNT   reverse proxies in front that set X-Forwarded-For (default 0: use the peer address)
+"""
+import gc
+import multiprocessing
+import os
+
+# Job worker threads must start in the forked workers, not in the preloading master
+os.environ.setdefault('JOB_WORKERS_AUTOSTART', '0')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 20
+keepalive = 5
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    from app import warm_up
+    warm_up()
+    # Move everything loaded so far out of the GC's reach so collections in the workers
+    # do not touch (and thereby copy) the shared pages
+    gc.freeze()
+    server.log.info(f'Warm state loaded; forking {workers} worker(s) x {threads} thread(s)')
+
+
+def post_fork(server, worker):
+    from app import init_worker
+    init_worker()
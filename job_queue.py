@@ -0,0 +1,362 @@
+"""
+Durable background jobs for slow admin side effects (storage uploads and deletes,
+link rewrites, bio syncs, delete cascades).
+
+Jobs live in a local SQLite file so they survive restarts and are shared by every
+worker process on the host:
+
+    create table jobs (
+        id integer primary key,
+        kind text not null,            -- handler name, e.g. 'storage.delete'
+        payload text not null,         -- JSON
+        status text not null,          -- 'queued' | 'running' | 'done' | 'failed' | 'superseded'
+        key text,                      -- entity the job writes, e.g. 'event:5:links'
+        attempts integer not null,
+        max_attempts integer not null,
+        run_after real not null,       -- unix time; retries back off exponentially
+        locked_until real,             -- lease held by the worker running it
+        last_error text,
+        result text,                   -- JSON returned by the handler
+        created_at real not null,
+        updated_at real not null
+    );
+
+Handlers are registered with @task('kind') and run on in-process worker threads
+(JOB_WORKERS, default 2). A job whose worker died is picked up again once its lease
+expires. With JOB_WORKERS=0 nothing runs in the background and the queue is drained
+by run_pending(), e.g. from POST /api/admin/jobs/run.
+
+The file is local to the host, so on serverless platforms (Vercel) a queued job would
+be lost with the instance that queued it, and no other instance could see it. Set
+JOB_MODE=inline there: enqueue() then runs the job once on the calling thread before
+returning, and a failure is final and reported to the caller instead of retried later.
+
+Jobs enqueued with the same `key` write the same entity and must apply in order: a new
+job supersedes any still queued with that key (its payload is the newer state), and it is
+not claimed while an older job with the key is running.
+Files listed under payload['spooled'] are removed once the job finishes or gives up.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+
+QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(tempfile.gettempdir(), 'dc-jobs', 'jobs.sqlite3'))
+SPOOL_DIR = os.path.join(os.path.dirname(QUEUE_PATH), 'spool')
+WORKER_COUNT = int(os.getenv('JOB_WORKERS', '2'))
+# 'threads' (background workers, see WORKER_COUNT) or 'inline' (run inside enqueue, for serverless)
+MODE = os.getenv('JOB_MODE', 'threads')
+LEASE_SECONDS = 300
+MAX_BACKOFF_SECONDS = 600
+POLL_SECONDS = 2.0
+KEEP_FINISHED_SECONDS = 7 * 24 * 3600
+
+HANDLERS = {}
+
+os.makedirs(SPOOL_DIR, exist_ok=True)
+
+_wakeup = threading.Event()
+_workers_lock = threading.Lock()
+_workers_pid = None
+_initialized = False
+
+
+def task(kind):
+    """Register a job handler: a function taking the payload dict and returning a JSON-able result."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(QUEUE_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if not _initialized:
+        conn.execute('pragma journal_mode=wal')
+        conn.execute("""
+            create table if not exists jobs (
+                id integer primary key,
+                kind text not null,
+                payload text not null,
+                status text not null,
+                attempts integer not null default 0,
+                max_attempts integer not null,
+                run_after real not null,
+                locked_until real,
+                last_error text,
+                result text,
+                created_at real not null,
+                updated_at real not null
+            )
+        """)
+        columns = {row['name'] for row in conn.execute('pragma table_info(jobs)')}
+        if 'key' not in columns:
+            conn.execute('alter table jobs add column key text')
+        conn.execute('create index if not exists jobs_ready on jobs (status, run_after)')
+        conn.execute('create index if not exists jobs_key on jobs (key, status)')
+        _initialized = True
+    return conn
+
+
+def _serialize(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    job.pop('locked_until', None)
+    return job
+
+
+def spool(data, suffix=''):
+    """Write request bytes to the spool directory so a job can process them later; returns the path."""
+    path = os.path.join(SPOOL_DIR, f'{uuid.uuid4().hex}{suffix}')
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def enqueue(kind, payload, max_attempts=5, delay=0, key=None):
+    """
+    Persist a job and wake a worker (or, with JOB_MODE=inline, run it now). Returns the job id.
+    Queued jobs with the same `key` are superseded by this one.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    now = time.time()
+    superseded = []
+    conn = _connect()
+    try:
+        conn.execute('begin immediate')
+        cursor = conn.execute(
+            'insert into jobs (kind, payload, status, key, attempts, max_attempts, run_after, created_at, updated_at) '
+            "values (?, ?, 'queued', ?, 0, ?, ?, ?, ?)",
+            (kind, json.dumps(payload), key, max_attempts, now + delay, now, now)
+        )
+        job_id = cursor.lastrowid
+        if key is not None:
+            superseded = conn.execute(
+                "select payload from jobs where key = ? and status = 'queued' and id < ?", (key, job_id)
+            ).fetchall()
+            conn.execute(
+                "update jobs set status = 'superseded', result = ?, updated_at = ? "
+                "where key = ? and status = 'queued' and id < ?",
+                (json.dumps({'superseded_by': job_id}), now, key, job_id)
+            )
+        conn.execute('commit')
+    except Exception:
+        conn.execute('rollback')
+        raise
+    finally:
+        conn.close()
+    for row in superseded:
+        _remove_spooled(json.loads(row['payload']))
+
+    if MODE == 'inline' and not delay:
+        job = _claim(job_id)
+        if job is not None:
+            run_job(job, final=True)
+        return job_id
+    ensure_workers()
+    _wakeup.set()
+    return job_id
+
+
+def get_job(job_id):
+    conn = _connect()
+    try:
+        return _serialize(conn.execute('select * from jobs where id = ?', (job_id,)).fetchone())
+    finally:
+        conn.close()
+
+
+def list_jobs(status=None, limit=50):
+    conn = _connect()
+    try:
+        if status:
+            rows = conn.execute('select * from jobs where status = ? order by id desc limit ?', (status, limit))
+        else:
+            rows = conn.execute('select * from jobs order by id desc limit ?', (limit,))
+        return [_serialize(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def summaries(job_ids):
+    """Id, kind, status and last error of each job, in the given order (None for unknown ids)."""
+    jobs = [get_job(job_id) for job_id in job_ids]
+    return [
+        {k: job[k] for k in ('id', 'kind', 'status', 'last_error')} if job else None
+        for job in jobs
+    ]
+
+
+def counts():
+    conn = _connect()
+    try:
+        return {row['status']: row['n'] for row in conn.execute('select status, count(*) as n from jobs group by status')}
+    finally:
+        conn.close()
+
+
+def retry(job_id):
+    """
+    Requeue a failed job with a fresh set of attempts (with JOB_MODE=inline, run it now).
+    A job with a newer job for the same key is not retried, as that would undo the newer write.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "update jobs set status = 'queued', attempts = 0, run_after = ?, updated_at = ? "
+            "where id = ? and status = 'failed' and (key is null or not exists "
+            "(select 1 from jobs newer where newer.key = jobs.key and newer.id > jobs.id))",
+            (now, now, job_id)
+        )
+        updated = cursor.rowcount > 0
+    finally:
+        conn.close()
+    if updated and MODE == 'inline':
+        job = _claim(job_id)
+        if job is not None:
+            run_job(job, final=True)
+    elif updated:
+        _wakeup.set()
+    return updated
+
+
+def _claim(job_id=None):
+    """
+    Atomically take the oldest runnable job (or one whose lease expired), or None. Jobs wait
+    while an older job with the same key holds a lease. `job_id` restricts the claim to one job.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute('begin immediate')
+        row = conn.execute(
+            "select * from jobs where ((status = 'queued' and run_after <= ?) "
+            "or (status = 'running' and locked_until < ?)) and (? is null or id = ?) "
+            "and (key is null or not exists (select 1 from jobs older where older.key = jobs.key "
+            "and older.id < jobs.id and older.status = 'running' and older.locked_until >= ?)) "
+            "order by id limit 1",
+            (now, now, job_id, job_id, now)
+        ).fetchone()
+        if row is None:
+            conn.execute('commit')
+            return None
+        conn.execute(
+            "update jobs set status = 'running', attempts = attempts + 1, locked_until = ?, updated_at = ? where id = ?",
+            (now + LEASE_SECONDS, now, row['id'])
+        )
+        conn.execute('commit')
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+    except Exception:
+        conn.execute('rollback')
+        raise
+    finally:
+        conn.close()
+
+
+def _finish(job, status, result=None, error=None, run_after=None):
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            'update jobs set status = ?, result = ?, last_error = ?, run_after = coalesce(?, run_after), '
+            'locked_until = null, updated_at = ? where id = ?',
+            (status, json.dumps(result) if result is not None else None, error, run_after, now, job['id'])
+        )
+    finally:
+        conn.close()
+
+
+def _remove_spooled(payload):
+    for path in payload.get('spooled', []):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def run_job(job, final=False):
+    """Run a claimed job; a failure is retried with backoff unless attempts are used up or `final`."""
+    payload = json.loads(job['payload'])
+    handler = HANDLERS.get(job['kind'])
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {job['kind']}")
+        result = handler(payload)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        print(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {error}")
+        traceback.print_exc()
+        if final or job['attempts'] >= job['max_attempts']:
+            _finish(job, 'failed', error=error)
+            _remove_spooled(payload)
+        else:
+            backoff = min(2 ** job['attempts'], MAX_BACKOFF_SECONDS)
+            _finish(job, 'queued', error=error, run_after=time.time() + backoff)
+        return False
+    _finish(job, 'done', result=result)
+    _remove_spooled(payload)
+    return True
+
+
+def run_pending(max_jobs=20, max_seconds=20.0):
+    """Run ready jobs on the calling thread; returns how many were processed."""
+    deadline = time.monotonic() + max_seconds
+    processed = 0
+    while processed < max_jobs and time.monotonic() < deadline:
+        job = _claim()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def purge_finished():
+    """Forget finished jobs older than KEEP_FINISHED_SECONDS."""
+    conn = _connect()
+    try:
+        conn.execute("delete from jobs where status in ('done', 'failed', 'superseded') and updated_at < ?",
+                     (time.time() - KEEP_FINISHED_SECONDS,))
+    finally:
+        conn.close()
+
+
+def _worker_loop():
+    while True:
+        try:
+            job = _claim()
+        except sqlite3.Error as e:
+            print(f'Job queue error: {e}')
+            job = None
+        if job is None:
+            _wakeup.wait(POLL_SECONDS)
+            _wakeup.clear()
+            continue
+        run_job(job)
+
+
+def ensure_workers():
+    """Start this process's worker threads once (again after a fork, since threads do not survive it)."""
+    global _workers_pid
+    if WORKER_COUNT <= 0 or MODE == 'inline' or _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers_pid = os.getpid()
+        purge_finished()
+        for index in range(WORKER_COUNT):
+            threading.Thread(target=_worker_loop, name=f'job-worker-{index}', daemon=True).start()
@@ -0,0 +1,269 @@
+"""
+Concurrent load test for app.py against a local Supabase simulator.
+
+Starts supabase_sim.py, launches the app under gunicorn with the requested worker and
+thread counts (or targets an already running server with --target), replays weighted
+visitor journeys plus occasional admin writes, and reports requests/sec, p50/p95/p99
+per route and the upstream calls the simulator received. Requires gunicorn
+(`pip install gunicorn`) unless --target is given.
+
+Each virtual user sends its own X-Forwarded-For address, which the app trusts because it
+is started with TRUSTED_PROXY_COUNT=1. The public per-IP limit and the per-process upstream
+cap default to values high enough that they do not shape the run; pass the production
+values (--public-rate-limit 10 --upstream-max-rps 50) to measure the limiters instead,
+with a smaller --public-rate-burst for runs too short to spend the default burst of 60.
+Rate-limited (429) and overloaded (503) responses are counted in their own columns, apart
+from successes and other errors.
+
+    python loadtest.py --workers 4 --threads 8 --users 32 --duration 30
+    python loadtest.py --target http://127.0.0.1:5000 --users 16
+"""
+import argparse
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+from werkzeug.security import generate_password_hash
+
+import supabase_sim
+
+ADMIN_PASSWORD = 'loadtest-password'
+
+# Journey name -> weight. Each journey is a list of (route label, method, path template).
+JOURNEYS = {
+    'home': (50, [
+        ('GET /', 'GET', '/'),
+        ('GET /api/events', 'GET', '/api/events?limit=6'),
+    ]),
+    'browse_profile': (35, [
+        ('GET /characters', 'GET', '/characters'),
+        ('GET /api/characters', 'GET', '/api/characters'),
+        ('GET /profile/<id>', 'GET', '/profile/{cid}'),
+        ('GET /api/characters/<id>', 'GET', '/api/characters/{cid}'),
+        ('GET /api/characters/<id>/timeline', 'GET', '/api/characters/{cid}/timeline'),
+        ('GET /api/characters/<id>/relationships', 'GET', '/api/characters/{cid}/relationships'),
+        ('GET /api/characters/<id>/love-interests', 'GET', '/api/characters/{cid}/love-interests'),
+        ('GET /api/characters/<id>/gallery', 'GET', '/api/characters/{cid}/gallery'),
+    ]),
+    'event_detail': (10, [
+        ('GET /api/events/<id>', 'GET', '/api/events/{eid}'),
+    ]),
+    'compare_timelines': (3, [
+        ('GET /api/timelines', 'GET', '/api/timelines?ids={cid},{cid2}&from=2023-01-01&to=2023-12-31'),
+    ]),
+    'admin_write': (2, [
+        ('PUT /api/admin/characters/<id>', 'PUT', '/api/admin/characters/{cid}'),
+        ('PUT /api/admin/events/<id>', 'PUT', '/api/admin/events/{eid}'),
+    ]),
+}
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        # label -> outcome ('429', '503' or 'err') -> count; anything else below 400 succeeded
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label, seconds, status):
+        """`status` is the HTTP status code, or None when the request itself failed."""
+        with self.lock:
+            self.latencies[label].append(seconds)
+            if status in (429, 503):
+                self.outcomes[label][str(status)] += 1
+            elif status is None or status >= 400:
+                self.outcomes[label]['err'] += 1
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def login(client):
+    response = client.post('/api/login', json={'username': 'admin', 'password': ADMIN_PASSWORD})
+    if response.status_code == 200:
+        return response.json()['access_token']
+    return None
+
+
+def virtual_user(index, base_url, stats, deadline, characters, events, rng):
+    names = list(JOURNEYS)
+    weights = [JOURNEYS[n][0] for n in names]
+    token = None
+    # A distinct client address per user so per-IP limits behave as they would for real visitors
+    client_headers = {'X-Forwarded-For': f'10.{index // 250}.{index % 250}.1'}
+
+    with httpx.Client(base_url=base_url, timeout=30.0, headers=client_headers) as client:
+        while time.monotonic() < deadline:
+            journey = rng.choices(names, weights)[0]
+            cid, cid2 = rng.sample(range(1, characters + 1), 2)
+            eid = rng.randint(1, events)
+
+            if journey == 'admin_write' and token is None:
+                start = time.perf_counter()
+                token = login(client)
+                stats.record('POST /api/login', time.perf_counter() - start, 200 if token else None)
+                if token is None:
+                    continue
+
+            for label, method, template in JOURNEYS[journey][1]:
+                path = template.format(cid=cid, cid2=cid2, eid=eid)
+                headers = {'Authorization': f'Bearer {token}'} if method != 'GET' else None
+                data = {'quote': f'Updated at {time.time()}'} if 'characters' in path else {'summary': 'Updated', 'character_ids': str(cid)}
+                start = time.perf_counter()
+                try:
+                    if method == 'GET':
+                        response = client.get(path)
+                    else:
+                        response = client.request(method, path, data=data, headers=headers)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = None
+                stats.record(label, time.perf_counter() - start, status)
+                if time.monotonic() >= deadline:
+                    break
+
+
+def wait_until_ready(base_url, timeout=30):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            if httpx.get(f'{base_url}/about', timeout=2).status_code < 500:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+def start_app(port, workers, threads, sim_url, public_rate_limit, public_rate_burst, upstream_max_rps):
+    env = dict(os.environ)
+    env.update({
+        'SUPABASE_URL': sim_url,
+        'SUPABASE_KEY': 'loadtest-key',
+        'ADMIN_USERNAME': 'admin',
+        'ADMIN_PASSWORD': generate_password_hash(ADMIN_PASSWORD),
+        'CDN_CACHE_DISABLED': '1',
+        'JWT_SECRET': 'loadtest-jwt-secret-long-enough-for-hs256',
+        # The virtual users' X-Forwarded-For addresses are their client addresses
+        'TRUSTED_PROXY_COUNT': '1',
+        'PUBLIC_RATE_LIMIT': str(public_rate_limit),
+        'PUBLIC_RATE_BURST': str(public_rate_burst),
+        'UPSTREAM_MAX_RPS': str(upstream_max_rps),
+    })
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--log-level', 'warning',
+    ]
+    return subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL)
+
+
+def report(stats, elapsed, upstream):
+    total = sum(len(v) for v in stats.latencies.values())
+    print(f"\n{total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s\n")
+    print(f"{'route':<44}{'count':>7}{'ok':>7}{'429':>6}{'503':>6}{'err':>6}{'req/s':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label in sorted(stats.latencies):
+        values = sorted(stats.latencies[label])
+        outcomes = stats.outcomes[label]
+        ok = len(values) - sum(outcomes.values())
+        print(f"{label:<44}{len(values):>7}{ok:>7}{outcomes['429']:>6}{outcomes['503']:>6}{outcomes['err']:>6}"
+              f"{len(values) / elapsed:>8.1f}{percentile(values, 50) * 1000:>9.1f}"
+              f"{percentile(values, 95) * 1000:>9.1f}{percentile(values, 99) * 1000:>9.1f}")
+    rejected = sum(o['429'] + o['503'] for o in stats.outcomes.values())
+    if rejected:
+        print(f"\n{rejected} of {total} requests were rate limited or shed (429/503); "
+              f"throughput above counts them, the ok column does not")
+
+    if upstream:
+        calls = upstream.get('calls', {})
+        print(f"\nUpstream calls: {upstream.get('total', 0)} ({upstream.get('total', 0) / max(total, 1):.2f} per request)")
+        for key in sorted(calls, key=calls.get, reverse=True):
+            print(f"  {key:<40}{calls[key]:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', help='Base URL of an already running app (skips starting gunicorn)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--users', type=int, default=16, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run')
+    parser.add_argument('--sim-port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Mean injected upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of upstream calls that fail')
+    parser.add_argument('--characters', type=int, default=120)
+    parser.add_argument('--events', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--public-rate-limit', type=float, default=1000.0,
+                        help='PUBLIC_RATE_LIMIT for the started app, requests/sec per client IP (production: 10)')
+    parser.add_argument('--public-rate-burst', type=float, default=60.0,
+                        help='PUBLIC_RATE_BURST for the started app, requests per client IP allowed at once')
+    parser.add_argument('--upstream-max-rps', type=float, default=1000.0,
+                        help='UPSTREAM_MAX_RPS for the started app, upstream calls/sec per process (production: 50)')
+    args = parser.parse_args()
+
+    sim = supabase_sim.start(args.sim_port, args.latency_ms, args.jitter_ms, args.error_rate,
+                             args.characters, args.events)
+    sim_url = f'http://127.0.0.1:{args.sim_port}'
+
+    app_process = None
+    base_url = args.target
+    if not base_url:
+        base_url = f'http://127.0.0.1:{args.port}'
+        app_process = start_app(args.port, args.workers, args.threads, sim_url,
+                                args.public_rate_limit, args.public_rate_burst, args.upstream_max_rps)
+
+    try:
+        if not wait_until_ready(base_url):
+            print(f"App at {base_url} did not become ready (is gunicorn installed?)")
+            return 1
+        httpx.post(f'{sim_url}/__reset')
+
+        stats = Stats()
+        deadline = time.monotonic() + args.duration
+        master = random.Random(args.seed)
+        users = [
+            threading.Thread(target=virtual_user, daemon=True, args=(
+                index, base_url, stats, deadline, args.characters, args.events, random.Random(master.random())))
+            for index in range(args.users)
+        ]
+        started = time.monotonic()
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - started
+
+        upstream = httpx.get(f'{sim_url}/__stats').json()
+        label = 'external target' if args.target else (
+            f'{args.workers} workers x {args.threads} threads, public limit {args.public_rate_limit:g}/s per IP, '
+            f'upstream cap {args.upstream_max_rps:g}/s per process')
+        print(f"Load test: {args.users} users, {label}, upstream latency {args.latency_ms}±{args.jitter_ms} ms, "
+              f"error rate {args.error_rate}")
+        report(stats, elapsed, upstream)
+        return 0
+    finally:
+        if app_process:
+            app_process.send_signal(signal.SIGTERM)
+            app_process.wait(timeout=10)
+        sim.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Admission control for /api/login.
+
+Password verification (pbkdf2, 600k iterations) costs hundreds of milliseconds of CPU,
+so attempts are filtered cheaply before any hashing happens: per-IP and per-username
+token buckets, a short-lived cache of recently failed credentials, and a bounded number
+of concurrent verifications per worker.
+"""
+import hashlib
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from rate_limit import BucketRegistry
+
+MAX_CONCURRENT_VERIFICATIONS = int(os.getenv('LOGIN_MAX_CONCURRENT', max(1, (os.cpu_count() or 2) // 2)))
+VERIFY_QUEUE_TIMEOUT = float(os.getenv('LOGIN_QUEUE_TIMEOUT', '2'))
+FAILURE_CACHE_TTL = float(os.getenv('LOGIN_FAILURE_TTL', '300'))
+FAILURE_CACHE_SIZE = 5000
+
+
+class LoginGuard:
+    def __init__(self):
+        # 5 attempts burst, then one every 12s per IP; 10 burst, one every 6s per username.
+        self.ip_buckets = BucketRegistry(rate=1 / 12, capacity=5)
+        self.username_buckets = BucketRegistry(rate=1 / 6, capacity=10)
+        self.semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_VERIFICATIONS)
+        self.salt = secrets.token_bytes(16)
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.metrics = {
+            'attempts': 0,
+            'verifications': 0,
+            'hash_seconds_total': 0.0,
+            'hash_seconds_max': 0.0,
+            'rejected_rate_limited': 0,
+            'rejected_cached_failure': 0,
+            'rejected_busy': 0,
+            'in_flight': 0,
+        }
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.metrics[name] += amount
+
+    def _fingerprint(self, username, password):
+        # Never keep raw credentials around; a per-process salt keeps the cache useless if dumped.
+        return hashlib.sha256(self.salt + f'{username}\0{password}'.encode('utf-8')).hexdigest()
+
+    def check_rate(self, ip, username):
+        """Returns seconds to wait if the IP or username is over its budget, else 0."""
+        self._count('attempts')
+        retry_after = max(self.ip_buckets.consume(ip), self.username_buckets.consume(username or ''))
+        if retry_after:
+            self._count('rejected_rate_limited')
+        return retry_after
+
+    def is_known_failure(self, username, password):
+        key = self._fingerprint(username, password)
+        with self.lock:
+            expires = self.failures.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self.failures[key]
+                return False
+            self.metrics['rejected_cached_failure'] += 1
+            return True
+
+    def record_failure(self, username, password):
+        key = self._fingerprint(username, password)
+        with self.lock:
+            if len(self.failures) >= FAILURE_CACHE_SIZE:
+                now = time.monotonic()
+                self.failures = {k: v for k, v in self.failures.items() if v >= now}
+                if len(self.failures) >= FAILURE_CACHE_SIZE:
+                    self.failures.pop(next(iter(self.failures)))
+            self.failures[key] = time.monotonic() + FAILURE_CACHE_TTL
+
+    @contextmanager
+    def verification_slot(self):
+        """Yields True while holding one of the bounded verification slots, False if none freed up in time."""
+        if not self.semaphore.acquire(timeout=VERIFY_QUEUE_TIMEOUT):
+            self._count('rejected_busy')
+            yield False
+            return
+        self._count('in_flight')
+        try:
+            yield True
+        finally:
+            self._count('in_flight', -1)
+            self.semaphore.release()
+
+    def verify(self, check, *args):
+        """Run a password check function and record how long it spent hashing."""
+        start = time.perf_counter()
+        try:
+            return check(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.metrics['verifications'] += 1
+                self.metrics['hash_seconds_total'] += elapsed
+                self.metrics['hash_seconds_max'] = max(self.metrics['hash_seconds_max'], elapsed)
+
+    def snapshot(self):
+        with self.lock:
+            data = dict(self.metrics)
+            data['failure_cache_size'] = len(self.failures)
+        data['max_concurrent'] = MAX_CONCURRENT_VERIFICATIONS
+        if data['verifications']:
+            data['hash_seconds_avg'] = data['hash_seconds_total'] / data['verifications']
+        return data
+
+
+login_guard = LoginGuard()
@@ -0,0 +1,181 @@
+"""
+Token-bucket rate limits: a per-client budget for public API routes and a cap on
+upstream (Supabase) calls.
+
+All buckets live in this process's memory. Every worker process and every serverless
+instance enforces its own copy, so with W workers on each of I instances a client can
+spend up to W x I times PUBLIC_RATE, and the upstream cap multiplies the same way; size
+both settings for that. Clients are keyed by client_ip(), which only honours
+X-Forwarded-For behind a configured proxy (TRUSTED_PROXY_COUNT).
+"""
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Number of reverse proxies in front of the app that append to X-Forwarded-For (Vercel: 1).
+# 0 means requests arrive directly and the header, which any client can set, is ignored.
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+# Per-client budget for public API routes, in tokens/second and burst size. A route is
+# charged the upstream calls it actually makes (see rate_limited).
+PUBLIC_RATE = float(os.getenv('PUBLIC_RATE_LIMIT', '10'))
+PUBLIC_BURST = float(os.getenv('PUBLIC_RATE_BURST', '60'))
+# Ceiling on Supabase REST calls per second from this process (0 disables). It is per
+# process, so divide the project-wide quota by the number of workers and instances.
+UPSTREAM_MAX_RPS = float(os.getenv('UPSTREAM_MAX_RPS', '50'))
+
+
+def init_app(app):
+    """Resolve client addresses through the configured number of trusted proxies (TRUSTED_PROXY_COUNT)."""
+    count = app.config.get('TRUSTED_PROXY_COUNT', TRUSTED_PROXY_COUNT)
+    if count > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=count)
+
+
+def client_ip():
+    """Client address of the current request; X-Forwarded-For only counts once init_app trusted a proxy."""
+    from flask import request
+
+    return request.remote_addr or 'unknown'
+
+
+class TokenBucket:
+    """Thread-safe token bucket holding up to `capacity` tokens, refilled at `rate` tokens/second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, cost=1):
+        """Take `cost` tokens. Returns 0 on success, otherwise the seconds until they would be available."""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return 0
+            if self.rate <= 0:
+                return float('inf')
+            return (cost - self.tokens) / self.rate
+
+    def charge(self, cost):
+        """Take `cost` tokens after the fact, going into debt (down to -capacity) if need be."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = max(self.tokens - cost, -self.capacity)
+
+
+class BucketRegistry:
+    """One TokenBucket per key (client IP, username, ...), keeping at most `max_keys` recent keys."""
+
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self.buckets[key] = bucket
+                if len(self.buckets) > self.max_keys:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+            return bucket
+
+    def consume(self, key, cost=1):
+        return self.get(key).consume(cost)
+
+
+public_buckets = BucketRegistry(rate=PUBLIC_RATE, capacity=PUBLIC_BURST)
+
+# Upstream calls made so far by the current request, counted by UpstreamLimiter.acquire
+_upstream_calls = contextvars.ContextVar('upstream_calls', default=None)
+
+
+def rate_limited(cost=1):
+    """
+    Charge each request `cost` tokens from its client's bucket up front and answer 429 once
+    the bucket is empty. `cost` is the route's usual number of upstream calls; calls made
+    beyond it (e.g. a fan-out over a long list) are charged when the view returns.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import jsonify
+
+            if PUBLIC_RATE <= 0:
+                return view(*args, **kwargs)
+            key = client_ip()
+            retry_after = public_buckets.consume(key, cost)
+            if retry_after:
+                response = jsonify({'error': 'Too many requests, please slow down'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                response.headers['Cache-Control'] = 'no-store'
+                return response
+            calls = [0]
+            token = _upstream_calls.set(calls)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                _upstream_calls.reset(token)
+                if calls[0] > cost:
+                    public_buckets.get(key).charge(calls[0] - cost)
+        return wrapper
+    return decorator
+
+
+class UpstreamLimiter:
+    """Process-wide cap on upstream calls per second; callers queue briefly instead of bursting past it."""
+
+    def __init__(self, rate):
+        self.bucket = TokenBucket(rate, max(rate, 1)) if rate > 0 else None
+        self.lock = threading.Lock()
+        self.metrics = {'calls': 0, 'delayed': 0, 'delay_seconds_total': 0.0, 'rejected': 0}
+
+    def acquire(self, max_wait=None):
+        """Take a call slot, waiting up to `max_wait` seconds (None: as long as it takes). False if that is not enough."""
+        waited = 0.0
+        while self.bucket is not None:
+            wait = self.bucket.consume()
+            if not wait:
+                break
+            if max_wait is not None and waited + wait > max_wait:
+                with self.lock:
+                    self.metrics['rejected'] += 1
+                return False
+            time.sleep(wait)
+            waited += wait
+        calls = _upstream_calls.get()
+        if calls is not None:
+            calls[0] += 1
+        with self.lock:
+            self.metrics['calls'] += 1
+            if waited:
+                self.metrics['delayed'] += 1
+                self.metrics['delay_seconds_total'] += waited
+        return True
+
+    def snapshot(self):
+        with self.lock:
+            data = dict(self.metrics)
+        data['max_rps'] = UPSTREAM_MAX_RPS
+        return data
+
+
+upstream_limiter = UpstreamLimiter(UPSTREAM_MAX_RPS)
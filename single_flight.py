@@ -0,0 +1,70 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When several threads ask for the same key at once, only the first (the leader) runs
+the call; the rest wait for it and receive a copy of its result, so a traffic spike
+on one page turns N identical upstream reads into one.
+"""
+import copy
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.metrics = {'executed': 0, 'collapsed': 0, 'in_flight': 0, 'max_waiters': 0}
+
+    def do(self, key, func, timeout=None):
+        """
+        Run func() once per key among concurrent callers; every caller gets its own copy of the
+        result. A waiting caller gives up with TimeoutError after `timeout` seconds.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.metrics['executed'] += 1
+                self.metrics['in_flight'] += 1
+            else:
+                call.waiters += 1
+                self.metrics['collapsed'] += 1
+                self.metrics['max_waiters'] = max(self.metrics['max_waiters'], call.waiters)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f'Shared call for {key!r} still running after {timeout}s')
+            if call.error is not None:
+                raise call.error
+            # Callers decorate the rows they get back, so nobody may share the stored result
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # Once the key is gone no new waiters can join, so the count below is final
+            with self.lock:
+                del self.calls[key]
+                self.metrics['in_flight'] -= 1
+                shared = call.waiters > 0
+            call.done.set()
+        return copy.deepcopy(call.result) if shared else call.result
+
+    def snapshot(self):
+        with self.lock:
+            data = dict(self.metrics)
+        total = data['executed'] + data['collapsed']
+        data['collapse_ratio'] = data['collapsed'] / total if total else 0.0
+        return data
@@ -591,19 +591,12 @@ async function loadSection(section) {
     }
 }
 
-async function loadPendingEdits() {
-    const list = document.getElementById('pending-list');
-    if (!list) return;
-    list.innerHTML = '<div class="loading-state"><div class="spinner"></div></div>';
+let pendingCursor = null;
 
-    try {
-        const edits = await fetchAPI('/admin/pending-edits');
-        if (!edits || edits.length === 0) {
-            list.innerHTML = '<p class="empty-state">No pending edits</p>';
-            return;
-        }
-        list.innerHTML = edits.map(edit => `
+function renderPendingEdit(edit) {
+    return `
             <div class="admin-item">
+                <input type="checkbox" class="pending-select" value="${edit.id}" aria-label="Select edit ${edit.id}">
                 <div class="admin-item-info">
                     <h4>Edit for ${edit.table_name} #${edit.record_id}</h4>
                     <p><strong>Field:</strong> ${edit.field_name}</p>
@@ -615,20 +608,100 @@ async function loadPendingEdits() {
                     <button onclick="denyEdit(${edit.id})" class="btn-danger btn-sm">Deny</button>
                 </div>
             </div>
-        `).join('');
+        `;
+}
+
+async function setupPendingFilters() {
+    const filter = document.getElementById('pending-character-filter');
+    if (filter && !filter.dataset.ready) {
+        filter.dataset.ready = 'true';
+        filter.addEventListener('change', () => loadPendingEdits());
+        try {
+            const characters = await fetchAPI('/characters');
+            filter.insertAdjacentHTML('beforeend',
+                characters.map(c => `<option value="${c.id}">${c.full_name}</option>`).join(''));
+        } catch (e) { console.error('Failed to load characters for pending filter'); }
+    }
+
+    const selectAll = document.getElementById('pending-select-all');
+    if (selectAll && !selectAll.dataset.ready) {
+        selectAll.dataset.ready = 'true';
+        selectAll.addEventListener('change', () => {
+            document.querySelectorAll('.pending-select').forEach(cb => cb.checked = selectAll.checked);
+        });
+    }
+}
+
+async function loadPendingEdits(append = false) {
+    const list = document.getElementById('pending-list');
+    if (!list) return;
+    setupPendingFilters();
+
+    if (!append) {
+        pendingCursor = null;
+        list.innerHTML = '<div class="loading-state"><div class="spinner"></div></div>';
+        const selectAll = document.getElementById('pending-select-all');
+        if (selectAll) selectAll.checked = false;
+    }
+
+    const params = new URLSearchParams({ limit: 50 });
+    if (append && pendingCursor) params.set('cursor', pendingCursor);
+    const characterFilter = document.getElementById('pending-character-filter')?.value;
+    if (characterFilter) params.set('character_id', characterFilter);
+
+    try {
+        const { data: edits, headers } = await fetchAPI(`/admin/pending-edits?${params}`, { includeHeaders: true });
+        pendingCursor = headers.get('X-Next-Cursor');
+
+        const badge = document.getElementById('pending-count');
+        if (badge) badge.textContent = headers.get('X-Total-Count') || edits.length;
+
+        list.querySelector('.load-more-pending')?.remove();
+        if (!append && (!edits || edits.length === 0)) {
+            list.innerHTML = '<p class="empty-state">No pending edits</p>';
+            return;
+        }
+
+        const html = edits.map(renderPendingEdit).join('');
+        if (append) {
+            list.insertAdjacentHTML('beforeend', html);
+        } else {
+            list.innerHTML = html;
+        }
+        if (pendingCursor) {
+            list.insertAdjacentHTML('beforeend',
+                '<button class="btn-secondary btn-sm load-more-pending" onclick="loadPendingEdits(true)">Load more</button>');
+        }
     } catch (error) {
         console.error('Error loading pending edits:', error);
         list.innerHTML = '<p class="error-state">Failed to load pending edits</p>';
     }
 }
 
+async function moderateSelectedEdits(action) {
+    const ids = Array.from(document.querySelectorAll('.pending-select:checked')).map(cb => Number(cb.value));
+    if (ids.length === 0) {
+        showNotification('Select at least one edit', 'info');
+        return;
+    }
+    try {
+        const result = await fetchAPI('/admin/pending-edits/bulk', { method: 'POST', body: { ids, action } });
+        const verb = action === 'approve' ? 'approved' : 'denied';
+        showNotification(`${result.updated.length} edit(s) ${verb}`, 'success');
+        loadPendingEdits();
+    } catch (error) {
+        showNotification(`Failed to ${action} edits: ` + error.message, 'error');
+    }
+}
+
 async function loadCharactersAdmin() {
     const list = document.getElementById('characters-list');
     if (!list) return;
     list.innerHTML = '<div class="loading-state"><div class="spinner"></div></div>';
 
     try {
-        const characters = await fetchAPI('/characters');
+        // Admin lists always read the server, never a response cached before the last write
+        const characters = await fetchAPI('/characters', { cache: false });
         if (!characters || characters.length === 0) {
             list.innerHTML = '<p class="empty-state">No characters yet</p>';
             return;
@@ -658,7 +731,7 @@ async function loadTimelineAdmin() {
     list.innerHTML = '<div class="loading-state"><div class="spinner"></div></div>';
 
     try {
-        const events = await fetchAPI('/events?limit=50'); 
+        const events = await fetchAPI('/events?limit=50', { cache: false });
 
         if (!events || events.length === 0) {
             list.innerHTML = '<p class="empty-state">No events yet</p>';
@@ -842,6 +915,45 @@ async function loadGalleryAdmin() {
     }
 }
 
+const JOB_POLL_INTERVAL = 1000;
+const JOB_POLL_TIMEOUT = 60000;
+
+// Poll background jobs started by an admin write until they finish. Resolves true when all succeeded.
+// `jobs` are the {id, kind, status, last_error} summaries from the write's response; jobs that
+// already finished there (JOB_MODE=inline runs them during the request) are not polled.
+// `endpoint` is the admin write: its cached public responses are invalidated again once the
+// jobs settle, since anything fetched while they ran may predate their changes.
+async function waitForJobs(jobs, endpoint) {
+    if (!jobs || jobs.length === 0) return true;
+    const pending = new Set();
+    const deadline = Date.now() + JOB_POLL_TIMEOUT;
+    let ok = true;
+
+    const settle = job => {
+        if (!job) return;
+        if (job.status === 'done' || job.status === 'failed' || job.status === 'superseded') pending.delete(job.id);
+        if (job.status === 'failed') {
+            ok = false;
+            showNotification(`Background task failed: ${job.last_error || job.kind}`, 'error');
+        }
+    };
+    jobs.forEach(job => {
+        if (job) pending.add(job.id);
+        settle(job);
+    });
+
+    while (pending.size > 0 && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+        const polled = await Promise.all([...pending].map(id => fetchAPI(`/admin/jobs/${id}`, { cache: false })));
+        polled.forEach(settle);
+    }
+    if (endpoint) invalidateForMutation(endpoint);
+    if (pending.size > 0) {
+        showNotification('Still finishing in the background; refresh in a moment to see every change.', 'info');
+    }
+    return ok && pending.size === 0;
+}
+
 async function deleteGalleryImage(id) {
     if (!confirm('Are you sure you want to delete this image? This cannot be undone.')) {
         return;
@@ -861,7 +973,7 @@ async function deleteGalleryImage(id) {
 
 async function editCharacter(id) {
     try {
-        const character = await fetchAPI(`/characters/${id}`);
+        const character = await fetchAPI(`/characters/${id}`, { cache: false });
         const form = document.getElementById('character-form');
         form.querySelector('input[name="id"]')?.remove();
         form.insertAdjacentHTML('beforeend', `<input type="hidden" name="id" value="${id}">`);
@@ -886,7 +998,8 @@ async function editCharacter(id) {
 async function deleteCharacter(id) {
     if (confirm('Are you sure you want to delete this character? This is permanent.')) {
         try {
-            await fetchAPI(`/admin/characters/${id}`, { method: 'DELETE' });
+            const result = await fetchAPI(`/admin/characters/${id}`, { method: 'DELETE' });
+            await waitForJobs(result.jobs, `/admin/characters/${id}`);
             showNotification('Character deleted successfully', 'success');
             loadCharactersAdmin();
         } catch (error) {
@@ -897,7 +1010,7 @@ async function deleteCharacter(id) {
 
 async function editEvent(id) {
     try {
-        const event = await fetchAPI(`/events/${id}`);
+        const event = await fetchAPI(`/events/${id}`, { cache: false });
         const form = document.getElementById('event-form');
         form.querySelector('input[name="id"]')?.remove();
         form.insertAdjacentHTML('beforeend', `<input type="hidden" name="id" value="${id}">`);
@@ -921,7 +1034,8 @@ async function editEvent(id) {
 async function deleteEvent(id) {
     if (confirm('Are you sure you want to delete this event? This is permanent.')) {
         try {
-            await fetchAPI(`/admin/events/${id}`, { method: 'DELETE' });
+            const result = await fetchAPI(`/admin/events/${id}`, { method: 'DELETE' });
+            await waitForJobs(result.jobs, `/admin/events/${id}`);
             showNotification('Event deleted successfully', 'success');
             loadTimelineAdmin();
         } catch (error) {
@@ -1094,7 +1208,7 @@ function setupCharacterForm() {
         const url = id ? `/admin/characters/${id}` : '/admin/characters';
         const method = id ? 'PUT' : 'POST';
         try {
-            await fetchAPI(url, {
+            const result = await fetchAPI(url, {
                 method,
                 body: formData,
                 isFormData: true
@@ -1102,6 +1216,7 @@ function setupCharacterForm() {
             showNotification(`Character ${id ? 'updated' : 'created'} successfully!`, 'success');
             closeCharacterForm();
             loadCharactersAdmin();
+            if (result.jobs?.length) waitForJobs(result.jobs, url).then(loadCharactersAdmin);
         } catch (error) {
             showNotification(error.message, 'error');
         }
@@ -1135,20 +1250,107 @@ async function setupEventForm() {
         const url = id ? `/admin/events/${id}` : '/admin/events';
         const method = id ? 'PUT' : 'POST';
         try {
-            await fetchAPI(url, {
+            // Large images go up in resumable chunks first and are referenced by upload id
+            const images = formData.getAll('event_images').filter(file => file instanceof File && file.name);
+            const largeImages = images.filter(file => file.size > RESUMABLE_UPLOAD_THRESHOLD);
+            if (largeImages.length > 0) {
+                formData.delete('event_images');
+                images.filter(file => !largeImages.includes(file)).forEach(file => formData.append('event_images', file));
+                const uploadIds = [];
+                for (const file of largeImages) {
+                    uploadIds.push(await uploadResumable(file));
+                }
+                formData.set('upload_ids', uploadIds.join(','));
+            }
+
+            const result = await fetchAPI(url, {
                 method,
                 body: formData,
                 isFormData: true
             });
+            largeImages.forEach(forgetResumableUpload);
             showNotification(`Event ${id ? 'updated' : 'created'} successfully!`, 'success');
             closeEventForm();
             loadTimelineAdmin();
+            if (result.jobs?.length) waitForJobs(result.jobs, url).then(loadTimelineAdmin);
         } catch (error) {
             showNotification(error.message, 'error');
         }
     });
 }
 
+// Files above this size go through the resumable chunked upload API
+const RESUMABLE_UPLOAD_THRESHOLD = 4 * 1024 * 1024;
+const UPLOAD_PARALLEL_CHUNKS = 4;
+const UPLOAD_CHUNK_RETRIES = 5;
+
+function uploadResumeKey(file) {
+    return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+// Reuse the session from an earlier, interrupted attempt at the same file if the server still has it
+async function openUploadSession(file) {
+    const key = uploadResumeKey(file);
+    const existingId = localStorage.getItem(key);
+    if (existingId) {
+        try {
+            return await fetchAPI(`/admin/uploads/${existingId}`, { cache: false });
+        } catch (error) {
+            localStorage.removeItem(key);
+        }
+    }
+    const session = await fetchAPI('/admin/uploads', {
+        method: 'POST',
+        body: { filename: file.name, size: file.size, content_type: file.type }
+    });
+    localStorage.setItem(key, session.id);
+    return session;
+}
+
+async function sendUploadChunk(session, file, index) {
+    const offset = index * session.chunk_size;
+    const chunk = file.slice(offset, Math.min(offset + session.chunk_size, file.size));
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await fetchAPI(`/admin/uploads/${session.id}`, {
+                method: 'PATCH',
+                body: chunk,
+                headers: { 'Upload-Offset': String(offset) }
+            });
+        } catch (error) {
+            if (attempt >= UPLOAD_CHUNK_RETRIES || error.message === 'Session expired') throw error;
+            await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+        }
+    }
+}
+
+// Upload a file in parallel chunks, skipping chunks the server already has. Resolves to the upload id;
+// if it fails, calling it again with the same file picks up where it stopped.
+async function uploadResumable(file, onProgress) {
+    const session = await openUploadSession(file);
+    const received = new Set(session.received);
+    const remaining = [];
+    for (let index = 0; index < session.chunks; index++) {
+        if (!received.has(index)) remaining.push(index);
+    }
+
+    let done = received.size;
+    onProgress?.(done / session.chunks);
+    const worker = async () => {
+        while (remaining.length > 0) {
+            await sendUploadChunk(session, file, remaining.shift());
+            done++;
+            onProgress?.(done / session.chunks);
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(UPLOAD_PARALLEL_CHUNKS, remaining.length) }, worker));
+    return session.id;
+}
+
+function forgetResumableUpload(file) {
+    localStorage.removeItem(uploadResumeKey(file));
+}
+
 async function setupUploadForm() {
     const form = document.getElementById('upload-form');
     if (!form) return;
@@ -1166,7 +1368,7 @@ async function setupUploadForm() {
     const eventSelect = form.querySelector('select[name="event_id"]');
     if (eventSelect) {
         try {
-            const events = await fetchAPI('/events?limit=100');
+            const events = await fetchAPI('/events?limit=100&fields=title');
             eventSelect.innerHTML = `<option value="">None (Character only)</option>` + 
                 events.map(e => `<option value="${e.id}">${e.title}</option>`).join('');
         } catch (e) {
@@ -1218,12 +1420,28 @@ async function setupUploadForm() {
 
         let successCount = 0;
         let errorCount = 0;
+        const submitButton = form.querySelector('button[type="submit"]');
+        const submitLabel = submitButton?.textContent;
 
         for (let i = 0; i < imageFiles.length; i++) {
             const file = imageFiles[i];
             const singleFormData = new FormData();
 
-            singleFormData.append('image', file);
+            try {
+                if (file.size > RESUMABLE_UPLOAD_THRESHOLD) {
+                    const uploadId = await uploadResumable(file, progress => {
+                        if (submitButton) submitButton.textContent = `Uploading ${i + 1}/${imageFiles.length}: ${Math.round(progress * 100)}%`;
+                    });
+                    singleFormData.append('upload_id', uploadId);
+                } else {
+                    singleFormData.append('image', file);
+                }
+            } catch (error) {
+                console.error(`Error uploading image ${i + 1}:`, error);
+                showNotification(`Image ${i + 1} failed: ${error.message}. Submit again to resume.`, 'error');
+                errorCount++;
+                continue;
+            }
             singleFormData.append('character_ids', selectedCharacterIds.join(','));
 
             if (imageFiles.length > 1) {
@@ -1244,24 +1462,15 @@ async function setupUploadForm() {
             });
 
             try {
-                const response = await fetch('/api/admin/gallery', {
+                // Through fetchAPI so the cached character galleries are invalidated
+                const result = await fetchAPI('/admin/gallery', {
                     method: 'POST',
-                    headers: {
-                        'Authorization': `Bearer ${localStorage.getItem('admin_token')}`
-                    },
-                    body: singleFormData
+                    body: singleFormData,
+                    isFormData: true
                 });
-
-                if (!response.ok) {
-                    const errorData = await response.json();
-                    console.error(`Failed to upload image ${i + 1}:`, errorData);
-                    showNotification(`Image ${i + 1} failed: ${errorData.error || 'Unknown error'}`, 'error');
-                    errorCount++;
-                } else {
-                    const result = await response.json();
-                    console.log(`Image ${i + 1} uploaded successfully:`, result);
-                    successCount++;
-                }
+                console.log(`Image ${i + 1} uploaded successfully:`, result);
+                forgetResumableUpload(file);
+                successCount++;
             } catch (error) {
                 console.error(`Error uploading image ${i + 1}:`, error);
                 showNotification(`Image ${i + 1} failed: ${error.message}`, 'error');
@@ -1269,6 +1478,8 @@ async function setupUploadForm() {
             }
         }
 
+        if (submitButton) submitButton.textContent = submitLabel;
+
         if (successCount > 0) {
             showNotification(`${successCount} image(s) uploaded successfully!`, 'success');
         }
@@ -5,7 +5,7 @@ async function loadCharacters() {
     if (!grid) return;
 
     try {
-        const characters = await fetchAPI('/characters');
+        const characters = await fetchAPI('/characters?fields=name,full_name,nickname,profile_image,family');
         allCharacters = characters || [];
 
         if (allCharacters.length === 0) {
@@ -1,15 +1,23 @@
-function renderGalleryImages(images, container) {
+function renderGalleryImages(images, container, append = false) {
     if (!images || !container) return;
 
-    container.innerHTML = images.map(img => `
+    const html = images.map(img => `
         <div class="gallery-item" onclick="openGalleryModal('${img.url}', '${img.caption || ''}')">
             <img src="${img.url}" alt="${img.caption || 'Gallery Image'}" loading="lazy" class="gallery-thumb">
             ${img.caption ? `<div class="gallery-caption-overlay">${img.caption}</div>` : ''}
         </div>
     `).join('');
 
+    // Only animate the items added by this call so later pages don't replay earlier ones
+    const firstNew = append ? container.children.length : 0;
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
+
     if (typeof gsap !== 'undefined') {
-        gsap.utils.toArray('.gallery-item').forEach((item, i) => {
+        Array.from(container.children).slice(firstNew).forEach((item, i) => {
             gsap.from(item, {
                 opacity: 0,
                 y: 20,
@@ -1,8 +1,8 @@
 // Global configuration
 const API_BASE = '/api';
 
-// Utility: Fetch wrapper
-async function fetchAPI(endpoint, options = {}) {
+// Network request to the API (no caching)
+async function requestAPI(endpoint, options = {}) {
     const token = localStorage.getItem('admin_token');
     const headers = {
         'Content-Type': 'application/json',
@@ -10,7 +10,9 @@ async function fetchAPI(endpoint, options = {}) {
         ...options.headers
     };
 
-    if (options.isFormData) {
+    // FormData and raw Blob bodies (upload chunks) are sent as-is with the browser's content type
+    const rawBody = options.isFormData || options.body instanceof Blob;
+    if (rawBody) {
         delete headers['Content-Type'];
     }
 
@@ -18,7 +20,7 @@ async function fetchAPI(endpoint, options = {}) {
         const response = await fetch(`${API_BASE}${endpoint}`, {
             ...options,
             headers,
-            body: options.isFormData ? options.body : (options.body ? JSON.stringify(options.body) : null)
+            body: rawBody ? options.body : (options.body ? JSON.stringify(options.body) : null)
         });
 
         if (response.status === 401) {
@@ -46,12 +48,14 @@ async function fetchAPI(endpoint, options = {}) {
 
         // Handle empty responses (like from a DELETE request)
         const contentType = response.headers.get("content-type");
+        let data = {}; // Empty object for non-json responses
         if (contentType && contentType.indexOf("application/json") !== -1) {
-            return await response.json();
-        } else {
-            return {}; // Return empty object for non-json responses
+            data = await response.json();
         }
 
+        // Callers that need pagination headers (e.g. X-Total-Count) ask for them explicitly
+        return options.includeHeaders ? { data, headers: response.headers } : data;
+
     } catch (error) {
         // Avoid showing a generic error if we've already handled the session expiration
         if (error.message !== 'Session expired') {
@@ -61,6 +65,192 @@ async function fetchAPI(endpoint, options = {}) {
     }
 }
 
+// Client-side response cache: GETs for public endpoints are served from memory/IndexedDB
+// (stale-while-revalidate), identical concurrent requests share one fetch, and successful
+// admin mutations invalidate the endpoints they affect.
+const API_CACHE_TTLS = [
+    { pattern: /^\/(eras|families|relationship-types|love-interest-categories)(\?|$)/, ttl: 60 * 60 * 1000 },
+    { pattern: /^\/characters(\?|$)/, ttl: 5 * 60 * 1000 },
+    { pattern: /^\/characters\/\d+/, ttl: 5 * 60 * 1000 },
+    { pattern: /^\/events/, ttl: 2 * 60 * 1000 }
+];
+const API_CACHE_MAX_STALE = 24 * 60 * 60 * 1000;
+// Stored responses kept at most (newest first); older and expired ones are swept after writes
+const API_CACHE_MAX_ENTRIES = 200;
+const API_CACHE_SWEEP_INTERVAL = 60 * 1000;
+
+// Admin endpoint prefix -> public endpoint prefixes whose cached responses it changes
+const API_CACHE_INVALIDATIONS = {
+    '/admin/characters': ['/characters', '/events'],
+    '/admin/events': ['/events', '/characters'],
+    '/admin/relationships': ['/characters'],
+    '/admin/love-interests': ['/characters'],
+    '/admin/gallery': ['/characters']
+};
+
+const apiMemoryCache = new Map();
+const apiInFlight = new Map();
+let apiCacheDB = null;
+let apiCacheSweptAt = 0;
+
+function apiCacheTTL(endpoint) {
+    const rule = API_CACHE_TTLS.find(r => r.pattern.test(endpoint));
+    return rule ? rule.ttl : 0;
+}
+
+function cloneData(data) {
+    if (typeof structuredClone === 'function') return structuredClone(data);
+    return JSON.parse(JSON.stringify(data));
+}
+
+function openAPICacheDB() {
+    if (apiCacheDB) return apiCacheDB;
+    apiCacheDB = new Promise(resolve => {
+        if (typeof indexedDB === 'undefined') return resolve(null);
+        try {
+            const request = indexedDB.open('periaphe-api-cache', 1);
+            request.onupgradeneeded = () => request.result.createObjectStore('responses');
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(null);
+        } catch (e) {
+            resolve(null);
+        }
+    });
+    return apiCacheDB;
+}
+
+async function idbRequest(mode, action) {
+    const db = await openAPICacheDB();
+    if (!db) return undefined;
+    return new Promise(resolve => {
+        try {
+            const store = db.transaction('responses', mode).objectStore('responses');
+            const request = action(store);
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(undefined);
+        } catch (e) {
+            resolve(undefined);
+        }
+    });
+}
+
+async function readAPICache(endpoint) {
+    if (apiMemoryCache.has(endpoint)) return apiMemoryCache.get(endpoint);
+    const entry = await idbRequest('readonly', store => store.get(endpoint));
+    if (entry) apiMemoryCache.set(endpoint, entry);
+    return entry;
+}
+
+function writeAPICache(endpoint, data) {
+    const entry = { data, storedAt: Date.now() };
+    apiMemoryCache.delete(endpoint);
+    apiMemoryCache.set(endpoint, entry);
+    // Maps iterate in insertion order, so the first key is the least recently written
+    while (apiMemoryCache.size > API_CACHE_MAX_ENTRIES) {
+        apiMemoryCache.delete(apiMemoryCache.keys().next().value);
+    }
+    idbRequest('readwrite', store => store.put(entry, endpoint));
+    if (entry.storedAt - apiCacheSweptAt > API_CACHE_SWEEP_INTERVAL) {
+        apiCacheSweptAt = entry.storedAt;
+        sweepAPICache();
+    }
+}
+
+// Delete stored responses too old to be served, and beyond API_CACHE_MAX_ENTRIES the oldest
+async function sweepAPICache() {
+    const db = await openAPICacheDB();
+    if (!db) return;
+    try {
+        const store = db.transaction('responses', 'readwrite').objectStore('responses');
+        const entries = [];
+        const request = store.openCursor();
+        request.onsuccess = () => {
+            const cursor = request.result;
+            if (cursor) {
+                entries.push({ key: cursor.key, storedAt: (cursor.value && cursor.value.storedAt) || 0 });
+                cursor.continue();
+                return;
+            }
+            const now = Date.now();
+            entries.sort((a, b) => b.storedAt - a.storedAt);
+            entries.forEach((entry, index) => {
+                if (index >= API_CACHE_MAX_ENTRIES || now - entry.storedAt >= API_CACHE_MAX_STALE) {
+                    store.delete(entry.key);
+                    apiMemoryCache.delete(entry.key);
+                }
+            });
+        };
+    } catch (e) {
+        // Eviction is best effort; a later write tries again
+    }
+}
+
+async function invalidateAPICache(prefix) {
+    for (const key of Array.from(apiMemoryCache.keys())) {
+        if (key.startsWith(prefix)) apiMemoryCache.delete(key);
+    }
+    // The service worker keeps its own copies of public API responses (sw.js)
+    if (typeof navigator !== 'undefined' && navigator.serviceWorker && navigator.serviceWorker.controller) {
+        navigator.serviceWorker.controller.postMessage({ type: 'invalidate-api', prefix });
+    }
+    const keys = await idbRequest('readonly', store => store.getAllKeys());
+    (keys || []).filter(key => key.startsWith(prefix)).forEach(key => {
+        idbRequest('readwrite', store => store.delete(key));
+    });
+}
+
+function invalidateForMutation(endpoint) {
+    Object.entries(API_CACHE_INVALIDATIONS).forEach(([adminPrefix, prefixes]) => {
+        if (endpoint.startsWith(adminPrefix)) prefixes.forEach(invalidateAPICache);
+    });
+}
+
+// Share one in-flight request between identical concurrent GETs
+function dedupeRequest(key, run) {
+    if (apiInFlight.has(key)) return apiInFlight.get(key);
+    const promise = run().finally(() => apiInFlight.delete(key));
+    apiInFlight.set(key, promise);
+    return promise;
+}
+
+function revalidateAPI(endpoint, options) {
+    return dedupeRequest(endpoint, async () => {
+        const data = await requestAPI(endpoint, options);
+        writeAPICache(endpoint, data);
+        return data;
+    });
+}
+
+// Utility: Fetch wrapper
+async function fetchAPI(endpoint, options = {}) {
+    const method = (options.method || 'GET').toUpperCase();
+
+    if (method !== 'GET') {
+        const result = await requestAPI(endpoint, options);
+        invalidateForMutation(endpoint);
+        return result;
+    }
+
+    // Header-reading callers (pagination) always go to the network
+    if (options.includeHeaders) return requestAPI(endpoint, options);
+
+    const ttl = apiCacheTTL(endpoint);
+    if (!ttl || options.cache === false) {
+        return cloneData(await dedupeRequest(endpoint, () => requestAPI(endpoint, options)));
+    }
+
+    const cached = await readAPICache(endpoint);
+    if (cached) {
+        const age = Date.now() - cached.storedAt;
+        if (age < ttl) return cloneData(cached.data);
+        if (age < API_CACHE_MAX_STALE) {
+            revalidateAPI(endpoint, options).catch(() => {});
+            return cloneData(cached.data);
+        }
+    }
+    return cloneData(await revalidateAPI(endpoint, options));
+}
+
 // Utility: Format date
 function formatDate(dateString) {
     const date = new Date(dateString);
@@ -271,10 +461,20 @@ document.addEventListener('DOMContentLoaded', () => {
     setupEraTooltips();
 });
 
+// Service worker: precached shell, offline pages and cached API data/images
+if (typeof navigator !== 'undefined' && 'serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/sw.js').catch(error => {
+            console.error('Service worker registration failed:', error);
+        });
+    });
+}
+
 // Export utilities for use in other files
 if (typeof module !== 'undefined' && module.exports) {
     module.exports = {
         fetchAPI,
+        invalidateAPICache,
         formatDate,
         debounce,
         showNotification,
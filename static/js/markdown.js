@@ -10,146 +10,325 @@ function escapeHtml(text) {
     return text.replace(/[&<>"']/g, m => map[m]);
 }
 
+// Block-level patterns, each tried against a single line
+const FENCE_OPEN = /^```([a-z]*)$/;
+const HEADING = /^ *(#{1,6})\s+(.+?)\s*#*$/;
+const RULE = /^(?:---|\*\*\*|___)\s*$/;
+const LIST_ITEM = /^( *)([-*]|\d+\.)\s+(.*)/;
+const QUOTE = /^> ./;
+
+// Characters that can start an inline token; the text between them is copied in one slice
+const INLINE_SPECIAL = /[`!\[*_~<\n]/g;
+
+// Schemes that run script when a link is followed or an image is loaded
+const UNSAFE_URL = /^(?:javascript|vbscript|data):/i;
+
 // Parses a Markdown string into an HTML string
 function parseMarkdown(markdown) {
     if (!markdown) return '';
 
-    // The processing order is crucial for correctness.
-    // 1. Escape HTML initially to prevent XSS.
-
-    let html = markdown;
+    // One pass over the lines finds the blocks, and the text of each block is tokenized
+    // once for inline formatting, so the cost stays linear in the length of the input.
+    // Text is escaped as it is copied; only markup generated here reaches the page as HTML.
+    return parseBlocks(markdown.replace(/\r\n?/g, '\n').split('\n'));
+}
 
-    // 2. Code blocks (```) - Process first to prevent their content from being parsed.
-    html = html.replace(/```([a-z]*)\n([\s\S]*?)```/g, (match, lang, code) => {
-        const escapedCode = escapeHtml(code);
-        const languageClass = lang ? `language-${lang}` : '';
-        return `<pre><code class="${languageClass}">${escapedCode.trim()}</code></pre>`;
-    });
+// Groups lines into code blocks, blockquotes, headers, rules, lists and paragraphs
+function parseBlocks(lines) {
+    const blocks = [];
+    let paragraph = [];
+    let list = null; // The list being built: its HTML so far and a stack of open ul/ol levels
+    let fenceUnclosed = false;
+
+    const closeParagraph = () => {
+        const text = paragraph.join('\n').trim();
+        if (text) {
+            blocks.push(`<p>${parseInline(text)}</p>`);
+        }
+        paragraph = [];
+    };
 
-    // 3. Blockquotes (>) - Improved to handle multi-line blocks.
-    html = html.replace(/^(> .+\n?)+/gm, (match) => {
-        const content = match.split('\n')
-            .map(line => line.replace(/^> ?/, ''))
-            .join('\n')
-            .trim();
-        // Recursively parse the content inside the blockquote for other markdown elements.
-        return `<blockquote>${parseMarkdown(content)}</blockquote>`;
-    });
+    const closeList = () => {
+        if (!list) return;
+        while (list.stack.length > 0) {
+            list.html += `</${list.stack.pop().type}>`;
+        }
+        blocks.push(list.html);
+        list = null;
+    };
 
-    // 4. Headers (# to ######) - Consolidated into a single, more efficient regex.
-    html = html.replace(/^ *(#{1,6})\s+(.+?)\s*#*$/gm, (match, hashes, content) => {
-        const level = hashes.length;
-        return `<h${level}>${content}</h${level}>`;
-    });
+    for (let i = 0; i < lines.length; i++) {
+        const line = lines[i];
+        const item = RULE.test(line) ? null : LIST_ITEM.exec(line);
+        let match;
 
+        // Lists only continue over consecutive list items
+        if (!item) closeList();
 
-    // 5. Horizontal rule (---, ***, ___)
-    html = html.replace(/^(?:---|\*\*\*|___)\s*$/gm, '<hr>');
-    
-    // 6. Lists - Defer to a dedicated function for complex logic.
-    html = processLists(html);
-
-    // 7. Inline elements
-    // The order here is important: from most specific to least specific.
-    
-    // Images: ![alt](src)
-    html = html.replace(/!\[([^\]]*)\]\(([^)]+)\)/g, (match, alt, src) =>
-        `<img src="${escapeHtml(src)}" alt="${escapeHtml(alt)}" loading="lazy">`);
-
-    // Links: [text](href)
-    html = html.replace(/\[([^\]]+)\]\(([^)]+)\)/g, (match, text, href) =>
-        `<a href="${escapeHtml(href)}" target="_blank" rel="noopener noreferrer">${text}</a>`);
-    
-    // Bold and Italic (***text*** or ___text___)
-    html = html.replace(/(\*\*\*|___)(.+?)\1/g, '<strong><em>$2</em></strong>');
-    
-    // Bold (**text** or __text__)
-    html = html.replace(/(\*\*|__)(.+?)\1/g, '<strong>$2</strong>');
-    
-    // Italic (*text* or _text_)
-    html = html.replace(/(\*|_)(.+?)\1/g, '<em>$2</em>');
-
-    // Strikethrough (~~text~~)
-    html = html.replace(/~~(.+?)~~/g, '<del>$1</del>');
-    
-    // Inline code (`)
-    html = html.replace(/`([^`]+)`/g, (match, code) => `<code>${escapeHtml(code)}</code>`);
-
-    // 8. Line breaks (two spaces at end of line)
-    html = html.replace(/ {2,}\n/g, '<br>\n');
-
-    // 9. Paragraphs (wrap remaining text blocks)
-    html = processParagraphs(html);
-
-    return html.trim();
-}
+        // Code blocks (```) - the content is escaped and never parsed for Markdown.
+        if (!fenceUnclosed && (match = FENCE_OPEN.exec(line))) {
+            let end = i + 1;
+            while (end < lines.length && !lines[end].includes('```')) end++;
 
-// Processes markdown lists, including nested lists
-function processLists(text) {
-    // Handles nested lists by tracking indentation.
-    const listRegex = /^( *)([-*]|\d+\.)\s+(.*)/;
-    const lines = text.split('\n');
-    let html = '';
-    const stack = []; // To track list type ('ul' or 'ol') and indentation level
+            if (end === lines.length) {
+                // Nothing below closes this fence, so no later fence can be closed either
+                fenceUnclosed = true;
+            } else {
+                closeParagraph();
+                const column = lines[end].indexOf('```');
+                const code = lines.slice(i + 1, end).concat(lines[end].slice(0, column)).join('\n');
+                const languageClass = match[1] ? `language-${match[1]}` : '';
+                blocks.push(`<pre><code class="${languageClass}">${escapeHtml(code).trim()}</code></pre>`);
+
+                // Whatever follows the closing fence on its line is read as a line of its own
+                lines[end] = lines[end].slice(column + 3);
+                i = end - 1;
+                continue;
+            }
+        }
 
-    for (const line of lines) {
-        const match = line.match(listRegex);
+        // Blockquotes (>) - consecutive quoted lines, parsed as a document of their own.
+        if (QUOTE.test(line)) {
+            closeParagraph();
+            const quoted = [];
+            while (i < lines.length && QUOTE.test(lines[i])) {
+                quoted.push(lines[i++].slice(2));
+            }
+            i--;
+            blocks.push(`<blockquote>${parseBlocks(quoted.join('\n').trim().split('\n'))}</blockquote>`);
+            continue;
+        }
 
-        if (match) {
-            const indent = match[1].length;
-            const marker = match[2];
-            const content = match[3];
-            const listType = marker.match(/\d/) ? 'ol' : 'ul';
+        // Headers (# to ######)
+        if ((match = HEADING.exec(line))) {
+            closeParagraph();
+            const level = match[1].length;
+            blocks.push(`<h${level}>${parseInline(match[2])}</h${level}>`);
+            continue;
+        }
 
-            // Close nested lists if we de-dent
-            while (stack.length > 0 && indent < stack[stack.length - 1].indent) {
-                html += `</${stack.pop().type}>`;
-            }
+        // Horizontal rule (---, ***, ___)
+        if (RULE.test(line)) {
+            closeParagraph();
+            blocks.push('<hr>');
+            continue;
+        }
 
-            // Start a new list if needed
-            if (stack.length === 0 || indent > stack[stack.length - 1].indent || listType !== stack[stack.length - 1].type) {
-                html += `<${listType}>`;
-                stack.push({ type: listType, indent: indent });
-            }
+        // Lists - nesting follows indentation.
+        if (item) {
+            closeParagraph();
+            addListItem(list || (list = { html: '', stack: [] }), item);
+            continue;
+        }
 
-            html += `<li>${content}</li>`;
+        if (line === '') {
+            closeParagraph();
         } else {
-            // Not a list item, so close all open lists
-            while (stack.length > 0) {
-                html += `</${stack.pop().type}>`;
-            }
-            html += `\n${line}`;
+            paragraph.push(line);
         }
     }
 
-    // Close any remaining open lists at the end of the file
-    while (stack.length > 0) {
-        html += `</${stack.pop().type}>`;
+    closeParagraph();
+    closeList();
+    return blocks.join('\n\n');
+}
+
+// Appends one list item, opening or closing nested lists as the indentation changes
+function addListItem(list, match) {
+    const indent = match[1].length;
+    const listType = /\d/.test(match[2]) ? 'ol' : 'ul';
+    const stack = list.stack;
+
+    // Close nested lists if we de-dent
+    while (stack.length > 0 && indent < stack[stack.length - 1].indent) {
+        list.html += `</${stack.pop().type}>`;
+    }
+
+    // Start a new list if needed
+    if (stack.length === 0 || indent > stack[stack.length - 1].indent || listType !== stack[stack.length - 1].type) {
+        list.html += `<${listType}>`;
+        stack.push({ type: listType, indent: indent });
+    }
+
+    list.html += `<li>${parseInline(match[3])}</li>`;
+}
+
+// Renders inline elements in a single left-to-right scan. A delimiter pairs with the
+// nearest closer on the same line, as before, but code spans and URLs are emitted as-is
+// instead of being re-read for formatting.
+function parseInline(text) {
+    const finder = createFinder(text);
+    let html = '';
+    let i = 0;
+
+    while (i < text.length) {
+        INLINE_SPECIAL.lastIndex = i;
+        const special = INLINE_SPECIAL.exec(text);
+        if (!special) {
+            html += text.slice(i);
+            break;
+        }
+
+        const at = special.index;
+        const chunk = text.slice(i, at);
+        // Every newline becomes a <br>, so trailing spaces before it add nothing
+        html += special[0] === '\n' ? chunk.trimEnd() : chunk;
+
+        const token = readInlineToken(text, at, finder);
+        html += token.html;
+        i = token.end;
     }
 
     return html;
 }
 
-// Wraps text blocks in <p> tags, avoiding block-level elements
-function processParagraphs(html) {
-    // Split the content into blocks separated by one or more blank lines.
-    const blocks = html.split(/\n{2,}/);
-    
-    return blocks.map(block => {
-        if (!block) return '';
-        
-        block = block.trim();
-        
-        // Don't wrap existing block-level elements in a <p> tag.
-        const isBlockElement = /^(<h[1-6]|<ul|<ol|<pre|<blockquote|<hr|<div)/.test(block);
-        
-        if (isBlockElement) {
-            return block;
+// Reads the token starting at `at`; a delimiter that opens nothing is returned as text
+function readInlineToken(text, at, finder) {
+    const char = text[at];
+    const literal = { html: char, end: at + 1 };
+
+    switch (char) {
+        case '<':
+            return { html: '&lt;', end: at + 1 };
+
+        case '\n':
+            return { html: '<br>', end: at + 1 };
+
+        // Inline code (`)
+        case '`': {
+            const close = finder.find('`', at + 1);
+            if (close <= at + 1) return literal;
+            const code = escapeHtml(text.slice(at + 1, close)).replace(/\n/g, '<br>');
+            return { html: `<code>${code}</code>`, end: close + 1 };
+        }
+
+        // Images: ![alt](src)
+        case '!': {
+            if (text[at + 1] !== '[') return literal;
+            const target = readLinkTarget(text, at + 1, finder, 0);
+            if (!target) return literal;
+            const alt = escapeHtml(target.label);
+            return {
+                html: isSafeUrl(target.url) ? `<img src="${escapeHtml(target.url)}" alt="${alt}" loading="lazy">` : alt,
+                end: target.end
+            };
+        }
+
+        // Links: [text](href)
+        case '[': {
+            const target = readLinkTarget(text, at, finder, 1);
+            if (!target) return literal;
+            const label = parseInline(target.label);
+            return {
+                html: isSafeUrl(target.url)
+                    ? `<a href="${escapeHtml(target.url)}" target="_blank" rel="noopener noreferrer">${label}</a>`
+                    : label,
+                end: target.end
+            };
+        }
+
+        // Strikethrough (~~text~~)
+        case '~': {
+            if (text[at + 1] !== '~') return literal;
+            const close = finder.find('~~', at + 3);
+            if (close === -1 || close > finder.lineEnd(at)) return literal;
+            return { html: `<del>${parseInline(text.slice(at + 2, close))}</del>`, end: close + 2 };
+        }
+
+        // Bold and italic: ***text***, **text**, *text* (or with underscores)
+        case '*':
+        case '_': {
+            let run = 1;
+            while (text[at + run] === char) run++;
+            const delimiter = { html: text.slice(at, at + run), end: at + run };
+            if (run > 3) return delimiter;
+
+            // The closer is the next run of exactly the same length, so **bold** can sit
+            // inside *italic* (and the other way round) just as it did with the old passes
+            const close = finder.findRun(char, run, at + run + 1);
+            if (close === -1 || close > finder.lineEnd(at)) return delimiter;
+
+            const inner = parseInline(text.slice(at + run, close));
+            const html = run === 3 ? `<strong><em>${inner}</em></strong>`
+                : run === 2 ? `<strong>${inner}</strong>`
+                : `<em>${inner}</em>`;
+            return { html, end: close + run };
+        }
+    }
+
+    return literal;
+}
+
+// Reads "[label](url)" with the bracket at `open`; a link needs a non-empty label, an image may have none
+function readLinkTarget(text, open, finder, minLabel) {
+    const closeBracket = finder.find(']', open + 1);
+    if (closeBracket === -1 || closeBracket - open - 1 < minLabel || text[closeBracket + 1] !== '(') {
+        return null;
+    }
+    const closeParen = finder.find(')', closeBracket + 2);
+    if (closeParen <= closeBracket + 2) return null;
+    return {
+        label: text.slice(open + 1, closeBracket),
+        url: text.slice(closeBracket + 2, closeParen),
+        end: closeParen + 1
+    };
+}
+
+// Searches over one string that remember their last answer. A search that starts between
+// an earlier search's start and the point where that search stopped has the same result,
+// so an unclosed delimiter repeated many times costs one scan instead of one per occurrence.
+function createFinder(text) {
+    const cache = new Map();
+
+    // `search` returns [result, index the scan reached]
+    const remember = (key, from, search) => {
+        const hit = cache.get(key);
+        if (hit && hit.from <= from && from <= hit.until) {
+            return hit.pos;
         }
-        
-        // Wrap the block in a <p> tag, and replace single newlines with <br>
-        return `<p>${block.replace(/\n/g, '<br>')}</p>`;
-    }).join('\n\n');
+        const [pos, until] = search(from);
+        cache.set(key, { from, pos, until });
+        return pos;
+    };
+
+    const find = (token, from) => remember(token, from, start => {
+        const pos = text.indexOf(token, start);
+        return [pos, pos === -1 ? text.length : pos];
+    });
+
+    const lineEnd = (from) => {
+        const pos = find('\n', from);
+        return pos === -1 ? text.length : pos;
+    };
+
+    return {
+        find,
+        lineEnd,
+
+        // Index of the closing run of `length` copies of `char` on the current line: the next
+        // run of exactly that length, or else the tail of a run of three that ends a word, as
+        // in *a **b*** or **a *b***
+        findRun: (char, length, from) => remember(char.repeat(length) + '#run', from, start => {
+            const end = lineEnd(start);
+            let tail = -1;
+            let pos = find(char, start);
+            while (pos !== -1 && pos < end) {
+                let runEnd = pos;
+                while (text[runEnd] === char) runEnd++;
+                if (runEnd - pos === length) return [pos, pos];
+                if (tail === -1 && runEnd - pos === 3 && /\S/.test(text[pos - 1])) {
+                    tail = runEnd - length;
+                }
+                pos = find(char, runEnd);
+            }
+            return [tail, tail === -1 ? end : tail];
+        })
+    };
+}
+
+function isSafeUrl(url) {
+    // Browsers ignore whitespace and control characters inside a scheme ("java\tscript:")
+    return !UNSAFE_URL.test(url.replace(/[\u0000- ]/g, ''));
 }
 
 // Sets up a live preview for a Markdown editor
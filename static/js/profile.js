@@ -234,10 +234,10 @@
 
             document.body.dataset.characterId = currentCharacter.id;
 
+            applyCharacterTheme();
             loadHeroSection();
             loadIdentitySection();
             loadBioSections();
-            applyCharacterTheme();
 
         } catch (error) {
             console.error('Error loading character:', error);
@@ -661,39 +661,65 @@
         }
     }
 
-    async function loadGallery() {
+    let galleryCursor = null;
+
+    async function loadGallery(append) {
         const container = document.getElementById('gallery-grid');
         if (!container) return;
 
-        container.innerHTML = '';
+        const existingMore = document.getElementById('gallery-load-more');
+        if (existingMore) existingMore.remove();
+
+        if (!append) {
+            container.innerHTML = '';
+            galleryCursor = null;
+        }
 
         toggleLoader('gallery-loader', true);
 
         try {
-            const images = await fetchAPI(`/characters/${characterId}/gallery`);
+            const params = new URLSearchParams({ limit: 24 });
+            if (append && galleryCursor) params.set('cursor', galleryCursor);
+            const result = await fetchAPI(`/characters/${characterId}/gallery?${params}`, { includeHeaders: true });
+            const images = result.data;
+            galleryCursor = result.headers.get('X-Next-Cursor');
 
             toggleLoader('gallery-loader', false);
 
-            if (!images || images.length === 0) {
+            if (!append && (!images || images.length === 0)) {
                 container.innerHTML = '<p class="empty-state">No images found in gallery.</p>';
                 return;
             }
 
             if (typeof renderGalleryImages === 'function') {
-                renderGalleryImages(images, container);
+                renderGalleryImages(images, container, append);
             } else {
-                container.innerHTML = images.map(img => `
+                const html = images.map(img => `
                     <div class="gallery-item">
                         <img src="${img.url}" alt="${img.caption || 'Gallery Image'}" loading="lazy">
                         ${img.caption ? `<div class="caption">${img.caption}</div>` : ''}
                     </div>
                 `).join('');
+                container.insertAdjacentHTML('beforeend', html);
+            }
+
+            if (galleryCursor) {
+                const moreBtn = document.createElement('button');
+                moreBtn.id = 'gallery-load-more';
+                moreBtn.className = 'btn-secondary';
+                moreBtn.textContent = 'Load more';
+                moreBtn.addEventListener('click', function() { loadGallery(true); });
+                container.insertAdjacentElement('afterend', moreBtn);
             }
 
         } catch (error) {
             console.error("Gallery load error:", error);
             toggleLoader('gallery-loader', false);
-            container.innerHTML = '<p class="error-state">Failed to load gallery.</p>';
+            if (!append) {
+                container.innerHTML = '<p class="error-state">Failed to load gallery.</p>';
+            } else {
+                showNotification('Failed to load more images', 'error');
+            }
         }
     }
 
@@ -1104,29 +1130,28 @@
         applyCharacterCSSFile();
     }
 
-    async function applyCharacterCSSFile() {
+    function applyCharacterCSSFile() {
         const charName = currentCharacter.name || 'unknown';
         const cssChar = charName.toLowerCase().replace(/\s+/g, '-');
-        const cssFileName = cssChar + '.css';
-        const cssPath = '/static/styles/characters/' + cssFileName;
         const charElement = document.querySelector('#pfp');
 
         if (charElement) {
             charElement.dataset.character = cssChar;
         }
 
-        try {
-            const response = await fetch(cssPath, { method: 'HEAD' });
-            if (response.ok) {
-                const link = document.createElement('link');
-                link.rel = 'stylesheet';
-                link.href = cssPath;
-                document.head.appendChild(link);
-                console.log('Character CSS loaded:', cssPath);
-            }
-        } catch (error) {
-            console.log('No character-specific CSS found');
+        // The API only sends theme_css when a stylesheet exists, so no probe request is needed.
+        if (!currentCharacter.theme_css) return;
+
+        const link = document.getElementById('character-theme');
+        if (link) {
+            link.href = currentCharacter.theme_css;
+        } else {
+            const newLink = document.createElement('link');
+            newLink.rel = 'stylesheet';
+            newLink.href = currentCharacter.theme_css;
+            document.head.appendChild(newLink);
         }
+        console.log('Character CSS loaded:', currentCharacter.theme_css);
     }
 
     function setupLazyLoading() {
@@ -0,0 +1,156 @@
+// Service worker for the public site.
+// Served by Flask at /sw.js, which prepends PRECACHE_VERSION and PRECACHE_URLS.
+
+const SHELL_CACHE = `shell-${PRECACHE_VERSION}`;
+const API_CACHE = 'api-v1';
+const API_CACHE_MAX_ENTRIES = 100;
+const IMAGE_CACHE = 'images-v1';
+const IMAGE_CACHE_MAX_ENTRIES = 150;
+const PROFILE_SHELL_KEY = '/profile/__shell__';
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    const keep = [SHELL_CACHE, API_CACHE, IMAGE_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => !keep.includes(key)).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+// Requests carrying a token come from a signed-in admin, who must always see the live data
+function isPublicAPI(request, url) {
+    return url.origin === self.location.origin && !request.headers.has('Authorization') &&
+        (url.pathname.startsWith('/api/characters') || url.pathname.startsWith('/api/events'));
+}
+
+function isStorageImage(url) {
+    return url.pathname.includes('/storage/v1/object/public/');
+}
+
+function isStaticAsset(url) {
+    return url.origin === self.location.origin &&
+        (url.pathname.startsWith('/assets/') || url.pathname.startsWith('/static/'));
+}
+
+// Network first so pages stay fresh; fall back to the cached copy (or the profile shell) offline
+async function handleNavigation(request) {
+    const url = new URL(request.url);
+    const cache = await caches.open(SHELL_CACHE);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            cache.put(request, response.clone());
+            if (url.pathname.startsWith('/profile/')) cache.put(PROFILE_SHELL_KEY, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await cache.match(request) ||
+            (url.pathname.startsWith('/profile/') && await cache.match(PROFILE_SHELL_KEY)) ||
+            await cache.match('/');
+        if (cached) return cached;
+        throw error;
+    }
+}
+
+// Serve the cached response immediately and refresh it in the background
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(API_CACHE);
+    const cached = await cache.match(event.request);
+    const network = fetch(event.request).then(response => {
+        if (response.ok) {
+            cache.put(event.request, response.clone())
+                .then(() => trimCache(API_CACHE, API_CACHE_MAX_ENTRIES))
+                .catch(() => {});
+        }
+        return response;
+    });
+
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+async function trimCache(cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const keys = await cache.keys();
+    // Keys come back in insertion order, so the oldest entries are dropped first
+    await Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)));
+}
+
+async function cacheFirst(event, cacheName, maxEntries) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(event.request);
+    if (cached) return cached;
+
+    const response = await fetch(event.request);
+    if (response.ok) {
+        await cache.put(event.request, response.clone());
+        if (maxEntries) event.waitUntil(trimCache(cacheName, maxEntries));
+    }
+    return response;
+}
+
+// Storage images are fetched with CORS so the cached copy is a readable response of its real
+// size. An opaque one would be charged padded quota (megabytes each), which the entry limit
+// cannot account for; if the CORS fetch fails the image is passed through without caching.
+async function cacheImage(event) {
+    const cache = await caches.open(IMAGE_CACHE);
+    const cached = await cache.match(event.request.url);
+    if (cached) return cached;
+
+    let response;
+    try {
+        response = await fetch(event.request.url, { mode: 'cors', credentials: 'omit' });
+    } catch (error) {
+        return fetch(event.request);
+    }
+    if (response.ok) {
+        await cache.put(event.request.url, response.clone());
+        event.waitUntil(trimCache(IMAGE_CACHE, IMAGE_CACHE_MAX_ENTRIES));
+    }
+    return response;
+}
+
+// Pages drop cached API responses after an admin change: {type: 'invalidate-api', prefix: '/characters'}
+self.addEventListener('message', (event) => {
+    const message = event.data || {};
+    if (message.type !== 'invalidate-api' || typeof message.prefix !== 'string') return;
+    const prefix = `/api${message.prefix}`;
+    event.waitUntil(
+        caches.open(API_CACHE).then(async cache => {
+            const keys = await cache.keys();
+            const stale = keys.filter(key => {
+                const url = new URL(key.url);
+                return (url.pathname + url.search).startsWith(prefix);
+            });
+            await Promise.all(stale.map(key => cache.delete(key)));
+        })
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+
+    if (request.mode === 'navigate') {
+        if (url.pathname.startsWith('/admin')) return;
+        event.respondWith(handleNavigation(request));
+    } else if (isPublicAPI(request, url)) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (request.destination === 'image' && isStorageImage(url)) {
+        event.respondWith(cacheImage(event));
+    } else if (isStaticAsset(url)) {
+        event.respondWith(cacheFirst(event, SHELL_CACHE));
+    }
+});
@@ -0,0 +1,130 @@
+"""
+Finds and removes storage objects that no database row points at.
+
+Objects leak when a character or event is deleted, when a row is re-pointed at a
+new upload, or when an insert fails after its upload succeeded. The sweeper lists
+each bucket, collects every referenced URL from the columns in REFERENCES, and
+deletes the difference in batches. Objects younger than `min_age_hours` are left
+alone so uploads whose row (or background job) has not landed yet are never hit.
+Reference reads are strict: if any page of any table fails, the whole sweep stops
+with QueryError before anything is deleted, since a partial set of references would
+make live objects look orphaned. As a last guard a real sweep still refuses to delete
+more than MAX_ORPHAN_RATIO of a bucket unless forced.
+
+    python storage_sweeper.py                 # dry run: report only
+    python storage_sweeper.py --apply         # delete orphans
+    python storage_sweeper.py --bucket event-images --min-age-hours 48
+"""
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+
+from database import QueryError, supabase, storage_path
+
+BUCKETS = ('gallery-images', 'event-images', 'character-images')
+
+# (table, column) pairs holding public storage URLs.
+REFERENCES = (
+    ('gallery_images', 'image_url'),
+    ('event_images', 'image_url'),
+    ('characters', 'profile_image'),
+)
+
+PAGE_SIZE = 1000
+MAX_ORPHAN_RATIO = 0.5
+REPORT_SAMPLE = 50
+
+
+def referenced_paths(buckets):
+    """Map bucket -> set of object paths referenced by any URL column; raises QueryError if any read fails."""
+    referenced = {bucket: set() for bucket in buckets}
+    for table, column in REFERENCES:
+        last_id = 0
+        while True:
+            params = {'id': f'gt.{last_id}', column: 'not.is.null', 'order': 'id', 'limit': PAGE_SIZE}
+            rows = supabase.query(table, params=params, select=f'id,{column}', strict=True)
+            for row in rows:
+                for bucket in buckets:
+                    path = storage_path(row[column], bucket)
+                    if path:
+                        referenced[bucket].add(path)
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+    return referenced
+
+
+def _is_recent(created_at, cutoff):
+    if not created_at:
+        return True
+    try:
+        return datetime.fromisoformat(created_at.replace('Z', '+00:00')) > cutoff
+    except ValueError:
+        return True
+
+
+def sweep(dry_run=True, buckets=BUCKETS, min_age_hours=24, force=False):
+    """
+    Report (and unless `dry_run`, delete) orphaned objects. Returns a per-bucket dict with
+    object/orphan counts, orphan bytes, a sample of orphan paths and how many were deleted.
+    Raises QueryError, having deleted nothing, when the references cannot be read in full.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+    referenced = referenced_paths(buckets)
+    report = {}
+
+    for bucket in buckets:
+        objects = 0
+        skipped_recent = 0
+        orphans = []
+        orphan_bytes = 0
+        for obj in supabase.list_files(bucket):
+            objects += 1
+            if obj['path'] in referenced[bucket]:
+                continue
+            if _is_recent(obj['created_at'], cutoff):
+                skipped_recent += 1
+                continue
+            orphans.append(obj['path'])
+            orphan_bytes += obj['size'] or 0
+
+        deleted = 0
+        if orphans and not dry_run:
+            if not force and len(orphans) > objects * MAX_ORPHAN_RATIO:
+                raise RuntimeError(f'{len(orphans)} of {objects} objects in {bucket} look orphaned; '
+                                   'refusing to delete without force')
+            removed = supabase.delete_files(bucket, orphans)
+            if removed is None:
+                raise RuntimeError(f'Batch delete failed for bucket {bucket}')
+            deleted = len(removed)
+
+        report[bucket] = {
+            'objects': objects,
+            'referenced': len(referenced[bucket]),
+            'orphans': len(orphans),
+            'orphan_bytes': orphan_bytes,
+            'skipped_recent': skipped_recent,
+            'deleted': deleted,
+            'sample': orphans[:REPORT_SAMPLE],
+        }
+    return {'dry_run': dry_run, 'min_age_hours': min_age_hours, 'buckets': report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apply', action='store_true', help='Delete orphans instead of only reporting them')
+    parser.add_argument('--bucket', action='append', choices=BUCKETS, help='Limit to a bucket (repeatable)')
+    parser.add_argument('--min-age-hours', type=float, default=24)
+    parser.add_argument('--force', action='store_true', help=f'Allow deleting more than {MAX_ORPHAN_RATIO:.0%} of a bucket')
+    args = parser.parse_args()
+
+    try:
+        result = sweep(dry_run=not args.apply, buckets=tuple(args.bucket or BUCKETS),
+                       min_age_hours=args.min_age_hours, force=args.force)
+    except QueryError as e:
+        raise SystemExit(f'Could not read storage references, nothing was deleted: {e}')
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
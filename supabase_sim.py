@@ -0,0 +1,463 @@
+"""
+Local stand-in for Supabase (PostgREST + storage) used by loadtest.py.
+
+Serves a seeded in-memory dataset over the subset of PostgREST the app uses (eq/in/gt/
+gte/lt/lte/is filters, or/and groups, order with nulls placement, limit/offset, count=exact,
+embedded resources including !inner joins and filters on them, upserts on on_conflict
+columns) plus storage upload/download/list/delete, and injects configurable latency and
+error rates so load tests see realistic upstream behaviour. Call counts are exposed at
+GET /__stats.
+
+    python supabase_sim.py --port 54321 --latency-ms 40 --jitter-ms 15 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+ERAS = [
+    ('classic', 'Classic'), ('post-crisis', 'Post-Crisis'), ('new-52', 'The New 52'),
+    ('rebirth', 'DC Rebirth'), ('infinite-frontier', 'Infinite Frontier'),
+]
+FAMILIES = [('batfamily', 'Batfamily'), ('superfamily', 'Superfamily'), ('titans', 'Titans')]
+BIO_TEXT = "Trained from childhood, they joined the fight for Gotham. **Key moments** shaped them. " * 8
+
+
+def seed(characters=120, events=400, seed_value=7):
+    """Build a deterministic dataset shaped like the production tables."""
+    rng = random.Random(seed_value)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tables = {name: [] for name in (
+        'eras', 'families', 'characters', 'character_bio', 'events', 'event_characters',
+        'event_images', 'gallery_images', 'gallery_image_characters', 'relationships',
+        'relationship_types', 'love_interests', 'love_interest_categories', 'pending_edits', 'change_log',
+    )}
+
+    for i, (slug, name) in enumerate(ERAS, 1):
+        tables['eras'].append({'id': i, 'slug': slug, 'name': name, 'display_order': i})
+    for i, (slug, name) in enumerate(FAMILIES, 1):
+        tables['families'].append({'id': i, 'slug': slug, 'name': name})
+    tables['relationship_types'] = [{'id': 1, 'slug': 'family', 'name': 'Family'}, {'id': 2, 'slug': 'ally', 'name': 'Ally'}]
+    tables['love_interest_categories'] = [{'id': 1, 'slug': 'canon', 'name': 'Canon'}]
+
+    for cid in range(1, characters + 1):
+        tables['characters'].append({
+            'id': cid, 'name': f'Character {cid}', 'full_name': f'Character Number {cid}',
+            'nickname': f'Nick {cid}', 'family': rng.choice(FAMILIES)[0],
+            'profile_image': f'https://storage.local/character-images/profiles/{cid}.jpg',
+            'color_primary': '#1f2937', 'quote': 'A line from the comics.',
+        })
+        for order in range(rng.randint(2, 6)):
+            tables['character_bio'].append({
+                'id': len(tables['character_bio']) + 1, 'character_id': cid,
+                'section_title': f'Section {order}', 'content': BIO_TEXT, 'display_order': order,
+            })
+
+    for eid in range(1, events + 1):
+        created = (start + timedelta(hours=eid)).isoformat()
+        tables['events'].append({
+            'id': eid, 'title': f'Event {eid}', 'event_date': (start - timedelta(days=eid)).date().isoformat(),
+            'era': rng.choice(ERAS)[0], 'summary': 'Summary of the event.', 'full_description': BIO_TEXT,
+            'created_at': created,
+        })
+        for cid in rng.sample(range(1, characters + 1), rng.randint(1, 4)):
+            tables['event_characters'].append({'id': len(tables['event_characters']) + 1, 'event_id': eid, 'character_id': cid})
+        if rng.random() < 0.3:
+            tables['event_images'].append({
+                'id': len(tables['event_images']) + 1, 'event_id': eid, 'created_at': created,
+                'image_url': f'https://storage.local/event-images/{eid}/img.jpg',
+            })
+
+    for gid in range(1, characters * 3 + 1):
+        tables['gallery_images'].append({
+            'id': gid, 'image_url': f'https://storage.local/gallery-images/{gid}.jpg', 'alt_text': '',
+            'event_id': None, 'created_at': (start + timedelta(minutes=gid)).isoformat(),
+        })
+        tables['gallery_image_characters'].append({'id': gid, 'image_id': gid, 'character_id': rng.randint(1, characters)})
+
+    for cid in range(1, characters + 1):
+        for other in rng.sample(range(1, characters + 1), 3):
+            if other != cid:
+                tables['relationships'].append({
+                    'id': len(tables['relationships']) + 1, 'character_id': cid, 'related_character_id': other,
+                    'type': 'ally', 'status': None,
+                })
+
+    for pid in range(1, 60):
+        tables['pending_edits'].append({
+            'id': pid, 'status': 'pending', 'table_name': 'characters', 'record_id': rng.randint(1, characters),
+            'field_name': 'quote', 'old_value': 'old', 'new_value': 'new',
+            'created_at': (start + timedelta(minutes=pid)).isoformat(),
+        })
+    return tables
+
+
+# (table, embedded name) -> (target table, column on table, column on target, to-many)
+RELATIONS = {
+    ('characters', 'families'): ('families', 'family', 'slug', False),
+    ('love_interests', 'character_one_id'): ('characters', 'character_one_id', 'id', False),
+    ('love_interests', 'character_two_id'): ('characters', 'character_two_id', 'id', False),
+    ('gallery_images', 'gallery_image_characters'): ('gallery_image_characters', 'id', 'image_id', True),
+    ('event_images', 'events'): ('events', 'event_id', 'id', False),
+    ('events', 'event_characters'): ('event_characters', 'id', 'event_id', True),
+    ('events', 'event_images'): ('event_images', 'id', 'event_id', True),
+    ('event_characters', 'characters'): ('characters', 'character_id', 'id', False),
+}
+RESERVED_PARAMS = ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns')
+
+
+def _split(text):
+    """Split on top-level commas, leaving commas inside parentheses or double quotes alone."""
+    parts, depth, quoted, current = [], 0, False, ''
+    for i, char in enumerate(text):
+        if char == '"' and (i == 0 or text[i - 1] != '\\'):
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _coerce(value):
+    if value.startswith('"') and value.endswith('"') and len(value) > 1:
+        return value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    if value == 'null':
+        return None
+    if re.fullmatch(r'-?\d+', value):
+        return int(value)
+    return value
+
+
+def _matches(row, column, expr):
+    op, _, raw = expr.partition('.')
+    if op == 'not':
+        return not _matches(row, column, raw)
+    current = row.get(column)
+    if op == 'in':
+        return current in {_coerce(v) for v in _split(raw[1:-1])}
+    if op == 'is':
+        return current is {'null': None, 'true': True, 'false': False}.get(raw, current)
+    value = _coerce(raw)
+    if op == 'eq':
+        return current == value
+    if op == 'neq':
+        return current != value
+    if current is None:
+        return False
+    try:
+        return {'gt': current > value, 'gte': current >= value, 'lt': current < value, 'lte': current <= value}[op]
+    except (KeyError, TypeError):
+        return True
+
+
+def _matches_group(row, combinator, expr):
+    """Evaluate an or=(...) / and=(...) group whose terms are col.op.value or nested and(...)/or(...)."""
+    results = []
+    for term in _split(expr.strip()[1:-1]):
+        nested = re.match(r'^(and|or)(\(.*\))$', term)
+        if nested:
+            results.append(_matches_group(row, nested.group(1), nested.group(2)))
+        else:
+            column, _, condition = term.partition('.')
+            results.append(_matches(row, column, condition))
+    return any(results) if combinator == 'or' else all(results)
+
+
+def _parse_select(select):
+    """Split a select into plain columns and (key, table, inner, sub-select) embeds."""
+    columns, embeds = [], []
+    for item in _split(select or '*'):
+        match = re.match(r'^(?:(\w+):)?(\w+)(!inner)?\((.*)\)$', item)
+        if match:
+            alias, name, inner, sub = match.groups()
+            embeds.append((alias or name, name, bool(inner), sub))
+        elif item:
+            columns.append(item.split(':')[-1])
+    return columns, embeds
+
+
+class SimState:
+    def __init__(self, tables, latency_ms, jitter_ms, error_rate):
+        self.tables = tables
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.objects = {}
+        self.next_ids = {name: max((r.get('id', 0) for r in rows), default=0) + 1 for name, rows in tables.items()}
+
+    def delay(self):
+        seconds = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        time.sleep(seconds)
+
+    def _filter(self, rows, params, path):
+        """Apply the filters addressed to `path` (() for the queried table, else an embed path)."""
+        for column, expr in params:
+            *prefix, name = column.split('.')
+            if tuple(prefix) != path or name in RESERVED_PARAMS:
+                continue
+            if name in ('or', 'and'):
+                rows = [r for r in rows if _matches_group(r, name, expr)]
+            else:
+                rows = [r for r in rows if _matches(r, name, expr)]
+        return rows
+
+    def _embed(self, table, rows, select, params, path=(), indexes=None):
+        """Filter and shape `rows` of `table` for `select`, resolving embedded resources recursively."""
+        indexes = {} if indexes is None else indexes
+        rows = self._filter(rows, params, path)
+        columns, embeds = _parse_select(select)
+        shaped = []
+        for row in rows:
+            out = dict(row) if not columns or '*' in columns else {c: row.get(c) for c in columns}
+            shaped.append((row, out))
+        for key, name, inner, sub in embeds:
+            target, local, remote, many = RELATIONS[(table, name)]
+            if (target, remote) not in indexes:
+                index = indexes[(target, remote)] = {}
+                for candidate in self.tables.get(target, []):
+                    index.setdefault(candidate.get(remote), []).append(candidate)
+            index = indexes[(target, remote)]
+            kept = []
+            for row, out in shaped:
+                related = [shaped_row for _, shaped_row in
+                           self._embed(target, index.get(row.get(local), []), sub, params, path + (key,), indexes)]
+                out[key] = related if many else (related[0] if related else None)
+                if not inner or related:
+                    kept.append((row, out))
+            shaped = kept
+        return shaped
+
+    def select(self, table, params):
+        """Matching rows as (shaped rows, total before limit, matching stored rows)."""
+        shaped = self._embed(table, list(self.tables.get(table, [])), dict(params).get('select', '*'), params)
+
+        order = dict(params).get('order')
+        if order:
+            for part in reversed(order.split(',')):
+                column, *modifiers = part.split('.')
+                descending = 'desc' in modifiers
+                # PostgREST puts nulls first when descending and last when ascending, unless told otherwise
+                nulls_first = 'nullsfirst' in modifiers or (descending and 'nullslast' not in modifiers)
+
+                def sort_key(pair, column=column, nulls_high=nulls_first == descending):
+                    value = pair[0].get(column)
+                    if value is None:
+                        return (1 if nulls_high else -1, '')
+                    return (0, value if isinstance(value, (int, float)) else str(value))
+
+                shaped.sort(key=sort_key, reverse=descending)
+
+        total = len(shaped)
+        offset = int(dict(params).get('offset') or 0)
+        limit = dict(params).get('limit')
+        shaped = shaped[offset:offset + int(limit) if limit else None]
+        return [out for _, out in shaped], total, [row for row, _ in shaped]
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None):
+            payload = json.dumps(body if body is not None else []).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+
+        def _handle(self, method):
+            parts = urlsplit(self.path)
+            body = self._body()
+
+            if parts.path == '/__stats':
+                with state.lock:
+                    calls = dict(state.calls)
+                return self._send(200, {'calls': calls, 'total': sum(calls.values())})
+            if parts.path == '/__reset':
+                with state.lock:
+                    state.calls.clear()
+                return self._send(200, {})
+
+            params = parse_qsl(parts.query, keep_blank_values=True)
+            if parts.path.startswith('/storage/v1/object/'):
+                return self._storage(method, parts.path[len('/storage/v1/object/'):], body)
+
+            if not parts.path.startswith('/rest/v1/'):
+                return self._send(404, {'message': 'not found'})
+
+            table = parts.path[len('/rest/v1/'):]
+            with state.lock:
+                state.calls[f'{method} {table}'] += 1
+            state.delay()
+            if random.random() < state.error_rate:
+                return self._send(503, {'message': 'injected error'})
+
+            with state.lock:
+                if method == 'GET':
+                    rows, total, _ = state.select(table, params)
+                    headers = {'Content-Range': f'0-{max(len(rows) - 1, 0)}/{total}'}
+                    return self._send(200, rows, headers)
+
+                if method == 'POST':
+                    data = json.loads(body or b'[]')
+                    rows = data if isinstance(data, list) else [data]
+                    # An upsert merges on its on_conflict columns; a plain insert only on an explicit id
+                    conflict = (dict(params).get('on_conflict') or 'id').split(',')
+                    created = []
+                    for row in rows:
+                        row = dict(row)
+                        stored = state.tables.setdefault(table, [])
+                        existing = None
+                        if all(row.get(c) is not None for c in conflict):
+                            existing = next((r for r in stored if all(r.get(c) == row[c] for c in conflict)), None)
+                        if existing is not None:
+                            existing.update(row)
+                            created.append(dict(existing))
+                            continue
+                        if row.get('id') is None:
+                            row['id'] = state.next_ids.get(table, 1)
+                        state.next_ids[table] = max(state.next_ids.get(table, 1), row['id'] + 1) \
+                            if isinstance(row['id'], int) else state.next_ids.get(table, 1)
+                        row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+                        stored.append(row)
+                        created.append(dict(row))
+                    return self._send(201, created)
+
+                matched, _, stored_rows = state.select(table, [p for p in params if p[0] != 'select'])
+                matched_ids = {id(r) for r in stored_rows}
+                if method == 'PATCH':
+                    data = json.loads(body or b'{}')
+                    updated = []
+                    for row in state.tables.get(table, []):
+                        if id(row) in matched_ids:
+                            row.update(data)
+                            updated.append(dict(row))
+                    return self._send(200, updated)
+                if method == 'DELETE':
+                    state.tables[table] = [r for r in state.tables.get(table, []) if id(r) not in matched_ids]
+                    return self._send(200, [dict(r) for r in stored_rows])
+            return self._send(405, {'message': 'method not allowed'})
+
+        def _storage(self, method, path, body):
+            """Objects live in state.objects as bucket -> {path: (bytes, created_at)}."""
+            action = 'list' if path.startswith('list/') else method
+            path = path[len('list/'):] if action == 'list' else path
+            if path.startswith('public/'):
+                path = path[len('public/'):]
+            bucket, _, name = path.partition('/')
+            with state.lock:
+                state.calls[f'storage {action} {bucket}'] += 1
+            state.delay()
+            if random.random() < state.error_rate:
+                return self._send(500, {'message': 'injected error'})
+
+            with state.lock:
+                objects = state.objects.setdefault(bucket, {})
+                if action == 'list':
+                    request = json.loads(body or b'{}')
+                    prefix = request.get('prefix', '').strip('/')
+                    prefix = f'{prefix}/' if prefix else ''
+                    entries = {}
+                    for key, (data, created_at) in sorted(objects.items()):
+                        if not key.startswith(prefix):
+                            continue
+                        rest = key[len(prefix):]
+                        if '/' in rest:
+                            entries.setdefault(rest.split('/')[0], {'name': rest.split('/')[0], 'id': None})
+                        else:
+                            entries[rest] = {'name': rest, 'id': key, 'created_at': created_at,
+                                             'metadata': {'size': len(data)}}
+                    offset, limit = request.get('offset', 0), request.get('limit', 100)
+                    return self._send(200, list(entries.values())[offset:offset + limit])
+                if method == 'POST':
+                    if name in objects and self.headers.get('x-upsert') != 'true':
+                        return self._send(400, {'message': 'The resource already exists'})
+                    objects[name] = (body, datetime.now(timezone.utc).isoformat())
+                    return self._send(200, {'Key': f'{bucket}/{name}'})
+                if method == 'GET':
+                    if name not in objects:
+                        return self._send(404, {'message': 'Object not found'})
+                    data = objects[name][0]
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/octet-stream')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return None
+                if method == 'DELETE':
+                    names = json.loads(body or b'{}').get('prefixes', []) if not name else [name]
+                    removed = [n for n in names if objects.pop(n, None) is not None]
+                    return self._send(200, [{'name': n} for n in removed] if not name else {'message': 'ok'})
+            return self._send(405, {'message': 'method not allowed'})
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def do_PATCH(self):
+            self._handle('PATCH')
+
+        def do_DELETE(self):
+            self._handle('DELETE')
+
+    return Handler
+
+
+def start(port=54321, latency_ms=30.0, jitter_ms=10.0, error_rate=0.0, characters=120, events=400):
+    """Start the simulator on a background thread; returns the server (call .shutdown() to stop)."""
+    state = SimState(seed(characters, events), latency_ms, jitter_ms, error_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Supabase simulator')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--characters', type=int, default=120)
+    parser.add_argument('--events', type=int, default=400)
+    args = parser.parse_args()
+
+    server = start(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.characters, args.events)
+    print(f"Supabase simulator listening on http://127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Module-level settings are read at import time, so they must be in place before any app module loads
+STATE_DIR = tempfile.mkdtemp(prefix='dc-tests-')
+os.environ.setdefault('JOB_QUEUE_PATH', os.path.join(STATE_DIR, 'jobs.sqlite3'))
+os.environ.setdefault('JOB_WORKERS', '0')
+os.environ.setdefault('JOB_WORKERS_AUTOSTART', '0')
+os.environ.setdefault('JWT_SECRET', 'test-secret-key-that-is-long-enough-for-hs256')
+
+import pytest
+
+
+class FakeSupabase:
+    """
+    Stands in for SupabaseClient.query: records every call and answers through `respond`.
+    `respond` returns FAIL to simulate a failed request: [] for a normal query, QueryError for a strict one.
+    """
+
+    FAIL = object()
+
+    def __init__(self):
+        self.calls = []
+        self.respond = lambda call: []
+
+    def query(self, table, method='GET', params=None, data=None, select='*', on_conflict=None, strict=False):
+        call = {'table': table, 'method': method, 'params': params or {}, 'data': data,
+                'select': select, 'on_conflict': on_conflict, 'strict': strict}
+        self.calls.append(call)
+        result = self.respond(call)
+        if result is self.FAIL:
+            if strict:
+                from database import QueryError
+                raise QueryError(f'{method} {table} failed')
+            return []
+        return result
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    import database
+    fake = FakeSupabase()
+    monkeypatch.setattr(database.supabase, 'query', fake.query)
+    return fake
+
+
+@pytest.fixture
+def client(fake_supabase):
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_headers(client):
+    from flask_jwt_extended import create_access_token
+    from app import app
+    with app.app_context():
+        token = create_access_token(identity='admin')
+    return {'Authorization': f'Bearer {token}'}
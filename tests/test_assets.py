@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+from flask import Flask
+
+import assets
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, 'DIST_DIR', str(tmp_path))
+    monkeypatch.setattr(assets, 'MANIFEST_PATH', str(tmp_path / 'manifest.json'))
+    manifest = assets.build()
+
+    app = Flask(__name__)
+    app.add_url_rule('/assets/<path:filename>', 'assets', assets.serve_asset)
+    return manifest, app.test_client()
+
+
+def test_build_writes_fingerprinted_files_and_manifest(built, tmp_path):
+    manifest, _ = built
+    name = manifest['home.js']
+    assert name.startswith('home.') and name.endswith('.js')
+    assert os.path.exists(tmp_path / name)
+    assert os.path.exists(tmp_path / (name + '.gz'))
+    assert json.loads((tmp_path / 'manifest.json').read_text()) == manifest
+
+
+def test_build_is_deterministic(built):
+    manifest, _ = built
+    assert assets.build() == manifest
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate, br', 'br'),
+    ('gzip;q=1.0, br;q=0', 'gzip'),
+    ('brotli, gzip', 'gzip'),
+    ('x-br', None),
+    ('identity', None),
+    ('*', 'br'),
+])
+def test_serve_asset_negotiates_encoding(built, header, expected):
+    if expected == 'br' and assets.brotli is None:
+        pytest.skip('brotli not installed')
+    manifest, client = built
+    response = client.get(f"/assets/{manifest['home.js']}", headers={'Accept-Encoding': header})
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == expected
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    response.close()
+
+
+def test_load_manifest_builds_on_start_when_enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, 'DIST_DIR', str(tmp_path / 'dist'))
+    monkeypatch.setattr(assets, 'MANIFEST_PATH', str(tmp_path / 'dist' / 'manifest.json'))
+    monkeypatch.setattr(assets, 'BUILD_ON_START', False)
+    assert assets.load_manifest() == {}
+    monkeypatch.setattr(assets, 'BUILD_ON_START', True)
+    assert 'home.js' in assets.load_manifest()
@@ -0,0 +1,71 @@
+import app as app_module
+
+URL = '/api/admin/relationships/bulk'
+
+
+def upsert_responder(existing=(), fail_read=False):
+    """Existing (character_id, related_character_id) rows; the upsert echoes every row it is sent."""
+    def respond(call, fake):
+        if call['table'] != 'relationships':
+            return []
+        if call['method'] == 'GET':
+            if fail_read:
+                return fake.FAIL
+            return [{'character_id': a, 'related_character_id': b} for a, b in existing]
+        return [{'character_id': row['character_id'], 'related_character_id': row['related_character_id']}
+                for row in call['data']]
+    return respond
+
+
+def sent_rows(fake_supabase):
+    posts = [c for c in fake_supabase.calls if c['table'] == 'relationships' and c['method'] == 'POST']
+    return posts[0]['data'] if posts else None
+
+
+def test_family_expands_to_every_pair_in_both_directions(client, fake_supabase, admin_headers):
+    respond = upsert_responder()
+    fake_supabase.respond = lambda call: respond(call, fake_supabase)
+    body = {'family': {'character_ids': [1, 2, 3, 2], 'type': 'family', 'status': 'sibling'}}
+    response = client.post(URL, json=body, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['created'] == 3
+    rows = {(r['character_id'], r['related_character_id'], r['status']) for r in sent_rows(fake_supabase)}
+    assert rows == {(a, b, 'sibling') for a in (1, 2, 3) for b in (1, 2, 3) if a != b}
+
+
+def test_explicit_pair_overrides_the_family_matrix(client, fake_supabase, admin_headers):
+    respond = upsert_responder(existing=[(1, 2)])
+    fake_supabase.respond = lambda call: respond(call, fake_supabase)
+    body = {
+        'family': {'character_ids': [1, 2, 3], 'type': 'family'},
+        'pairs': [{'character_id': 2, 'related_character_id': 1, 'type': 'rival', 'status_a_to_b': 'x'},
+                  {'character_id': 4, 'related_character_id': 4, 'type': 'rival'}],
+    }
+    data = client.post(URL, json=body, headers=admin_headers).get_json()
+    assert (data['created'], data['updated']) == (2, 1)
+    assert data['invalid'] == [{'index': 1, 'error': 'character_id and related_character_id must be two different character ids'}]
+    rival = [r for r in sent_rows(fake_supabase) if r['type'] == 'rival']
+    assert {(r['character_id'], r['related_character_id'], r['status']) for r in rival} == {(2, 1, 'x'), (1, 2, None)}
+
+
+def test_oversized_family_is_rejected_before_expansion(client, fake_supabase, admin_headers, monkeypatch):
+    monkeypatch.setattr(app_module, 'BULK_RELATIONSHIPS_MAX_PAIRS', 10)
+    respond = upsert_responder()
+    fake_supabase.respond = lambda call: respond(call, fake_supabase)
+    body = {'family': {'character_ids': list(range(1, 6)), 'type': 'family'}}
+    assert client.post(URL, json=body, headers=admin_headers).status_code == 200
+    fake_supabase.calls.clear()
+    body = {'family': {'character_ids': list(range(1, 7)), 'type': 'family'}}
+    response = client.post(URL, json=body, headers=admin_headers)
+    assert response.status_code == 400
+    assert not [c for c in fake_supabase.calls if c['table'] == 'relationships']
+
+
+def test_failed_existing_read_writes_nothing(client, fake_supabase, admin_headers):
+    respond = upsert_responder(fail_read=True)
+    fake_supabase.respond = lambda call: respond(call, fake_supabase)
+    body = {'pairs': [{'character_id': 1, 'related_character_id': 2, 'type': 'ally'}]}
+    response = client.post(URL, json=body, headers=admin_headers)
+    assert response.status_code == 503
+    assert sent_rows(fake_supabase) is None
+    assert not [c for c in fake_supabase.calls if c['table'] == 'change_log']
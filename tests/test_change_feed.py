@@ -0,0 +1,65 @@
+import change_feed
+
+
+def log_responder(rows):
+    """Answer change_log reads from `rows` (ascending ids) the way PostgREST would."""
+    def respond(call):
+        if call['table'] != 'change_log' or call['method'] != 'GET':
+            return []
+        params = call['params']
+        selected = [row for row in rows if 'id' not in params or row['id'] > int(params['id'][3:])]
+        if params['order'] == 'id.desc':
+            selected = selected[::-1]
+        return selected[:params['limit']]
+    return respond
+
+
+def change(id_value, entity_id='1'):
+    return {'id': id_value, 'entity': 'character', 'entity_id': entity_id, 'action': 'updated', 'created_at': 'now'}
+
+
+def test_cursor_before_retained_history_is_told_to_reset(fake_supabase):
+    fake_supabase.respond = log_responder([change(50), change(51)])
+    result = change_feed.get_changes(10)
+    assert result['reset'] is True
+    assert result['cursor'] == 51
+
+
+def test_cursor_inside_retained_history_gets_coalesced_changes(fake_supabase):
+    fake_supabase.respond = log_responder([change(50), change(51, '2'), change(52)])
+    result = change_feed.get_changes(49)
+    assert result['reset'] is False
+    assert [(c['id'], c['cursor']) for c in result['changes']] == [('2', 51), ('1', 52)]
+    assert result['cursor'] == 52
+
+
+def test_empty_log_resets_any_existing_cursor(fake_supabase):
+    fake_supabase.respond = log_responder([])
+    assert change_feed.get_changes(500)['reset'] is True
+    assert change_feed.get_changes(0)['reset'] is False
+
+
+def test_compaction_keeps_the_newest_row(fake_supabase):
+    fake_supabase.respond = log_responder([change(50), change(51)])
+    change_feed.compact()
+    delete = [c for c in fake_supabase.calls if c['method'] == 'DELETE'][0]
+    assert delete['params']['id'] == 'lt.51'
+
+
+def test_failed_log_read_is_a_503(client, fake_supabase):
+    fake_supabase.respond = lambda call: fake_supabase.FAIL if call['table'] == 'change_log' else []
+    assert client.get('/api/changes?since=5').status_code == 503
+
+
+def test_failed_relationship_delete_records_nothing(client, fake_supabase, admin_headers):
+    fake_supabase.respond = lambda call: fake_supabase.FAIL if call['method'] == 'DELETE' else []
+    response = client.delete('/api/admin/relationships/1/2', headers=admin_headers)
+    assert response.status_code == 500
+    assert not [c for c in fake_supabase.calls if c['table'] == 'change_log']
+
+
+def test_relationship_delete_records_after_success(client, fake_supabase, admin_headers):
+    response = client.delete('/api/admin/relationships/1/2', headers=admin_headers)
+    assert response.status_code == 200
+    posts = [c for c in fake_supabase.calls if c['table'] == 'change_log' and c['method'] == 'POST']
+    assert [row['entity_id'] for row in posts[0]['data']] == ['1:2', '2:1']
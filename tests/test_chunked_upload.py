@@ -0,0 +1,125 @@
+import os
+
+import pytest
+
+import chunked_upload
+import database
+
+
+@pytest.fixture
+def store(monkeypatch, fake_supabase):
+    """In-memory uploads/upload_chunks tables and chunk bucket behind the Supabase client."""
+    state = {'uploads': {}, 'chunks': set(), 'objects': {}, 'fail_download': False}
+    monkeypatch.setattr(chunked_upload, 'CHUNK_SIZE', 4)
+
+    def respond(call):
+        table, params = call['table'], call['params']
+        if table == 'uploads':
+            if call['method'] == 'POST':
+                state['uploads'][call['data']['id']] = dict(call['data'])
+                return [dict(call['data'])]
+            if 'created_at' in params:
+                return []
+            upload_id = params['id'][3:]
+            row = state['uploads'].get(upload_id)
+            if call['method'] == 'DELETE':
+                state['uploads'].pop(upload_id, None)
+                state['chunks'] = {c for c in state['chunks'] if c[0] != upload_id}
+            return [row] if row else []
+        if table == 'upload_chunks':
+            if call['method'] == 'POST':
+                state['chunks'].add((call['data']['upload_id'], call['data']['idx']))
+                return [call['data']]
+            upload_id = params['upload_id'][3:]
+            return [{'idx': idx} for uid, idx in sorted(state['chunks']) if uid == upload_id]
+        return []
+
+    def upload_file(bucket, path, body, content_type, content_length=None, upsert=False):
+        assert bucket == chunked_upload.CHUNK_BUCKET and upsert
+        state['objects'][path] = body
+        return f'https://storage/{path}'
+
+    def download_file(bucket, path):
+        return None if state['fail_download'] else state['objects'].get(path)
+
+    def delete_files(bucket, paths):
+        for path in paths:
+            state['objects'].pop(path, None)
+        return list(paths)
+
+    fake_supabase.respond = respond
+    monkeypatch.setattr(database.supabase, 'upload_file', upload_file)
+    monkeypatch.setattr(database.supabase, 'download_file', download_file)
+    monkeypatch.setattr(database.supabase, 'delete_files', delete_files)
+    return state
+
+
+def test_offset_counts_only_contiguous_chunks(store):
+    upload = chunked_upload.create('big.png', 10, 'image/png')
+    assert (upload['chunks'], upload['offset'], upload['complete']) == (3, 0, False)
+
+    status = chunked_upload.write_chunk(upload['id'], 8, b'ij')
+    assert (status['received'], status['offset']) == ([2], 0)
+    status = chunked_upload.write_chunk(upload['id'], 0, b'abcd')
+    assert (status['received'], status['offset']) == ([0, 2], 4)
+    status = chunked_upload.write_chunk(upload['id'], 4, b'efgh')
+    assert (status['offset'], status['complete']) == (10, True)
+
+
+def test_resent_chunk_is_harmless(store):
+    upload = chunked_upload.create('a.png', 6, 'image/png')
+    chunked_upload.write_chunk(upload['id'], 0, b'abcd')
+    status = chunked_upload.write_chunk(upload['id'], 0, b'abcd')
+    assert status['received'] == [0]
+
+
+@pytest.mark.parametrize('offset, data', [(2, b'cdef'), (-4, b'abcd'), (12, b'ab'), (0, b'abc'), (8, b'ijk')])
+def test_misaligned_or_mis_sized_chunk_is_rejected(store, offset, data):
+    upload = chunked_upload.create('a.png', 10, 'image/png')
+    with pytest.raises(ValueError):
+        chunked_upload.write_chunk(upload['id'], offset, data)
+    assert store['objects'] == {}
+
+
+def test_unknown_or_malformed_ids_are_not_found(store):
+    for upload_id in ('0' * 32, '../../etc/passwd'):
+        with pytest.raises(chunked_upload.UploadNotFound):
+            chunked_upload.status(upload_id)
+
+
+def test_fetch_assembles_chunks_and_release_consumes_once(store):
+    upload = chunked_upload.create('a.png', 6, 'image/png')
+    chunked_upload.write_chunk(upload['id'], 4, b'ef')
+    with pytest.raises(ValueError):
+        chunked_upload.fetch(upload['id'])
+    chunked_upload.write_chunk(upload['id'], 0, b'abcd')
+
+    path, info = chunked_upload.fetch(upload['id'])
+    with open(path, 'rb') as f:
+        assert f.read() == b'abcdef'
+    os.remove(path)
+    chunked_upload.release(info)
+    assert store['objects'] == {}
+    with pytest.raises(chunked_upload.UploadNotFound):
+        chunked_upload.release(info)
+
+
+def test_failed_chunk_read_leaves_the_upload_in_place(store):
+    upload = chunked_upload.create('a.png', 4, 'image/png')
+    chunked_upload.write_chunk(upload['id'], 0, b'abcd')
+    store['fail_download'] = True
+    spooled = set(os.listdir(chunked_upload.job_queue.SPOOL_DIR))
+    with pytest.raises(chunked_upload.UploadFailed):
+        chunked_upload.fetch(upload['id'])
+    assert set(os.listdir(chunked_upload.job_queue.SPOOL_DIR)) == spooled
+    assert chunked_upload.status(upload['id'])['complete']
+
+
+def test_event_is_not_created_when_an_upload_cannot_be_read(client, fake_supabase, store, admin_headers):
+    upload = chunked_upload.create('a.png', 4, 'image/png')
+    chunked_upload.write_chunk(upload['id'], 0, b'abcd')
+    store['fail_download'] = True
+    response = client.post('/api/admin/events', data={'title': 'Crisis', 'upload_ids': upload['id']}, headers=admin_headers)
+    assert response.status_code == 503
+    assert not [c for c in fake_supabase.calls if c['table'] == 'events']
+    assert upload['id'] in store['uploads']
@@ -0,0 +1,74 @@
+import base64
+import json
+
+import pytest
+
+from database import Database, decode_cursor, encode_cursor, keyset_filter, keyset_position
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('2024-05-01T10:00:00+00:00', 42)
+    assert decode_cursor(cursor) == ['2024-05-01T10:00:00+00:00', 42]
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', raw_cursor({'id': 1}), base64.urlsafe_b64encode(b'{').decode()])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('values', [
+    ['2024-05-01', None],
+    ['2024-05-01', 'abc'],
+    ['2024-05-01', True],
+    ['2024-05-01', 1.5],
+    [None, 3],
+    ['2024"),id.gt.(0', 3],
+    ['2024-05-01'],
+])
+def test_keyset_position_rejects_unusable_values(values):
+    with pytest.raises(ValueError):
+        keyset_position(values)
+
+
+def test_keyset_filter_descending_and_ascending():
+    assert keyset_filter('created_at', '2024-05-01', 7) == \
+        '(created_at.lt."2024-05-01",and(created_at.eq."2024-05-01",id.lt.7))'
+    assert keyset_filter('name', 'Bruce', 7, descending=False) == \
+        '(name.gt."Bruce",and(name.eq."Bruce",id.gt.7))'
+
+
+def test_pending_edits_cursor_with_bad_id_is_a_bad_request(client, admin_headers):
+    response = client.get(f"/api/admin/pending-edits?cursor={raw_cursor(['2024-05-01', None])}", headers=admin_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+
+def test_pending_edits_page_filters_after_cursor(monkeypatch):
+    import database
+    seen = {}
+
+    def query_page(table, params=None, select='*', strict=False):
+        seen.update(params)
+        return [], 0
+
+    monkeypatch.setattr(database.supabase, 'query_page', query_page)
+    Database.get_pending_edits_page(limit=10, cursor=encode_cursor('2024-05-01', 9))
+    assert seen['or'] == '(created_at.lt."2024-05-01",and(created_at.eq."2024-05-01",id.lt.9))'
+
+
+def test_failed_pending_edits_read_is_unavailable_not_empty(client, admin_headers, monkeypatch):
+    import database
+
+    def query_page(table, params=None, select='*', strict=False):
+        assert strict
+        raise database.QueryError('GET pending_edits: 500')
+
+    monkeypatch.setattr(database.supabase, 'query_page', query_page)
+    response = client.get('/api/admin/pending-edits', headers=admin_headers)
+    assert response.status_code == 503
+    assert 'X-Total-Count' not in response.headers
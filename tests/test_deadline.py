@@ -0,0 +1,134 @@
+import pytest
+from flask import Flask
+
+import deadline
+from deadline import BudgetExceeded
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(deadline.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_no_budget_outside_a_request():
+    assert deadline.current() is None
+    assert deadline.call_timeout(10) == 10
+    assert deadline.expired() is False
+
+
+def test_call_timeout_is_what_is_left_capped(clock):
+    with deadline.request_budget(4):
+        assert deadline.call_timeout(10) == 4
+        clock[0] += 3
+        assert deadline.call_timeout(10) == pytest.approx(1)
+        assert deadline.call_timeout(0.5) == 0.5
+        assert deadline.call_timeout() == pytest.approx(1)
+    assert deadline.current() is None
+
+
+def test_spent_budget_raises(clock):
+    with deadline.request_budget(1):
+        clock[0] += 1
+        assert deadline.expired() is True
+        with pytest.raises(BudgetExceeded):
+            deadline.call_timeout(10)
+
+
+def make_app(budgets):
+    app = Flask(__name__)
+    app.config['REQUEST_BUDGETS'] = budgets
+    deadline.init_app(app)
+
+    @app.route('/slow')
+    def slow():
+        raise BudgetExceeded('spent')
+
+    @app.route('/partial')
+    def partial():
+        deadline.mark_partial()
+        return 'some'
+
+    @app.route('/unbounded')
+    def unbounded():
+        return str(deadline.current())
+
+    return app.test_client()
+
+
+def test_uncaught_budget_exceeded_is_a_fast_503():
+    response = make_app({}).get('/slow')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.headers['Cache-Control'] == 'no-store'
+
+
+def test_partial_response_is_flagged_and_not_cached():
+    response = make_app({}).get('/partial')
+    assert response.headers['X-Partial-Response'] == 'true'
+    assert response.headers['Cache-Control'] == 'no-store'
+
+
+def test_endpoint_budget_of_none_is_unbounded():
+    assert make_app({'unbounded': None}).get('/unbounded').get_data(as_text=True) == 'None'
+
+
+class RecordingClient:
+    """An httpx.Client stand-in answering every storage call with `responses`, recording the timeouts."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.timeouts = []
+
+    def _answer(self, timeout):
+        import httpx
+        self.timeouts.append(timeout)
+        return self.responses.pop(0) if self.responses else httpx.Response(200, json=[])
+
+    def request(self, method, url, headers=None, json=None, timeout=None):
+        return self._answer(timeout)
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        return self._answer(timeout)
+
+
+@pytest.fixture
+def storage_client(monkeypatch):
+    from contextlib import contextmanager
+    import database
+
+    client = RecordingClient([])
+
+    @contextmanager
+    def connection():
+        yield client
+
+    monkeypatch.setattr(database.supabase, 'url', 'https://project.supabase.co')
+    monkeypatch.setattr(database.supabase, 'key', 'key')
+    monkeypatch.setattr(database.supabase, 'connection', connection)
+    return client
+
+
+def test_storage_batches_get_the_remaining_budget_and_an_upstream_slot(clock, storage_client, monkeypatch):
+    import httpx
+    import database
+    slots = []
+    monkeypatch.setattr(database.upstream_limiter, 'acquire', lambda max_wait=None: slots.append(max_wait) or True)
+    storage_client.responses = [httpx.Response(200, json=[{'name': 'a'}]), httpx.Response(200, json=[{'name': 'b'}]),
+                                httpx.Response(200, json=[{'name': 'x.jpg', 'id': 1}])]
+    with deadline.request_budget(4):
+        assert database.supabase.delete_files('bucket', ['a', 'b'], batch_size=1) == ['a', 'b']
+        assert [o['path'] for o in database.supabase.list_files('bucket')] == ['x.jpg']
+    assert storage_client.timeouts == [4, 4, 4]
+    assert slots == [4, 4, 4]
+
+
+def test_storage_calls_stop_when_the_upstream_cap_is_reached(clock, storage_client, monkeypatch):
+    import database
+    monkeypatch.setattr(database.upstream_limiter, 'acquire', lambda max_wait=None: False)
+    with pytest.raises(BudgetExceeded):
+        database.supabase.delete_files('bucket', ['a'])
+    with pytest.raises(BudgetExceeded):
+        list(database.supabase.list_files('bucket'))
+    assert storage_client.timeouts == []
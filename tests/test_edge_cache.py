@@ -0,0 +1,43 @@
+from flask import Flask
+
+import edge_cache
+
+
+def make_app():
+    app = Flask(__name__)
+    edge_cache.init_app(app)
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        edge_cache.purge('characters', 'character:1')
+        edge_cache.purge('character:1', None)
+        assert recorder.purged == []
+        return 'ok'
+
+    return app
+
+
+recorder = edge_cache.LocalPurger()
+
+
+def setup_function():
+    recorder.purged.clear()
+    edge_cache.set_purger(recorder)
+
+
+def test_purge_in_request_is_deferred_and_coalesced():
+    client = make_app().test_client()
+    response = client.post('/write')
+    assert response.status_code == 200
+    response.close()
+    assert recorder.purged == [['character:1', 'characters']]
+
+
+def test_purge_outside_request_runs_immediately():
+    assert edge_cache.purge('events') is True
+    assert recorder.purged == [['events']]
+
+
+def test_purge_without_keys_is_a_no_op():
+    assert edge_cache.purge(None) is False
+    assert recorder.purged == []
@@ -0,0 +1,101 @@
+import pytest
+
+import database
+import job_queue
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    """Row counts served by query_page; a table mapped to None fails."""
+    totals = {'events': 3, 'event_summaries': 3}
+
+    def query_page(table, params=None, select='*', strict=False):
+        if totals[table] is None:
+            raise database.QueryError(f'GET {table} failed')
+        return [], totals[table]
+
+    monkeypatch.setattr(database.supabase, 'query_page', query_page)
+    monkeypatch.setattr(database, '_event_summaries_complete', False)
+    monkeypatch.setattr(database, '_event_summaries_checked_at', None)
+    monkeypatch.setattr(database, '_event_summaries_pending', set())
+    return totals
+
+
+def summary_row(call):
+    if call['table'] == 'event_summaries':
+        return [{'id': 1, 'title': 'From summaries', 'character_ids': []}]
+    if call['table'] == 'events':
+        return [{'id': 2, 'title': 'From events', 'event_characters': []}]
+    return []
+
+
+def test_partial_backfill_serves_the_joined_read(client, fake_supabase, counts):
+    counts['event_summaries'] = 2
+    fake_supabase.respond = summary_row
+    response = client.get('/api/events')
+    assert [e['title'] for e in response.get_json()] == ['From events']
+    assert not [c for c in fake_supabase.calls if c['table'] == 'event_summaries']
+
+
+def test_complete_backfill_serves_summaries(client, fake_supabase, counts):
+    fake_supabase.respond = summary_row
+    response = client.get('/api/events')
+    assert [e['title'] for e in response.get_json()] == ['From summaries']
+
+
+def test_failed_count_is_incomplete_and_rechecked_later(counts, monkeypatch):
+    counts['events'] = None
+    assert database.Database.event_summaries_complete() is False
+    counts['events'] = 3
+    assert database.Database.event_summaries_complete() is False  # within the recheck interval
+    monkeypatch.setattr(database, 'EVENT_SUMMARIES_RECHECK_SECONDS', 0)
+    assert database.Database.event_summaries_complete() is True
+
+
+@pytest.fixture
+def queued_jobs():
+    conn = job_queue._connect()
+    conn.execute('delete from jobs')
+    conn.close()
+    yield lambda: [job for job in job_queue.list_jobs() if job['kind'] == 'event.summaries.refresh']
+
+
+def test_failed_refresh_keeps_the_write_serves_the_joined_read_and_retries(client, fake_supabase, counts, queued_jobs):
+    upsert_fails = [True]
+
+    def respond(call):
+        if call['table'] == 'event_summaries' and call['method'] == 'POST':
+            return fake_supabase.FAIL if upsert_fails[0] else [{'id': 5}]
+        if call['table'] == 'events':
+            return [{'id': 5, 'title': 'Renamed', 'event_date': '2024-01-01'}]
+        return []
+
+    fake_supabase.respond = respond
+    assert database.Database.event_summaries_complete() is True
+    assert database.Database.update_event(5, {'title': 'Renamed'})['title'] == 'Renamed'
+    upsert = [c for c in fake_supabase.calls if c['table'] == 'event_summaries' and c['method'] == 'POST']
+    assert upsert[0]['strict']
+
+    # Counts still match, but the stale row must not be served until the refresh lands
+    assert database.Database.event_summaries_complete() is False
+    jobs = queued_jobs()
+    assert [(job['payload'], job['status']) for job in jobs] == [({'event_ids': [5]}, 'queued')]
+
+    upsert_fails[0] = False
+    job_queue.run_pending()
+    assert job_queue.get_job(jobs[0]['id'])['status'] == 'done'
+    assert database.Database.event_summaries_complete() is True
+
+
+def test_failed_character_refresh_is_retried_for_the_character(fake_supabase, counts, queued_jobs):
+    def respond(call):
+        if call['table'] == 'characters' and call['method'] == 'PATCH':
+            return [{'id': 7, 'name': 'New name'}]
+        if call['table'] == 'event_characters':
+            return fake_supabase.FAIL
+        return []
+
+    fake_supabase.respond = respond
+    assert database.Database.update_character(7, {'name': 'New name'}) == {'id': 7, 'name': 'New name'}
+    assert database.Database.event_summaries_complete() is False
+    assert [job['payload'] for job in queued_jobs()] == [{'character_id': 7}]
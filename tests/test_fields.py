@@ -0,0 +1,18 @@
+def test_unknown_character_field_is_rejected(client, fake_supabase):
+    response = client.get('/api/characters?fields=name,bogus')
+    assert response.status_code == 400
+    assert 'bogus' in response.get_json()['error']
+    assert not [c for c in fake_supabase.calls if c['table'] == 'characters']
+
+
+def test_known_character_fields_build_a_select(client, fake_supabase):
+    fake_supabase.respond = lambda call: [{'id': 1, 'name': 'Bruce'}]
+    response = client.get('/api/characters?fields=name,family')
+    assert response.status_code == 200
+    assert [c for c in fake_supabase.calls if c['table'] == 'characters'][0]['select'] == 'id,name,family:families(slug,name)'
+
+
+def test_unknown_event_field_is_rejected(client, fake_supabase):
+    response = client.get('/api/events?fields=title,password')
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['error']
@@ -0,0 +1,107 @@
+import re
+
+import pytest
+
+from database import Database, encode_cursor, keyset_filter
+
+GALLERY = [
+    {'id': 1, 'image_url': 'a.jpg', 'alt_text': 'A', 'created_at': '2024-01-05', 'event_id': None, 'characters': [1]},
+    {'id': 2, 'image_url': 'b.jpg', 'alt_text': 'B', 'created_at': '2024-01-03', 'event_id': None, 'characters': [1, 2]},
+    {'id': 3, 'image_url': 'c.jpg', 'alt_text': 'C', 'created_at': None, 'event_id': None, 'characters': [1]},
+    {'id': 4, 'image_url': 'd.jpg', 'alt_text': 'D', 'created_at': None, 'event_id': None, 'characters': [1]},
+    {'id': 5, 'image_url': 'x.jpg', 'alt_text': 'X', 'created_at': '2024-01-09', 'event_id': None, 'characters': [2]},
+]
+EVENT_IMAGES = [
+    {'id': 10, 'image_url': 'e.jpg', 'created_at': '2024-01-06', 'event_id': 7, 'characters': [1]},
+    {'id': 11, 'image_url': 'b.jpg', 'created_at': '2024-01-04', 'event_id': 7, 'characters': [1]},
+    {'id': 12, 'image_url': 'e.jpg', 'created_at': '2024-01-01', 'event_id': 7, 'characters': [1]},
+    {'id': 13, 'image_url': 'y.jpg', 'created_at': '2024-01-08', 'event_id': 8, 'characters': [2]},
+]
+JOINS = {
+    'gallery_images': ('gallery_image_characters!inner(character_id)', 'gallery_image_characters.character_id'),
+    'event_images': ('events!inner(title,event_characters!inner(character_id))', 'events.event_characters.character_id'),
+}
+
+
+def after(row, keyset):
+    """Evaluate the keyset filters produced by keyset_filter(..., nulls_last=True) for a descending order."""
+    match = re.fullmatch(r'\(and\(created_at\.is\.null,id\.lt\.(\d+)\)\)', keyset)
+    if match:
+        return row['created_at'] is None and row['id'] < int(match.group(1))
+    value, id_value = re.fullmatch(r'\(created_at\.lt\."([^"]*)",and\(created_at\.eq\."[^"]*",id\.lt\.(\d+)\),created_at\.is\.null\)', keyset).groups()
+    return (row['created_at'] is None or row['created_at'] < value
+            or (row['created_at'] == value and row['id'] < int(id_value)))
+
+
+def in_values(expression):
+    return [v.strip('"') for v in expression[len('in.('):-1].split(',')]
+
+
+def respond(call):
+    params = call['params']
+    join, join_filter = JOINS[call['table']]
+    # Only the character's rows, through the embedded inner join, never a list of ids
+    assert call['select'].endswith(join) and not params.get('id', '').startswith('in.')
+    character_id = int(params[join_filter][len('eq.'):])
+    rows = [row for row in (GALLERY if call['table'] == 'gallery_images' else EVENT_IMAGES)
+            if character_id in row['characters']]
+    if call['table'] == 'event_images':
+        rows = [dict(row, events={'title': 'Crisis', 'event_characters': [{'character_id': character_id}]}) for row in rows]
+    if 'image_url' in params:
+        urls = set(in_values(params['image_url']))
+        rows = [row for row in rows if row['image_url'] in urls]
+    if 'or' in params:
+        rows = [row for row in rows if after(row, params['or'])]
+    if 'order' in params:
+        assert params['order'] == 'created_at.desc.nullslast,id.desc'
+        rows.sort(key=lambda row: (row['created_at'] is not None, row['created_at'] or '', row['id']), reverse=True)
+    return rows[:params.get('limit', len(rows))]
+
+
+def walk(limit):
+    pages, cursor = [], None
+    while True:
+        images, cursor = Database.get_character_gallery_page(1, limit, cursor)
+        pages.append(images)
+        if not cursor:
+            return pages
+        assert len(pages) < 20, 'pagination does not terminate'
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_every_url_is_listed_once_across_pages(fake_supabase, limit):
+    fake_supabase.respond = respond
+    pages = walk(limit)
+    images = [img for page in pages for img in page]
+    assert [img['url'] for img in images] == ['e.jpg', 'a.jpg', 'b.jpg', 'd.jpg', 'c.jpg']
+    # b.jpg exists in the gallery, so its event copy is skipped even though it sorts earlier
+    assert next(img for img in images if img['url'] == 'b.jpg')['source'] == 'gallery'
+    assert next(img for img in images if img['url'] == 'e.jpg')['created_at'] == '2024-01-06'
+    assert next(img for img in images if img['url'] == 'e.jpg')['alt'] == 'From Crisis'
+
+
+def test_a_page_costs_four_requests(fake_supabase):
+    fake_supabase.respond = respond
+    Database.get_character_gallery_page(1, 2)
+    assert [call['table'] for call in fake_supabase.calls] == ['gallery_images', 'event_images'] * 2
+
+
+def test_cursor_at_a_null_created_at_continues_by_id(fake_supabase):
+    fake_supabase.respond = respond
+    cursor = encode_cursor([None, 4], [None, 1])
+    images, next_cursor = Database.get_character_gallery_page(1, 5, cursor)
+    assert [img['url'] for img in images] == ['c.jpg']
+    assert next_cursor is None
+
+
+def test_gallery_cursor_rejects_a_bad_position(fake_supabase):
+    with pytest.raises(ValueError):
+        Database.get_character_gallery_page(1, 5, encode_cursor(['2024-01-01', 'x'], None))
+    with pytest.raises(ValueError):
+        Database.get_character_gallery_page(1, 5, encode_cursor(None, None, None, None))
+
+
+def test_keyset_filter_nulls_last():
+    assert keyset_filter('created_at', '2024-01-01', 3, nulls_last=True) == \
+        '(created_at.lt."2024-01-01",and(created_at.eq."2024-01-01",id.lt.3),created_at.is.null)'
+    assert keyset_filter('created_at', None, 3, nulls_last=True) == '(and(created_at.is.null,id.lt.3))'
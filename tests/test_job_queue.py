@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+import job_queue
+
+calls = []
+
+
+@job_queue.task('test.record')
+def record_job(payload):
+    calls.append(payload)
+    return {'seen': payload.get('n')}
+
+
+@job_queue.task('test.fail')
+def failing_job(payload):
+    raise RuntimeError('boom')
+
+
+@pytest.fixture(autouse=True)
+def empty_queue(monkeypatch):
+    conn = job_queue._connect()
+    conn.execute('delete from jobs')
+    conn.close()
+    calls.clear()
+    monkeypatch.setattr(job_queue, 'MODE', 'threads')
+    now = [1000.0]
+    monkeypatch.setattr(job_queue.time, 'time', lambda: now[0])
+    return now
+
+
+def test_claim_takes_the_oldest_ready_job_once():
+    first = job_queue.enqueue('test.record', {'n': 1})
+    job_queue.enqueue('test.record', {'n': 2})
+    job = job_queue._claim()
+    assert job['id'] == first and job['attempts'] == 1
+    assert job_queue._claim()['id'] == first + 1
+    assert job_queue._claim() is None
+
+
+def test_delayed_job_is_not_claimed_early(empty_queue):
+    job_queue.enqueue('test.record', {}, delay=30)
+    assert job_queue._claim() is None
+    empty_queue[0] += 31
+    assert job_queue._claim() is not None
+
+
+def test_failed_attempt_backs_off_then_gives_up(empty_queue):
+    job_id = job_queue.enqueue('test.fail', {}, max_attempts=2)
+    assert job_queue.run_job(job_queue._claim()) is False
+    job = job_queue.get_job(job_id)
+    assert job['status'] == 'queued' and job['last_error'] == 'RuntimeError: boom'
+    assert job_queue._claim() is None  # backing off
+    empty_queue[0] += 2
+    job_queue.run_job(job_queue._claim())
+    assert job_queue.get_job(job_id)['status'] == 'failed'
+
+
+def test_retry_requeues_a_failed_job_with_fresh_attempts():
+    job_id = job_queue.enqueue('test.fail', {}, max_attempts=1)
+    job_queue.run_job(job_queue._claim())
+    assert job_queue.retry(job_id) is True
+    assert job_queue._claim()['attempts'] == 1
+    assert job_queue.retry(job_id) is False  # running, not failed
+
+
+def test_expired_lease_is_claimed_again(empty_queue):
+    job_id = job_queue.enqueue('test.record', {})
+    job_queue._claim()
+    assert job_queue._claim() is None
+    empty_queue[0] += job_queue.LEASE_SECONDS + 1
+    job = job_queue._claim()
+    assert job['id'] == job_id and job['attempts'] == 2
+
+
+def test_newer_job_supersedes_queued_job_with_the_same_key():
+    old = job_queue.enqueue('test.record', {'n': 1}, key='event:5:links')
+    other = job_queue.enqueue('test.record', {'n': 2}, key='event:6:links')
+    new = job_queue.enqueue('test.record', {'n': 3}, key='event:5:links')
+    assert job_queue.get_job(old)['status'] == 'superseded'
+    assert job_queue.get_job(old)['result'] == {'superseded_by': new}
+    assert [job_queue._claim()['id'], job_queue._claim()['id']] == [other, new]
+
+
+def test_job_waits_while_an_older_job_with_its_key_runs(empty_queue):
+    running = job_queue.enqueue('test.record', {'n': 1}, key='character:1:bio')
+    job_queue._claim()
+    waiting = job_queue.enqueue('test.record', {'n': 2}, key='character:1:bio')
+    assert job_queue._claim() is None
+    job_queue._finish({'id': running}, 'done')
+    assert job_queue._claim()['id'] == waiting
+
+
+def test_superseded_failed_job_is_not_retried():
+    old = job_queue.enqueue('test.fail', {}, max_attempts=1, key='character:1:bio')
+    job_queue.run_job(job_queue._claim())
+    job_queue.enqueue('test.record', {}, key='character:1:bio')
+    assert job_queue.retry(old) is False
+
+
+def test_inline_mode_runs_the_job_inside_enqueue(monkeypatch):
+    monkeypatch.setattr(job_queue, 'MODE', 'inline')
+    done = job_queue.enqueue('test.record', {'n': 7})
+    failed = job_queue.enqueue('test.fail', {})
+    assert calls == [{'n': 7}]
+    assert job_queue.summaries([done, failed]) == [
+        {'id': done, 'kind': 'test.record', 'status': 'done', 'last_error': None},
+        {'id': failed, 'kind': 'test.fail', 'status': 'failed', 'last_error': 'RuntimeError: boom'},
+    ]
+
+
+def test_spooled_files_are_removed_when_a_job_is_superseded():
+    path = job_queue.spool(b'data')
+    job_queue.enqueue('test.record', {'spooled': [path]}, key='k')
+    job_queue.enqueue('test.record', {}, key='k')
+    assert not os.path.exists(path)
@@ -0,0 +1,85 @@
+from flask import Flask
+
+import rate_limit
+from rate_limit import BucketRegistry, TokenBucket
+
+
+def make_app(proxies):
+    app = Flask(__name__)
+    app.config['TRUSTED_PROXY_COUNT'] = proxies
+    rate_limit.init_app(app)
+
+    @app.route('/ip')
+    def ip():
+        return rate_limit.client_ip()
+
+    return app.test_client()
+
+
+def test_client_ip_ignores_forwarded_header_without_a_trusted_proxy():
+    client = make_app(0)
+    response = client.get('/ip', headers={'X-Forwarded-For': '6.6.6.6'}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.get_data(as_text=True) == '10.0.0.1'
+
+
+def test_client_ip_takes_the_address_added_by_the_trusted_proxy():
+    client = make_app(1)
+    response = client.get('/ip', headers={'X-Forwarded-For': '6.6.6.6, 1.2.3.4'}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.get_data(as_text=True) == '1.2.3.4'
+
+
+def test_token_bucket_spends_burst_then_reports_wait(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert bucket.consume(3) == 0
+    assert bucket.consume(3) == 1.0
+    now[0] += 1.0
+    assert bucket.consume(3) == 0
+
+
+def test_token_bucket_never_refills_past_capacity(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=10, capacity=5)
+    now[0] += 60
+    assert bucket.consume(5) == 0
+    assert bucket.consume(1) == 0.1
+
+
+def test_bucket_registry_evicts_least_recently_used_key():
+    registry = BucketRegistry(rate=1, capacity=1, max_keys=2)
+    first = registry.get('a')
+    registry.get('b')
+    registry.get('a')
+    registry.get('c')
+    assert set(registry.buckets) == {'a', 'c'}
+    assert registry.get('a') is first
+
+
+def test_token_bucket_charge_goes_into_bounded_debt(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=1, capacity=4)
+    bucket.charge(10)
+    assert bucket.tokens == -4
+    assert bucket.consume(1) == 5.0
+
+
+def test_fan_out_is_charged_per_upstream_call(monkeypatch):
+    monkeypatch.setattr(rate_limit, 'PUBLIC_RATE', 1)
+    monkeypatch.setattr(rate_limit, 'public_buckets', BucketRegistry(rate=0, capacity=20))
+    app = Flask(__name__)
+
+    @app.route('/fan-out/<int:n>')
+    @rate_limit.rate_limited(2)
+    def fan_out(n):
+        for _ in range(n):
+            rate_limit.upstream_limiter.acquire()
+        return 'ok'
+
+    client = app.test_client()
+    client.get('/fan-out/1', environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    assert rate_limit.public_buckets.get('10.0.0.9').tokens == 18
+    client.get('/fan-out/7', environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    assert rate_limit.public_buckets.get('10.0.0.9').tokens == 11
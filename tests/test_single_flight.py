@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def wait_until(predicate, timeout=5):
+    stop = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < stop, 'timed out waiting for callers to line up'
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call_and_get_their_own_copy():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_read():
+        calls.append(1)
+        release.wait(5)
+        return [{'id': 1}]
+
+    threads = run_concurrently(5, lambda: results.append(flight.do('characters', slow_read)))
+    wait_until(lambda: flight.snapshot()['collapsed'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[{'id': 1}]] * 5
+    assert len({id(result) for result in results}) == 5
+    assert flight.snapshot()['max_waiters'] == 4
+
+
+def test_error_reaches_every_waiter_and_the_key_is_released():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing_read():
+        release.wait(5)
+        raise ValueError('upstream down')
+
+    def caller():
+        try:
+            flight.do('k', failing_read)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = run_concurrently(3, caller)
+    wait_until(lambda: flight.snapshot()['collapsed'] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ['upstream down'] * 3
+    assert flight.do('k', lambda: 'fresh') == 'fresh'
+
+
+def test_waiter_times_out_without_cancelling_the_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = run_concurrently(1, lambda: flight.do('k', lambda: release.wait(5)))[0]
+    wait_until(lambda: flight.snapshot()['in_flight'] == 1)
+    with pytest.raises(TimeoutError):
+        flight.do('k', lambda: None, timeout=0.01)
+    release.set()
+    leader.join()
+    assert flight.snapshot()['in_flight'] == 0
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert [flight.do('k', lambda: n) for n in range(3)] == [0, 1, 2]
+    assert flight.snapshot()['collapse_ratio'] == 0.0
@@ -0,0 +1,76 @@
+import pytest
+
+import database
+import storage_sweeper
+
+BASE = 'https://project.supabase.co/storage/v1/object/public'
+OLD = '2020-01-01T00:00:00Z'
+
+
+@pytest.fixture
+def storage(monkeypatch, fake_supabase):
+    state = {'objects': {}, 'deleted': []}
+    monkeypatch.setattr(database.supabase, 'url', 'https://project.supabase.co')
+    monkeypatch.setattr(database.supabase, 'list_files', lambda bucket: iter(state['objects'].get(bucket, [])))
+
+    def delete_files(bucket, paths):
+        state['deleted'].append((bucket, list(paths)))
+        return list(paths)
+
+    monkeypatch.setattr(database.supabase, 'delete_files', delete_files)
+    return state
+
+
+def obj(path, created_at=OLD, size=10):
+    return {'path': path, 'size': size, 'created_at': created_at}
+
+
+def references(pages):
+    """Answer reference reads from {table: [rows]}, honouring the id keyset and page size."""
+    def respond(call):
+        rows = pages.get(call['table'], [])
+        after = int(call['params']['id'][3:])
+        return [row for row in rows if row['id'] > after][:call['params']['limit']]
+    return respond
+
+
+def test_orphans_are_unreferenced_objects_old_enough(storage, fake_supabase, monkeypatch):
+    monkeypatch.setattr(storage_sweeper, 'MAX_ORPHAN_RATIO', 1)
+    storage['objects']['gallery-images'] = [obj('a.jpg'), obj('b.jpg'), obj('new.jpg', created_at='2999-01-01T00:00:00Z')]
+    fake_supabase.respond = references({'gallery_images': [{'id': 1, 'image_url': f'{BASE}/gallery-images/a.jpg'}]})
+    result = storage_sweeper.sweep(dry_run=False, buckets=('gallery-images',))
+    report = result['buckets']['gallery-images']
+    assert (report['objects'], report['orphans'], report['skipped_recent'], report['deleted']) == (3, 1, 1, 1)
+    assert storage['deleted'] == [('gallery-images', ['b.jpg'])]
+
+
+def test_references_are_read_across_pages(storage, fake_supabase, monkeypatch):
+    monkeypatch.setattr(storage_sweeper, 'PAGE_SIZE', 2)
+    rows = [{'id': i, 'image_url': f'{BASE}/event-images/{i}.jpg'} for i in range(1, 6)]
+    fake_supabase.respond = references({'event_images': rows})
+    referenced = storage_sweeper.referenced_paths(('event-images',))
+    assert referenced['event-images'] == {f'{i}.jpg' for i in range(1, 6)}
+
+
+def test_failed_page_aborts_the_sweep_before_deleting(storage, fake_supabase, monkeypatch):
+    monkeypatch.setattr(storage_sweeper, 'PAGE_SIZE', 2)
+    storage['objects']['event-images'] = [obj(f'{i}.jpg') for i in range(1, 6)]
+    rows = [{'id': i, 'image_url': f'{BASE}/event-images/{i}.jpg'} for i in range(1, 6)]
+
+    def respond(call):
+        if call['table'] == 'event_images' and call['params']['id'] != 'gt.0':
+            return fake_supabase.FAIL  # second page fails
+        return references({'event_images': rows})(call)
+
+    fake_supabase.respond = respond
+    with pytest.raises(database.QueryError):
+        storage_sweeper.sweep(dry_run=False, buckets=('event-images',), force=True)
+    assert storage['deleted'] == []
+    assert all(call['strict'] for call in fake_supabase.calls)
+
+
+def test_guard_refuses_to_delete_most_of_a_bucket(storage, fake_supabase):
+    storage['objects']['character-images'] = [obj('x.jpg'), obj('y.jpg')]
+    with pytest.raises(RuntimeError):
+        storage_sweeper.sweep(dry_run=False, buckets=('character-images',))
+    assert storage['deleted'] == []
@@ -0,0 +1,69 @@
+from database import Database, sync_rows
+
+
+def respond_with(fake, current, fail=()):
+    def respond(call):
+        if (call['method'], call['table']) in fail:
+            return fake.FAIL
+        if call['method'] == 'GET':
+            return [dict(row) for row in current]
+        if call['method'] == 'DELETE':
+            return [{'id': 0}]
+        return call['data']
+    return respond
+
+
+CURRENT = [
+    {'id': 1, 'event_id': 5, 'character_id': 10},
+    {'id': 2, 'event_id': 5, 'character_id': 11},
+]
+
+
+def test_diff_inserts_and_deletes_only_the_changes(fake_supabase):
+    fake_supabase.respond = respond_with(fake_supabase, CURRENT)
+    result = sync_rows('event_characters', {'event_id': 5},
+                       [{'character_id': 11}, {'character_id': 12}], key_fields=('character_id',))
+    assert result == {'inserted': 1, 'updated': 0, 'deleted': 1, 'ok': True}
+
+    read, delete, insert = fake_supabase.calls
+    assert read['strict'] is True
+    assert delete['method'] == 'DELETE' and delete['params'] == {'id': 'in.(1)'}
+    assert insert['data'] == [{'event_id': 5, 'character_id': 12}]
+
+
+def test_unchanged_set_costs_only_the_read(fake_supabase):
+    fake_supabase.respond = respond_with(fake_supabase, CURRENT)
+    result = sync_rows('event_characters', {'event_id': 5},
+                       [{'character_id': 10}, {'character_id': 11}], key_fields=('character_id',))
+    assert result['ok'] and len(fake_supabase.calls) == 1
+
+
+def test_changed_compare_field_is_upserted_on_id(fake_supabase):
+    current = [{'id': 7, 'character_id': 1, 'section_title': 'Old', 'content': 'x', 'display_order': 0}]
+    fake_supabase.respond = respond_with(fake_supabase, current)
+    result = sync_rows('character_bio', {'character_id': 1},
+                       [{'id': 7, 'section_title': 'New', 'content': 'x', 'display_order': 0}],
+                       key_fields=('id',), compare_fields=('section_title', 'content', 'display_order'))
+    assert result == {'inserted': 0, 'updated': 1, 'deleted': 0, 'ok': True}
+    upsert = fake_supabase.calls[1]
+    assert upsert['on_conflict'] == 'id' and upsert['data'][0]['section_title'] == 'New'
+
+
+def test_failed_delete_is_reported(fake_supabase):
+    fake_supabase.respond = respond_with(fake_supabase, CURRENT, fail={('DELETE', 'event_characters')})
+    result = sync_rows('event_characters', {'event_id': 5}, [{'character_id': 10}], key_fields=('character_id',))
+    assert result['deleted'] == 1 and result['ok'] is False
+
+
+def test_failed_read_writes_nothing(fake_supabase):
+    fake_supabase.respond = respond_with(fake_supabase, CURRENT, fail={('GET', 'event_characters')})
+    result = sync_rows('event_characters', {'event_id': 5}, [{'character_id': 10}], key_fields=('character_id',))
+    assert result['ok'] is False
+    assert [c['method'] for c in fake_supabase.calls] == ['GET']
+
+
+def test_link_wrappers_return_success_flag(fake_supabase):
+    fake_supabase.respond = respond_with(fake_supabase, CURRENT, fail={('DELETE', 'gallery_image_characters')})
+    assert Database.update_image_character_links(3, [10]) is False
+    fake_supabase.respond = respond_with(fake_supabase, CURRENT)
+    assert Database.update_image_character_links(3, [10, 11]) is True
@@ -0,0 +1,86 @@
+import pytest
+
+LINKS = [
+    {'event_id': 1, 'character_id': 1},
+    {'event_id': 2, 'character_id': 2},
+    {'event_id': 3, 'character_id': 1},
+    {'event_id': 3, 'character_id': 2},
+    {'event_id': 4, 'character_id': 2},
+]
+EVENTS = [
+    {'id': 1, 'title': 'Origin', 'event_date': '1939-05-01', 'era': 'classic', 'summary': ''},
+    {'id': 2, 'title': 'Crisis', 'event_date': '1985-04-01', 'era': 'post-crisis', 'summary': ''},
+    {'id': 3, 'title': 'Team-up', 'event_date': '2011-09-01', 'era': 'new-52', 'summary': ''},
+    {'id': 4, 'title': 'Reunion', 'event_date': '2016-06-01', 'era': 'classic', 'summary': ''},
+]
+
+
+@pytest.fixture
+def timelines(client, fake_supabase, monkeypatch):
+    import app
+    monkeypatch.setattr(app, 'ERA_NAMES', {'new-52': 'The New 52', 'classic': 'Classic', 'post-crisis': 'Post-Crisis'})
+
+    def respond(call):
+        if call['table'] == 'event_characters':
+            wanted = call['params']['character_id'][4:-1].split(',')
+            return [link for link in LINKS if str(link['character_id']) in wanted]
+        if call['table'] == 'events':
+            wanted = call['params']['id'][4:-1].split(',')
+            rows = [dict(event) for event in EVENTS if str(event['id']) in wanted]
+            window = call['params'].get('and', '()')[1:-1]
+            for bound in filter(None, window.split(',')):
+                _, op, value = bound.split('.', 2)
+                rows = [row for row in rows if (row['event_date'] >= value if op == 'gte' else row['event_date'] <= value)]
+            return rows[:call['params']['limit']]
+        return []
+
+    fake_supabase.respond = respond
+    return client
+
+
+def eras(body):
+    return [(era['era'], [event['id'] for event in era['events']]) for era in body['eras']]
+
+
+def test_shared_events_appear_once_and_are_marked(timelines):
+    body = timelines.get('/api/timelines?ids=2,1').get_json()
+    events = {event['id']: event for era in body['eras'] for event in era['events']}
+    assert sorted(events) == [1, 2, 3, 4]
+    assert events[3]['shared'] is True and events[3]['character_ids'] == [2, 1]
+    assert events[1]['shared'] is False and events[1]['character_ids'] == [1]
+
+
+def test_eras_follow_era_names_order(timelines):
+    body = timelines.get('/api/timelines?ids=1,2').get_json()
+    assert eras(body) == [('new-52', [3]), ('classic', [1, 4]), ('post-crisis', [2])]
+    assert body['eras'][0]['era_display'] == 'The New 52'
+
+
+def test_window_limits_the_events(timelines, fake_supabase):
+    body = timelines.get('/api/timelines?ids=1,2&from=1980-01-01&to=2012-01-01').get_json()
+    assert body['window'] == {'from': '1980-01-01', 'to': '2012-01-01'}
+    assert eras(body) == [('new-52', [3]), ('post-crisis', [2])]
+    events_call = [c for c in fake_supabase.calls if c['table'] == 'events'][0]
+    assert events_call['params']['and'] == '(event_date.gte.1980-01-01,event_date.lte.2012-01-01)'
+
+
+def test_more_events_than_the_limit_are_truncated(timelines):
+    body = timelines.get('/api/timelines?ids=1,2&limit=3').get_json()
+    assert (body['total'], body['truncated']) == (3, True)
+    body = timelines.get('/api/timelines?ids=1,2&limit=4').get_json()
+    assert (body['total'], body['truncated']) == (4, False)
+
+
+def test_bad_ids_are_named(timelines):
+    response = timelines.get('/api/timelines?ids=1,2,abc,-3')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid character id(s): abc, -3'}
+
+
+@pytest.mark.parametrize('table', ['event_characters', 'events'])
+def test_failed_read_is_unavailable_and_not_cached(client, fake_supabase, table):
+    fake_supabase.respond = lambda call: fake_supabase.FAIL if call['table'] == table else \
+        [{'event_id': 1, 'character_id': 1}]
+    response = client.get('/api/timelines?ids=1')
+    assert response.status_code == 503
+    assert 's-maxage' not in response.headers.get('Cache-Control', '')